@@ -22,9 +22,11 @@ sys.path.insert(0, parent_dir)
 sys.path.insert(0, fire_detection_dir)
 
 # Import modules
-from fetch_live_data import fetch_nasa_firms_data, fetch_cwfis_data, fetch_weather_data
-from iot_data import fetch_iot_sensor_data, analyze_iot_risk
-from vegetation_data import fetch_vegetation_data, get_vegetation_fire_risk
+from parallel_fetch import fetch_all_sources
+from feed_cache import clear_feed_cache
+from iot_data import iot_votes
+from vegetation_data import get_vegetation_fire_risk
+from hotspot_index import nearby_count, SATELLITE_RADIUS_KM, OFFICIAL_RADIUS_KM
 
 # Page config
 st.set_page_config(
@@ -166,6 +168,7 @@ st.sidebar.markdown("---")
 # Refresh button
 if st.sidebar.button("🔄 Check Again!", type="primary", use_container_width=True):
     st.cache_data.clear()
+    clear_feed_cache()
     st.rerun()
 
 st.sidebar.markdown("---")
@@ -198,12 +201,13 @@ def check_for_fire(lat, lon, location):
         'data': {}
     }
     
-    # Get data
-    satellites = fetch_nasa_firms_data()
-    official = fetch_cwfis_data()
-    weather = fetch_weather_data(lat, lon)
-    sensors = fetch_iot_sensor_data(location=location)
-    plants = fetch_vegetation_data(lat, lon)
+    # Get data (all sources at once)
+    sources = fetch_all_sources(lat, lon, location)
+    satellites = sources['nasa']
+    official = sources['cwfis']
+    weather = sources['weather']
+    sensors = sources['iot']
+    plants = sources['vegetation']
     
     result['data'] = {
         'satellites': satellites,
@@ -213,15 +217,17 @@ def check_for_fire(lat, lon, location):
         'plants': plants
     }
     
-    # Check 1: Satellites
-    if satellites is not None and len(satellites) > 0:
+    # Check 1: Satellites (only hot spots close to you count)
+    nearby_spots = int(nearby_count(satellites, lat, lon, SATELLITE_RADIUS_KM)[0])
+    if nearby_spots > 0:
         result['checks_passed'] += 1
-        result['clues'].append(f"🛰️ Satellites saw {len(satellites)} hot spots!")
+        result['clues'].append(f"🛰️ Satellites saw {nearby_spots} hot spots within {SATELLITE_RADIUS_KM} km!")
     
-    # Check 2: Official reports
-    if official is not None and len(official) > 0:
+    # Check 2: Official reports (only fires close to you count)
+    nearby_fires = int(nearby_count(official, lat, lon, OFFICIAL_RADIUS_KM)[0])
+    if nearby_fires > 0:
         result['checks_passed'] += 1
-        result['clues'].append(f"🔥 {len(official)} fires officially reported!")
+        result['clues'].append(f"🔥 {nearby_fires} fires officially reported within {OFFICIAL_RADIUS_KM} km!")
     
     # Check 3: Weather
     if weather and 'current' in weather:
@@ -235,11 +241,14 @@ def check_for_fire(lat, lon, location):
             result['clues'].append(f"🌡️ Very hot & dry! ({temp}°C, {humidity}% wet)")
     
     # Check 4: Sensors
-    risk = analyze_iot_risk(sensors)
-    result['sensor_risk'] = risk
-    if risk in ['HIGH', 'MEDIUM'] or sensors.get('flame_detected'):
-        result['checks_passed'] += 1
-        result['clues'].append(f"📡 Sensors smell smoke! (Risk: {risk})")
+    if sensors:
+        risks, votes = iot_votes([sensors['temperature']], [sensors['smoke_level']],
+                                 [sensors.get('flame_detected', False)], [sensors.get('anomaly', False)])
+        risk = str(risks[0])
+        result['sensor_risk'] = risk
+        if votes[0]:
+            result['checks_passed'] += 1
+            result['clues'].append(f"📡 Sensors smell smoke! (Risk: {risk})")
     
     # Vegetation
     result['plant_risk'] = get_vegetation_fire_risk(plants)
@@ -6,60 +6,49 @@
 import pydeck as pdk
 import plotly.express as px
 import pandas as pd
-from scipy.spatial import ConvexHull
+from fire_events import cluster_summary
+from fire_fusion import fuse_hotspots, fusion_counts
+from risk_grid import compute_risk_level
+from hotspots import hotspot_frame
 
 # --- Helper: Approximate fire area in hectares ---
 def calculate_fire_area(points_df):
-    """Estimate fire area using convex hull of NASA points."""
-    if points_df is None or len(points_df) < 3:
+    """Total area of the separate fires among the NASA points (hectares)."""
+    if points_df is None or len(points_df) == 0:
         return 0.0
-    try:
-        hull = ConvexHull(points_df[['latitude', 'longitude']].values)
-        area = hull.volume * 100  # rough hectare approximation
-        return round(area, 2)
-    except Exception:
-        return 0.0
-
-
-# --- Helper: Compute combined risk level ---
-def compute_risk_level(weather_data, vegetation_risk, sensor_risk):
-    """Combine vegetation, weather, and sensor risks."""
-    wind = weather_data['current'].get('wind_speed_10m', 0)
-    humidity = weather_data['current'].get('relative_humidity_2m', 50)
-    temperature = weather_data['current'].get('temperature_2m', 20)
-
-    sensor_score = {"HIGH": 1.0, "MEDIUM": 0.6, "LOW": 0.3, "UNKNOWN": 0.4}.get(sensor_risk, 0.4)
-    risk_score = (
-        (0.4 * vegetation_risk) +
-        (0.3 * (wind / 30)) +
-        (0.2 * (1 - humidity / 100)) +
-        (0.1 * sensor_score)
-    )
-
-    if risk_score < 0.3: return "🟢 Low"
-    elif risk_score < 0.6: return "🟡 Medium"
-    elif risk_score < 0.8: return "🟠 High"
-    else: return "🔴 Very High"
+    return round(float(cluster_summary(points_df)['area_ha'].sum()), 2)
 
 
 # --- Main Visualization Function ---
 def visualize_fire_dashboard(result):
-    """Visualize detected fires using NASA + IoT data."""
-    satellites = result['data'].get('satellites', [])
+    """Visualize fires the satellites see but no official report covers yet."""
+    satellites = result['data'].get('satellites')
+    official = result['data'].get('official')
     weather = result['data'].get('weather', {})
     sensors = result['data'].get('sensors', {})
     plants = result['data'].get('plants', {})
 
-    # Convert to DataFrame
-    sat_df = pd.DataFrame(satellites) if satellites else pd.DataFrame()
+    # Compact hotspot frame (feed results are used as-is, not copied)
+    all_df = hotspot_frame(satellites)
+    official_df = official if isinstance(official, pd.DataFrame) or official is None else pd.DataFrame(official)
 
-    if sat_df.empty:
+    if all_df.empty:
         st.info("✅ No active satellite fire detections nearby.")
         return
 
+    # --- Fuse with official reports: keep only unreported hotspots ---
+    fused = fuse_hotspots(all_df, official_df)
+    counts = fusion_counts(fused)
+    sat_df = fused[fused['status'] == 'new'][['latitude', 'longitude', 'frp']]
+
+    if sat_df.empty:
+        st.info(f"✅ All {counts['confirmed']} current satellite detections are already officially reported.")
+        return
+
     # --- Calculate Metrics ---
     total_points = len(sat_df)
-    area_estimate = calculate_fire_area(sat_df)
+    fires = cluster_summary(sat_df)
+    area_estimate = round(float(fires['area_ha'].sum()), 2)
     vegetation_risk = get_vegetation_fire_risk(plants)
     sensor_risk = result.get('sensor_risk', 'LOW')
     risk_level = compute_risk_level(weather, vegetation_risk, sensor_risk)
@@ -70,10 +59,12 @@ def visualize_fire_dashboard(result):
     with col1:
         st.markdown(f'<div class="metric-box">🔥<br><b>Fire Area</b><br>{area_estimate} ha</div>', unsafe_allow_html=True)
     with col2:
-        st.markdown(f'<div class="metric-box">🛰️<br><b>Satellite Detections</b><br>{total_points}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-box">🛰️<br><b>Unreported Detections</b><br>{total_points} in {len(fires)} fires</div>', unsafe_allow_html=True)
     with col3:
         st.markdown(f'<div class="metric-box">⚠️<br><b>Overall Risk</b><br>{risk_level}</div>', unsafe_allow_html=True)
 
+    st.caption(f"🛰️ {counts['confirmed']} detections match official reports, "
+               f"{counts['stale']} are stale and {counts['new']} are unreported")
     st.markdown("---")
 
     # --- Fire Map ---
@@ -22,9 +22,13 @@ sys.path.insert(0, fire_detection_dir)
 
 # Import directly from module files (not from 'modules' package)
 try:
-    from fetch_live_data import fetch_nasa_firms_data, fetch_cwfis_data, fetch_weather_data
-    from iot_data import fetch_iot_sensor_data, analyze_iot_risk
-    from vegetation_data import fetch_vegetation_data, get_vegetation_fire_risk
+    from parallel_fetch import fetch_all_sources
+    from feed_cache import cache_stats, clear_feed_cache
+    from iot_data import iot_votes
+    from vegetation_data import get_vegetation_fire_risk
+    from hotspot_index import nearby_count, SATELLITE_RADIUS_KM, OFFICIAL_RADIUS_KM
+    from risk_grid import risk_grid, RISK_LEVELS
+    from hotspots import readable
 except ImportError as e:
     st.error(f"Import Error: {e}")
     st.error(f"Current directory: {current_dir}")
@@ -112,6 +116,8 @@ else:
 st.sidebar.markdown("---")
 if st.sidebar.button("🔄 Refresh Data Now", type="primary", key="refresh_btn"):
     st.cache_data.clear()
+    clear_feed_cache()
+    risk_grid.invalidate()
     st.rerun()
 
 st.sidebar.markdown("---")
@@ -127,6 +133,9 @@ st.sidebar.info("""
 **Voting Logic:** Fire detected if 2+ sources confirm.
 """)
 
+feed_stats = cache_stats()
+st.sidebar.caption(f"🗄️ Feed cache: {feed_stats['hits']} hits / {feed_stats['misses']} downloads")
+
 # Main detection function
 @st.cache_data(ttl=60, show_spinner=False)
 def run_detection(lat, lon, location_name):
@@ -143,34 +152,31 @@ def run_detection(lat, lon, location_name):
         'data_sources': {}
     }
     
-    # Fetch data
-    nasa_data = fetch_nasa_firms_data()
-    results['data_sources']['nasa'] = nasa_data
-    
-    cwfis_data = fetch_cwfis_data()
-    results['data_sources']['cwfis'] = cwfis_data
-    
-    weather_data = fetch_weather_data(lat, lon)
-    results['data_sources']['weather'] = weather_data
-    
-    iot_data = fetch_iot_sensor_data(location=location_name)
-    results['data_sources']['iot'] = iot_data
-    
-    veg_data = fetch_vegetation_data(lat, lon)
-    results['data_sources']['vegetation'] = veg_data
+    # Fetch data (all sources in parallel, bounded by one deadline)
+    sources = fetch_all_sources(lat, lon, location_name)
+    nasa_data = sources['nasa']
+    cwfis_data = sources['cwfis']
+    weather_data = sources['weather']
+    iot_data = sources['iot']
+    veg_data = sources['vegetation']
+    results['data_sources'] = sources
     
     # Voting logic
     fire_votes = 0
     
-    # Vote 1: Satellite
-    if nasa_data is not None and len(nasa_data) > 0:
+    # Vote 1: Satellite (hotspots near the location)
+    nearby_hotspots = int(nearby_count(nasa_data, lat, lon, SATELLITE_RADIUS_KM)[0])
+    results['nearby_hotspots'] = nearby_hotspots
+    if nearby_hotspots > 0:
         fire_votes += 1
-        results['evidence'].append(f"🛰️ Satellite: {len(nasa_data)} hotspots detected")
+        results['evidence'].append(f"🛰️ Satellite: {nearby_hotspots} hotspots within {SATELLITE_RADIUS_KM} km")
     
-    # Vote 2: Official
-    if cwfis_data is not None and len(cwfis_data) > 0:
+    # Vote 2: Official (reported fires near the location)
+    nearby_fires = int(nearby_count(cwfis_data, lat, lon, OFFICIAL_RADIUS_KM)[0])
+    results['nearby_fires'] = nearby_fires
+    if nearby_fires > 0:
         fire_votes += 1
-        results['evidence'].append(f"🔥 Official: {len(cwfis_data)} active fires reported")
+        results['evidence'].append(f"🔥 Official: {nearby_fires} active fires within {OFFICIAL_RADIUS_KM} km")
     
     # Vote 3: Weather
     if weather_data and 'current' in weather_data:
@@ -187,11 +193,14 @@ def run_detection(lat, lon, location_name):
             results['evidence'].append(f"🌡️ Weather: Extreme conditions ({temp}°C, {humidity}% humidity)")
     
     # Vote 4: IoT
-    iot_risk = analyze_iot_risk(iot_data)
-    results['iot_risk'] = iot_risk
-    if iot_risk in ['HIGH', 'MEDIUM'] or iot_data.get('flame_detected', False):
-        fire_votes += 1
-        results['evidence'].append(f"📡 IoT: {iot_risk} risk detected")
+    if iot_data:
+        risks, votes = iot_votes([iot_data['temperature']], [iot_data['smoke_level']],
+                                 [iot_data.get('flame_detected', False)], [iot_data.get('anomaly', False)])
+        iot_risk = str(risks[0])
+        results['iot_risk'] = iot_risk
+        if votes[0]:
+            fire_votes += 1
+            results['evidence'].append(f"📡 IoT: {iot_risk} risk detected")
     
     # Vegetation
     veg_risk = get_vegetation_fire_risk(veg_data)
@@ -275,6 +284,13 @@ with col4:
         value=f"{risk_emoji.get(iot_risk, '⚪')} {iot_risk}"
     )
 
+# Feeds served from an older snapshot while the source is slow or down
+for source_key, source_label in (('nasa', 'NASA FIRMS'), ('cwfis', 'CWFIS')):
+    feed = results['data_sources'][source_key]
+    if feed is not None and feed.attrs.get('stale'):
+        st.warning(f"⏳ {source_label} is slow or unavailable - showing data from "
+                   f"{feed.attrs['age_seconds'] / 60:.0f} min ago")
+
 st.markdown("---")
 
 # Evidence section
@@ -292,6 +308,24 @@ getattr(st, veg_color.get(veg_risk, "info"))(f"🌲 Vegetation Fire Risk: **{veg
 
 st.markdown("---")
 
+# Province-wide risk surface (one shared raster per feed cycle)
+st.subheader("🗺️ Ontario Fire Risk Grid")
+raster = risk_grid.current()
+here = raster.sample(lat, lon).iloc[0]
+if here['risk_label'] is not None:
+    st.info(f"📍 Grid risk at this location: **{here['risk_label']}** "
+            f"(score {here['risk_score']:.2f}, {int(here['fire_votes'])} votes)")
+min_level = st.select_slider("Show cells at or above", options=RISK_LEVELS, value=RISK_LEVELS[2],
+                             key="risk_level_select")
+cells = raster.to_frame(min_level=RISK_LEVELS.index(min_level))
+level_colors = ['#4CAF50', '#FFC107', '#FF9800', '#F44336']
+cells['color'] = cells['risk_level'].map(dict(enumerate(level_colors)))
+st.map(cells, latitude='latitude', longitude='longitude', color='color', size=2000)
+st.caption(f"{len(cells)} of {raster.shape[0] * raster.shape[1]} grid cells shown · "
+           f"computed {datetime.fromtimestamp(raster.computed_at).strftime('%H:%M:%S')}")
+
+st.markdown("---")
+
 # Detailed data sections
 with st.expander("📡 View Detailed Source Data"):
     tab1, tab2, tab3, tab4 = st.tabs(["🛰️ Satellite", "🌡️ Weather", "📡 IoT", "🌲 Vegetation"])
@@ -299,7 +333,7 @@ with st.expander("📡 View Detailed Source Data"):
     with tab1:
         st.subheader("NASA FIRMS Satellite Hotspots")
         if results['data_sources']['nasa'] is not None and len(results['data_sources']['nasa']) > 0:
-            st.dataframe(results['data_sources']['nasa'].head(10), use_container_width=True)
+            st.dataframe(readable(results['data_sources']['nasa'].head(10)), use_container_width=True)
             st.caption(f"Showing top 10 of {len(results['data_sources']['nasa'])} hotspots")
         else:
             st.info("No satellite hotspots detected in Ontario region")
@@ -0,0 +1,183 @@
+# ===============================================
+# File: modules/fire_detection/batch_runner.py
+# Purpose: Headless fire detection over a large list of sites
+# ===============================================
+#
+#   python batch_runner.py sites.csv --output sweep/ --workers 8
+#
+# Feeds are fetched once and frozen in the output directory, the sites
+# are split into shards scored by a process pool, and each finished
+# shard is written as its own Parquet part and recorded in a manifest.
+# Re-running the same command resumes with the shards still missing.
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from batch_detection import detect_fire_batch, fetch_batch_inputs
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+SHARD_SIZE = 5000
+MANIFEST_NAME = "_manifest.json"
+INPUTS_NAME = "_inputs.pkl"
+
+_worker_feeds = {}     # nasa/cwfis snapshots, set once per worker process
+
+
+def read_locations(path):
+    """Sites from CSV or Parquet with lat/lon (or latitude/longitude) columns."""
+    if path.endswith(".parquet") or os.path.isdir(path):
+        sites = pd.read_parquet(path)
+    else:
+        sites = pd.read_csv(path)
+    sites = sites.rename(columns={'latitude': 'lat', 'longitude': 'lon'})
+    missing = {'lat', 'lon'} - set(sites.columns)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {sorted(missing)}")
+    if 'site_id' not in sites.columns:
+        sites.insert(0, 'site_id', np.arange(len(sites)))
+    return sites.reset_index(drop=True)
+
+
+def _fingerprint(sites, shard_size):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(sites[['lat', 'lon']], index=False).to_numpy().tobytes())
+    return f"{len(sites)}-{shard_size}-{digest.hexdigest()[:16]}"
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _load_manifest(out_dir, fingerprint, fresh):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if fresh:
+        for name in os.listdir(out_dir):
+            if name.startswith("part-"):
+                os.remove(os.path.join(out_dir, name))
+    if fresh or not os.path.exists(path):
+        return {'fingerprint': fingerprint, 'completed': {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('fingerprint') != fingerprint:
+        raise ValueError(f"{out_dir} holds a different sweep; use --fresh to overwrite it")
+    # Only trust shards whose part file actually made it to disk
+    manifest['completed'] = {
+        shard: info for shard, info in manifest['completed'].items()
+        if os.path.exists(os.path.join(out_dir, info['file']))
+    }
+    return manifest
+
+
+def _save_manifest(out_dir, manifest):
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=1)
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME), write)
+
+
+def _frozen_inputs(out_dir, sites, fresh):
+    """Feeds for the whole sweep, fetched once so resumed shards see the same data."""
+    path = os.path.join(out_dir, INPUTS_NAME)
+    if not fresh and os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    log.info("📡 Fetching inputs for %d sites...", len(sites))
+    inputs = fetch_batch_inputs(sites['lat'].to_numpy(), sites['lon'].to_numpy())
+    def write(tmp):
+        with open(tmp, 'wb') as f:
+            pickle.dump(inputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _write_atomic(path, write)
+    return inputs
+
+
+def _init_worker(nasa, cwfis):
+    _worker_feeds['nasa'] = nasa
+    _worker_feeds['cwfis'] = cwfis
+
+
+def _run_shard(shard, sites, weather, iot, out_dir):
+    """Score one shard and write it as a Parquet part."""
+    inputs = {'nasa': _worker_feeds.get('nasa'), 'cwfis': _worker_feeds.get('cwfis'),
+              'weather': weather, 'iot': iot}
+    table = detect_fire_batch(sites[['lat', 'lon']], inputs)
+    table.insert(0, 'site_id', sites['site_id'].to_numpy())
+    if 'name' in sites.columns:
+        table.insert(1, 'name', sites['name'].to_numpy())
+    name = f"part-{shard:05d}.parquet"
+    _write_atomic(os.path.join(out_dir, name), lambda tmp: table.to_parquet(tmp, index=False))
+    return shard, len(table), name
+
+
+def run_batch(input_path, out_dir, workers=None, shard_size=SHARD_SIZE, fresh=False,
+              max_shards=None, inputs=None):
+    """
+    Score every site in `input_path` into Parquet parts under `out_dir`.
+    Completed shards are skipped on re-runs. `max_shards` caps how many new
+    shards this run processes (for time-boxed runs). Returns the manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    sites = read_locations(input_path)
+    manifest = _load_manifest(out_dir, _fingerprint(sites, shard_size), fresh)
+    if inputs is None:
+        inputs = _frozen_inputs(out_dir, sites, fresh)
+
+    n_shards = (len(sites) + shard_size - 1) // shard_size
+    pending = [s for s in range(n_shards) if str(s) not in manifest['completed']]
+    done = n_shards - len(pending)
+    if max_shards is not None:
+        pending = pending[:max_shards]
+    log.info("🗂️ %d shards, %d already done, %d to run", n_shards, done, len(pending))
+    if not pending:
+        return manifest
+
+    weather, iot = inputs.get('weather'), inputs.get('iot')
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(inputs.get('nasa'), inputs.get('cwfis'))) as pool:
+        futures = []
+        for shard in pending:
+            rows = slice(shard * shard_size, (shard + 1) * shard_size)
+            futures.append(pool.submit(
+                _run_shard, shard, sites.iloc[rows],
+                weather.iloc[rows].reset_index(drop=True) if weather is not None else None,
+                {k: v[rows] for k, v in iot.items()} if iot is not None else None,
+                out_dir,
+            ))
+        for future in as_completed(futures):
+            shard, rows, name = future.result()
+            manifest['completed'][str(shard)] = {'rows': rows, 'file': name}
+            _save_manifest(out_dir, manifest)
+            log.info("✅ Shard %d/%d: %d sites (%d/%d done)",
+                     shard + 1, n_shards, rows, len(manifest['completed']), n_shards)
+
+    log.info("⏱️ Scored %d shards in %.1fs; %d/%d complete",
+             len(pending), time.perf_counter() - start, len(manifest['completed']), n_shards)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EcoFlare batch fire detection")
+    parser.add_argument("input", help="CSV or Parquet with lat/lon (and optional name) columns")
+    parser.add_argument("--output", required=True, help="directory for Parquet parts and the manifest")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPUs)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--max-shards", type=int, default=None, help="stop after this many new shards")
+    parser.add_argument("--fresh", action="store_true", help="ignore any previous checkpoint")
+    args = parser.parse_args(argv)
+    run_batch(args.input, args.output, workers=args.workers, shard_size=args.shard_size,
+              fresh=args.fresh, max_shards=args.max_shards)
+
+
+if __name__ == "__main__":
+    main()
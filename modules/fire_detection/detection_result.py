@@ -0,0 +1,74 @@
+# ===============================================
+# File: modules/fire_detection/detection_result.py
+# Purpose: Typed result of one detect_fire() run
+# ===============================================
+
+
+class DetectionResult:
+    """
+    Outcome of the four-vote detection for one location.
+    Still readable as the old result dict (result['confidence'], to_dict()).
+    """
+
+    __slots__ = ('location', 'lat', 'lon', 'fire_detected', 'fire_votes', 'total_votes',
+                 'satellite_vote', 'official_vote', 'weather_vote', 'iot_vote',
+                 'nearby_hotspots', 'nearby_fires', 'iot_risk', 'vegetation_risk',
+                 'evidence', 'timestamp')
+
+    def __init__(self, location, lat, lon, fire_votes, total_votes=4,
+                 satellite_vote=False, official_vote=False, weather_vote=False, iot_vote=False,
+                 nearby_hotspots=0, nearby_fires=0, iot_risk=None, vegetation_risk='UNKNOWN',
+                 evidence=(), timestamp=None, fire_detected=None):
+        self.location = location
+        self.lat = lat
+        self.lon = lon
+        self.fire_votes = fire_votes
+        self.total_votes = total_votes
+        self.fire_detected = fire_votes >= 2 if fire_detected is None else fire_detected
+        self.satellite_vote = satellite_vote
+        self.official_vote = official_vote
+        self.weather_vote = weather_vote
+        self.iot_vote = iot_vote
+        self.nearby_hotspots = nearby_hotspots
+        self.nearby_fires = nearby_fires
+        self.iot_risk = iot_risk
+        self.vegetation_risk = vegetation_risk
+        self.evidence = list(evidence)
+        self.timestamp = timestamp
+
+    @property
+    def confidence(self):
+        return f"{self.fire_votes}/{self.total_votes}"
+
+    @property
+    def coordinates(self):
+        return (self.lat, self.lon)
+
+    # --- Dict-style access for callers of the old result dict ---
+
+    def __getitem__(self, key):
+        if key in self.__slots__ or key in ('confidence', 'coordinates'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__ or key in ('confidence', 'coordinates')
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def to_dict(self):
+        """The original result dict."""
+        return {
+            'fire_detected': self.fire_detected,
+            'confidence': self.confidence,
+            'location': self.location,
+            'coordinates': self.coordinates,
+            'vegetation_risk': self.vegetation_risk,
+            'evidence': list(self.evidence),
+            'timestamp': self.timestamp,
+        }
+
+    def __repr__(self):
+        status = "FIRE" if self.fire_detected else "no fire"
+        return f"DetectionResult({self.location!r}, {status}, votes={self.confidence})"
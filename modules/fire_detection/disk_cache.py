@@ -0,0 +1,189 @@
+# ===============================================
+# File: modules/fire_detection/disk_cache.py
+# Purpose: SQLite cache shared by every process on the host
+# ===============================================
+#
+# Streamlit workers, the console dashboard and ad-hoc scripts all read
+# through this store, so one download serves them all and restarts come
+# up warm. A short-lived lease per key stops two processes from
+# downloading the same feed at the same moment.
+#
+# IoT readings have their own append-only log (sensor_readings): every
+# reading gets an increasing seq, so each process pulls only the rows it
+# has not seen yet, and each sensor keeps only its newest readings.
+
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+CACHE_PATH = os.environ.get(
+    "ECOFLARE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".ecoflare", "cache.sqlite3"),
+)
+CACHE_ENABLED = os.environ.get("ECOFLARE_DISK_CACHE", "1") != "0"
+
+# Entries are kept this long past their TTL so stale values can still be served
+RETENTION = 24 * 3600
+
+LEASE_SECONDS = 30
+
+
+def _key(key):
+    return json.dumps(key) if not isinstance(key, str) else key
+
+
+class DiskCache:
+    """Key/value store with TTLs in a single SQLite file (WAL mode)."""
+
+    def __init__(self, path=CACHE_PATH):
+        # Nothing touches the filesystem until the first read or write
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self):
+        # sqlite3 connections are per thread
+        db = getattr(self._local, "db", None)
+        if db is None:
+            with self._init_lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                if not self._ready:
+                    self._create_tables(db)
+                    self._ready = True
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _create_tables(db):
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )""")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )""")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS sensor_readings (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                sensor_id TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                value BLOB NOT NULL
+            )""")
+        db.execute("CREATE INDEX IF NOT EXISTS sensor_readings_by_sensor ON sensor_readings (sensor_id, seq)")
+
+    def reopen(self, path):
+        """Point this store at another file; every thread reconnects on next use."""
+        with self._init_lock:
+            self.path = path
+            self._local = threading.local()
+            self._ready = False
+
+    def get(self, key):
+        """Return (value, age_seconds) or None. Expired-but-retained values are returned too."""
+        row = self._connect().execute(
+            "SELECT value, stored_at FROM entries WHERE key = ? AND expires_at > ?",
+            (_key(key), time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), time.time() - row[1]
+
+    def set(self, key, value, ttl):
+        """Store `value`; it stays readable for ttl + RETENTION seconds."""
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        # Single statement, so readers in other processes never see a partial write
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (_key(key), blob, now, now + ttl + RETENTION),
+        )
+
+    def try_lease(self, key, seconds=LEASE_SECONDS):
+        """Claim the right to refresh `key`; False if another process holds it."""
+        owner = f"{os.getpid()}:{threading.get_ident()}"
+        now = time.time()
+        db = self._connect()
+        db.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (_key(key), now))
+        cursor = db.execute(
+            "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+            (_key(key), owner, now + seconds),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key):
+        owner = f"{os.getpid()}:{threading.get_ident()}"
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (_key(key), owner))
+
+    def wait_for(self, key, max_age, timeout=LEASE_SECONDS, poll=0.25):
+        """Wait for another process to store a value younger than `max_age`."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            hit = self.get(key)
+            if hit is not None and hit[1] < max_age:
+                return hit
+            time.sleep(poll)
+        return None
+
+    def append_readings(self, sensor_id, timestamps, values, keep):
+        """
+        Append readings of one sensor (`values`: one float32 row per reading)
+        to the shared log and drop all but its newest `keep`.
+        """
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "INSERT INTO sensor_readings (sensor_id, timestamp, value) VALUES (?, ?, ?)",
+                ((sensor_id, float(t), row.tobytes()) for t, row in zip(timestamps, values)),
+            )
+            db.execute(
+                """DELETE FROM sensor_readings WHERE sensor_id = ? AND seq <= (
+                       SELECT seq FROM sensor_readings WHERE sensor_id = ?
+                       ORDER BY seq DESC LIMIT 1 OFFSET ?)""",
+                (sensor_id, sensor_id, keep),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def readings_since(self, seq):
+        """Log rows after `seq`, oldest first: (seq, sensor_id, timestamp, value)."""
+        return self._connect().execute(
+            "SELECT seq, sensor_id, timestamp, value FROM sensor_readings WHERE seq > ? ORDER BY seq",
+            (seq,),
+        ).fetchall()
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (_key(key),))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM entries")
+
+    def purge_expired(self):
+        self._connect().execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+
+def open_disk_cache():
+    """Shared store for this host (opened on first use), or None when disabled."""
+    if not CACHE_ENABLED:
+        return None
+    return DiskCache(CACHE_PATH)
@@ -0,0 +1,252 @@
+# ===============================================
+# File: modules/fire_detection/feed_archive.py
+# Purpose: On-disk Parquet archive of FIRMS/CWFIS snapshots
+# ===============================================
+#
+# Layout (hive style, one directory per source and day):
+#   <root>/source=firms/date=2026-10-17/part-<ms>.parquet
+#
+# Each append writes only rows whose key is not already stored in the
+# target partition, so re-archiving an unchanged feed writes nothing.
+# Appends hold a per-partition file lock and re-read the partition's key
+# files whenever its listing changed, so several processes (dashboard and
+# monitor) can share one archive without writing the same records twice.
+
+import contextlib
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:      # Windows: only appends within this process are serialized
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+ARCHIVE_DIR = os.environ.get(
+    "ECOFLARE_ARCHIVE_DIR",
+    os.path.join(os.path.expanduser("~"), ".ecoflare", "archive"),
+)
+ARCHIVE_ENABLED = os.environ.get("ECOFLARE_ARCHIVE", "1") != "0"
+
+# Per-source archive layout:
+#   key      - columns identifying one record (used to deduplicate)
+#   date     - column giving the partition date, or None for the snapshot date
+#   lat/lon  - coordinate columns used by bbox reads
+SOURCES = {
+    'firms': {
+        'key': ['latitude', 'longitude', 'acq_ts', 'satellite'],
+        'date': 'acq_ts',
+        'lat': 'latitude',
+        'lon': 'longitude',
+    },
+    'cwfis': {
+        'key': ['firename', 'startdate', 'hectares', 'stage_of_control'],
+        'date': None,
+        'lat': 'lat',
+        'lon': 'lon',
+    },
+}
+
+_lock = threading.Lock()
+_known_keys = {}   # (root, source, date) -> (file listing, sorted uint64 key hashes on disk)
+_sequence = itertools.count()   # keeps part names unique within one millisecond
+
+
+def _row_hashes(df, key):
+    columns = [c for c in key if c in df.columns]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _partition_dir(root, source, date):
+    return os.path.join(root, f"source={source}", f"date={date}")
+
+
+@contextlib.contextmanager
+def _partition_lock(path):
+    """Exclusive lock on one partition, held across processes."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, ".lock"), "a") as handle:     # dot files are ignored by readers
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _listing(path):
+    """Parquet files of a partition with their (mtime, size)."""
+    listing = {}
+    if os.path.isdir(path):
+        for entry in os.scandir(path):
+            if entry.name.endswith(".parquet") and not entry.name.startswith("."):
+                stat = entry.stat()
+                listing[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return listing
+
+
+def _load_known_keys(root, source, date, key):
+    """Key hashes stored in one partition, re-reading only files added since the last look."""
+    cache_key = (root, source, date)
+    path = _partition_dir(root, source, date)
+    listing = _listing(path)
+    cached = _known_keys.get(cache_key)
+    if cached is not None and cached[0] == listing:
+        return cached[1]
+    if cached is not None and all(listing.get(n) == stat for n, stat in cached[0].items()):
+        names, hashes = [n for n in listing if n not in cached[0]], [cached[1]]
+    else:
+        # Files were replaced or removed (e.g. compaction): start over
+        names, hashes = list(listing), [np.empty(0, dtype=np.uint64)]
+    for name in names:
+        stored = pd.read_parquet(os.path.join(path, name))
+        hashes.append(_row_hashes(stored, key))
+    known = np.unique(np.concatenate(hashes))
+    _known_keys[cache_key] = (listing, known)
+    return known
+
+
+def _evict_known_keys(now):
+    """Forget partitions older than yesterday; feeds rarely append to them again."""
+    recent = {now.strftime("%Y-%m-%d"), (now - timedelta(days=1)).strftime("%Y-%m-%d")}
+    for cache_key in [k for k in _known_keys if k[2] not in recent]:
+        del _known_keys[cache_key]
+
+
+def _partition_dates(df, config, fetched_at):
+    if config['date'] and config['date'] in df.columns:
+        values = df[config['date']]
+        if pd.api.types.is_integer_dtype(values):
+            # Epoch seconds (compact hotspot frames)
+            return pd.to_datetime(values, unit='s').dt.strftime("%Y-%m-%d")
+        return pd.to_datetime(values.astype(str)).dt.strftime("%Y-%m-%d")
+    return pd.Series(fetched_at.strftime("%Y-%m-%d"), index=df.index)
+
+
+def append_snapshot(source, df, root=None):
+    """
+    Append the records of `df` not yet stored for `source`.
+    Returns the number of new rows written.
+    """
+    if df is None or len(df) == 0:
+        return 0
+    root = root or ARCHIVE_DIR
+    config = SOURCES[source]
+    fetched_at = datetime.now(timezone.utc)
+
+    snapshot = df.drop_duplicates(subset=[c for c in config['key'] if c in df.columns])
+    dates = _partition_dates(snapshot, config, fetched_at)
+    hashes = _row_hashes(snapshot, config['key'])
+
+    written = 0
+    with _lock:
+        for date in dates.unique():
+            in_partition = (dates == date).to_numpy()
+            path = _partition_dir(root, source, date)
+            with _partition_lock(path):
+                known = _load_known_keys(root, source, date, config['key'])
+                new_rows = in_partition & ~np.isin(hashes, known)
+                if not new_rows.any():
+                    continue
+
+                part = snapshot[new_rows].copy()
+                part['fetched_at'] = pd.Timestamp(fetched_at)
+                name = f"part-{int(time.time() * 1000)}-{os.getpid()}-{next(_sequence)}.parquet"
+                tmp_path = os.path.join(path, "." + name + ".tmp")
+                part.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, os.path.join(path, name))
+
+                listing = dict(_known_keys[(root, source, date)][0])
+                stat = os.stat(os.path.join(path, name))
+                listing[name] = (stat.st_mtime_ns, stat.st_size)
+                _known_keys[(root, source, date)] = (listing, np.union1d(known, hashes[new_rows]))
+                written += int(new_rows.sum())
+        _evict_known_keys(fetched_at)
+    return written
+
+
+def _date_str(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def read_archive(source, start=None, end=None, bbox=None, columns=None, root=None):
+    """
+    Read archived records for `source`.
+    start/end are inclusive dates (anything pandas can parse) and prune whole
+    partitions; bbox is (lat_min, lat_max, lon_min, lon_max).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    root = root or ARCHIVE_DIR
+    config = SOURCES[source]
+    path = os.path.join(root, f"source={source}")
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns)
+
+    dataset = ds.dataset(
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        exclude_invalid_files=True,
+    )
+
+    condition = None
+    def _and(expr):
+        return expr if condition is None else condition & expr
+
+    if start is not None:
+        condition = _and(ds.field("date") >= _date_str(start))
+    if end is not None:
+        condition = _and(ds.field("date") <= _date_str(end))
+    if bbox is not None:
+        lat_min, lat_max, lon_min, lon_max = bbox
+        lat, lon = ds.field(config['lat']), ds.field(config['lon'])
+        condition = _and((lat >= lat_min) & (lat <= lat_max) &
+                         (lon >= lon_min) & (lon <= lon_max))
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    return table.to_pandas()
+
+
+def compact_partition(source, date, root=None):
+    """Merge the small append files of one partition into a single file."""
+    root = root or ARCHIVE_DIR
+    path = _partition_dir(root, source, _date_str(date))
+    parts = sorted(n for n in os.listdir(path) if n.endswith(".parquet"))
+    if len(parts) < 2:
+        return
+    with _lock, _partition_lock(path):
+        parts = sorted(n for n in os.listdir(path) if n.endswith(".parquet"))
+        merged = pd.concat(
+            [pd.read_parquet(os.path.join(path, n)) for n in parts], ignore_index=True
+        )
+        tmp_path = os.path.join(path, ".compacted.parquet.tmp")
+        merged.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(path, "part-compacted.parquet"))
+        for name in parts:
+            if name != "part-compacted.parquet":
+                os.remove(os.path.join(path, name))
+
+
+def archive_snapshot(source, df):
+    """Archive a freshly downloaded frame; never lets archive errors escape."""
+    if not ARCHIVE_ENABLED:
+        return df
+    try:
+        written = append_snapshot(source, df)
+        if written:
+            log.info("🗄️ Archived %d new %s records", written, source)
+    except Exception as e:
+        log.warning("⚠️ Archive write failed for %s: %s", source, e)
+    return df
@@ -0,0 +1,229 @@
+# ===============================================
+# File: modules/fire_detection/feed_cache.py
+# Purpose: Process-wide TTL cache for province-wide data feeds
+# ===============================================
+
+import threading
+import time
+
+from disk_cache import open_disk_cache
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+
+class FeedCache:
+    """
+    TTL cache keyed per feed (not per location).
+    Concurrent callers for the same feed share a single download. With a
+    `store` (see disk_cache.DiskCache) entries are shared across processes.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._entries = {}      # key -> (value, stored_at)
+        self._key_locks = {}    # key -> lock serialising loads of that key
+        self._lock = threading.Lock()
+        self._stats = {}        # key -> {'hits', 'misses', 'stale'}
+
+    def _count(self, key, field):
+        stats = self._stats.setdefault(key, {'hits': 0, 'misses': 0, 'stale': 0})
+        stats[field] += 1
+
+    def _entry(self, key):
+        """Memory entry for `key`, warmed from the shared store on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.store is not None:
+            try:
+                hit = self.store.get(key)
+            except Exception as e:
+                log.warning("⚠️ Disk cache read failed for %s: %s", key, e)
+                hit = None
+            if hit is not None:
+                value, age = hit
+                entry = (value, time.monotonic() - age)
+                with self._lock:
+                    self._entries.setdefault(key, entry)
+        return entry
+
+    def _fresh(self, key, ttl):
+        entry = self._entry(key)
+        if entry is not None and time.monotonic() - entry[1] < ttl:
+            return entry
+        return None
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _remember(self, key, value, age=0.0):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() - age)
+
+    def _load(self, key, loader, breaker, ttl):
+        """Load `key` (or adopt another process's fresh copy); returns (value, age)."""
+        store = self.store
+        leased = False
+        if store is not None:
+            try:
+                # Another process may already have refreshed it
+                hit = store.get(key)
+                if hit is not None and hit[1] < ttl:
+                    self._remember(key, hit[0], hit[1])
+                    return hit
+                leased = store.try_lease(key)
+                if not leased:
+                    # Another process is downloading this feed; use its result
+                    hit = store.wait_for(key, max_age=ttl)
+                    if hit is not None:
+                        self._remember(key, hit[0], hit[1])
+                        return hit
+            except Exception as e:
+                log.warning("⚠️ Disk cache lease failed for %s: %s", key, e)
+
+        try:
+            value = breaker.call(loader) if breaker is not None else loader()
+            self._remember(key, value)
+            if store is not None:
+                try:
+                    store.set(key, value, ttl)
+                except Exception as e:
+                    log.warning("⚠️ Disk cache write failed for %s: %s", key, e)
+            return value, 0.0
+        finally:
+            if leased:
+                try:
+                    store.release_lease(key)
+                except Exception:
+                    pass
+
+    def get(self, key, loader, ttl):
+        """Return the cached value for `key`, calling `loader()` when expired."""
+        entry = self._fresh(key, ttl)
+        if entry is not None:
+            with self._lock:
+                self._count(key, 'hits')
+            return entry[0]
+
+        with self._key_lock(key):
+            # Another thread may have loaded it while we waited
+            entry = self._fresh(key, ttl)
+            with self._lock:
+                if entry is not None:
+                    self._count(key, 'hits')
+                    return entry[0]
+                self._count(key, 'misses')
+            return self._load(key, loader, None, ttl)[0]
+
+    def get_swr(self, key, loader, ttl, max_stale, breaker=None):
+        """
+        Stale-while-revalidate lookup. Returns (value, age_seconds, stale).
+
+        Fresh entries are returned as-is. Entries up to `max_stale` seconds old
+        are returned immediately while one background refresh runs. Older or
+        missing entries are loaded synchronously. While `breaker` is open the
+        source is not called at all and the last good value (of any age) is
+        served instead. A failed synchronous load also falls back to the last good
+        value; with nothing cached the error is raised.
+        """
+        entry = self._entry(key)
+        age = time.monotonic() - entry[1] if entry is not None else None
+
+        if entry is not None and age < ttl:
+            with self._lock:
+                self._count(key, 'hits')
+            return entry[0], age, False
+
+        if entry is not None and (age < max_stale or
+                                  (breaker is not None and breaker.state == 'open')):
+            with self._lock:
+                self._count(key, 'stale')
+            self._refresh_async(key, loader, breaker, ttl)
+            return entry[0], age, True
+
+        with self._key_lock(key):
+            entry = self._fresh(key, ttl)
+            with self._lock:
+                if entry is not None:
+                    self._count(key, 'hits')
+                    return entry[0], time.monotonic() - entry[1], False
+                self._count(key, 'misses')
+            try:
+                value, age = self._load(key, loader, breaker, ttl)
+                return value, age, False
+            except Exception:
+                # Upstream failed or its circuit is open: fall back to the last good value
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is None:
+                    raise
+                return entry[0], time.monotonic() - entry[1], True
+
+    def _refresh_async(self, key, loader, breaker, ttl):
+        """Refresh `key` on a background thread unless a load is already running."""
+        if breaker is not None and not breaker.ready():
+            return
+        key_lock = self._key_lock(key)
+        if not key_lock.acquire(blocking=False):
+            return
+
+        def _run():
+            try:
+                self._load(key, loader, breaker, ttl)
+            except Exception as e:
+                log.warning("⚠️ Background refresh of %s failed: %s", key, e)
+            finally:
+                key_lock.release()
+
+        threading.Thread(target=_run, name=f"refresh-{key}", daemon=True).start()
+
+    def stats(self):
+        """Hit/miss counters, overall and per feed."""
+        with self._lock:
+            feeds = {key: dict(s) for key, s in self._stats.items()}
+        return {
+            'hits': sum(s['hits'] + s['stale'] for s in feeds.values()),
+            'misses': sum(s['misses'] for s in feeds.values()),
+            'stale': sum(s['stale'] for s in feeds.values()),
+            'feeds': feeds,
+        }
+
+    def clear(self):
+        """
+        Drop every feed this cache has served, here and in the shared store.
+        Other entries in the store (other feeds, monitor results) are kept,
+        as are the counters.
+        """
+        with self._lock:
+            keys = list(self._stats) + [k for k in self._entries if k not in self._stats]
+            self._entries.clear()
+        if self.store is not None:
+            for key in keys:
+                try:
+                    self.store.delete(key)
+                except Exception as e:
+                    log.warning("⚠️ Disk cache clear failed for %s: %s", key, e)
+
+
+# Shared by every entry point in this process, and through the on-disk
+# store by every process on this host (the file is opened on first use)
+feed_cache = FeedCache(store=open_disk_cache())
+
+
+def cached_feed(key, loader, ttl):
+    """Fetch a feed through the shared process-wide cache."""
+    return feed_cache.get(key, loader, ttl)
+
+
+def cached_feed_swr(key, loader, ttl, max_stale, breaker=None):
+    """Stale-while-revalidate fetch through the shared cache; see FeedCache.get_swr."""
+    return feed_cache.get_swr(key, loader, ttl, max_stale, breaker)
+
+
+def cache_stats():
+    return feed_cache.stats()
+
+
+def clear_feed_cache():
+    feed_cache.clear()
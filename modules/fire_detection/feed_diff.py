@@ -0,0 +1,105 @@
+# ===============================================
+# File: modules/fire_detection/feed_diff.py
+# Purpose: Change-data-capture between consecutive feed snapshots
+# ===============================================
+
+import numpy as np
+import pandas as pd
+
+# Stable identity of one record in each feed. Other shared columns are
+# compared to decide whether a record was updated.
+FEED_KEYS = {
+    'firms': ['latitude', 'longitude', 'acq_ts', 'satellite'],
+    'cwfis': ['agency', 'firename'],
+}
+
+
+class FeedDelta:
+    """Records added, removed and updated between two snapshots."""
+
+    __slots__ = ('added', 'removed', 'updated')
+
+    def __init__(self, added, removed, updated):
+        self.added = added
+        self.removed = removed
+        self.updated = updated
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.updated)
+
+    @property
+    def is_empty(self):
+        return len(self) == 0
+
+    def __repr__(self):
+        return (f"FeedDelta(added={len(self.added)}, removed={len(self.removed)}, "
+                f"updated={len(self.updated)})")
+
+
+def _hash_rows(df, columns):
+    if not columns:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def diff_snapshots(previous, current, key):
+    """
+    Compare two snapshots of one feed by `key` columns.
+    Either snapshot may be None (treated as empty).
+    """
+    if current is None:
+        current = previous.iloc[:0] if previous is not None else pd.DataFrame()
+    if previous is None or len(previous) == 0:
+        return FeedDelta(current, current.iloc[:0], current.iloc[:0])
+
+    key = [c for c in key if c in current.columns and c in previous.columns]
+    previous = previous.drop_duplicates(subset=key, keep='last')
+    current = current.drop_duplicates(subset=key, keep='last')
+    compare = [c for c in current.columns if c in previous.columns and c not in key]
+
+    prev_keys = _hash_rows(previous, key)
+    cur_keys = _hash_rows(current, key)
+    existed = np.isin(cur_keys, prev_keys)
+    kept = np.isin(prev_keys, cur_keys)
+
+    # Value fingerprint of each previous record, looked up by key
+    prev_values = pd.Series(_hash_rows(previous, compare), index=prev_keys)
+    cur_values = _hash_rows(current, compare)
+    changed = np.zeros(len(current), dtype=bool)
+    changed[existed] = cur_values[existed] != prev_values.reindex(cur_keys[existed]).to_numpy()
+
+    return FeedDelta(
+        added=current[~existed],
+        removed=previous[~kept],
+        updated=current[changed],
+    )
+
+
+class SnapshotTracker:
+    """
+    Remembers the last snapshot seen per feed and returns only what changed.
+    Each consumer keeps its own tracker so it sees every change exactly once.
+    """
+
+    def __init__(self, keys=None):
+        self.keys = keys or FEED_KEYS
+        self._last = {}
+
+    def update(self, source, snapshot):
+        """Diff `snapshot` against the previous one for `source` and remember it."""
+        if snapshot is None:
+            # Source unavailable this cycle: report nothing, keep the old baseline
+            empty = self._last.get(source, pd.DataFrame()).iloc[:0]
+            return FeedDelta(empty, empty, empty)
+        delta = diff_snapshots(self._last.get(source), snapshot, self.keys[source])
+        self._last[source] = snapshot
+        return delta
+
+    def last(self, source):
+        return self._last.get(source)
+
+    def reset(self, source=None):
+        if source is None:
+            self._last.clear()
+        else:
+            self._last.pop(source, None)
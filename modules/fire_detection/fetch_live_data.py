@@ -3,72 +3,267 @@
 # Purpose: Fetch real-time fire and weather data
 # ===============================================
 
-import requests
+import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from io import StringIO
+
+from http_client import http_get, fetch_if_modified, clear_validators
+from feed_cache import cached_feed_swr, clear_feed_cache
+from source_guard import get_breaker, SourceUnavailable
+from feed_archive import archive_snapshot
+from hotspots import compact_hotspots
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_FIRMS_URL = "https://firms.modaps.eosdis.nasa.gov/data/active_fire/modis-c6.1/csv/MODIS_C6_1_Canada_24h.csv"
+DEFAULT_CWFIS_URL = "https://cwfis.cfs.nrcan.gc.ca/downloads/activefires/activefires.csv"
+DEFAULT_WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Source endpoints; override with environment variables or configure_endpoints()
+# to point the pipeline at a mirror or at the local replay server.
+FIRMS_URL = os.environ.get("ECOFLARE_FIRMS_URL", DEFAULT_FIRMS_URL)
+CWFIS_URL = os.environ.get("ECOFLARE_CWFIS_URL", DEFAULT_CWFIS_URL)
+WEATHER_URL = os.environ.get("ECOFLARE_WEATHER_URL", DEFAULT_WEATHER_URL)
+
+WEATHER_FIELDS = ['temperature_2m', 'relative_humidity_2m', 'wind_speed_10m', 'precipitation']
+
+# Open-Meteo accepts comma-separated coordinate lists; keep URLs a sane length
+WEATHER_BATCH_SIZE = 100
+
+# Province-wide feeds are shared by all locations for this many seconds
+FEED_TTL = 300
+
+# Past the TTL a snapshot is still served immediately (and refreshed in the
+# background) for this long; an open circuit serves it at any age.
+FEED_MAX_STALE = 3600
+
+# Per-location weather readings
+WEATHER_TTL = 600
+WEATHER_MAX_STALE = 3 * 3600
+
+# Ontario bounding box (lat_min, lat_max, lon_min, lon_max)
+ONTARIO_BBOX = (41, 57, -95, -74)
+
+# Rows parsed per chunk while streaming the national CSVs
+CSV_CHUNK_ROWS = 20000
+
+# Only the columns the detector and maps use, with compact dtypes.
+# String columns are read as text per chunk and made categorical at the end
+# so every chunk shares one set of categories.
+FIRMS_DTYPES = {
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'brightness': 'float32',
+    'acq_date': 'object',
+    'acq_time': 'int16',
+    'satellite': 'object',
+    'confidence': 'object',   # numeric for MODIS, l/n/h for VIIRS
+    'frp': 'float32',
+    'daynight': 'object',
+}
+FIRMS_CATEGORIES = ['acq_date', 'confidence', 'satellite', 'daynight']
+
+CWFIS_DTYPES = {
+    'src_agency': 'object',
+    'agency': 'object',
+    'firename': 'object',
+    'lat': 'float32',
+    'lon': 'float32',
+    'startdate': 'object',
+    'hectares': 'float32',
+    'stage_of_control': 'object',
+}
+CWFIS_CATEGORIES = ['src_agency', 'agency', 'stage_of_control']
+
+def endpoint_key():
+    """
+    The configured source URLs. Cache keys include them, so a mirror or the
+    replay server never shares cache entries with the production feeds.
+    """
+    return (FIRMS_URL, CWFIS_URL, WEATHER_URL)
+
+def configure_endpoints(firms=None, cwfis=None, weather=None):
+    """
+    Point the fetchers at different source URLs. This process's cached feeds
+    and stored validators are dropped so the next call hits the new endpoints.
+    """
+    global FIRMS_URL, CWFIS_URL, WEATHER_URL
+    if firms:
+        FIRMS_URL = firms
+    if cwfis:
+        CWFIS_URL = cwfis
+    if weather:
+        WEATHER_URL = weather
+    clear_feed_cache()
+    clear_validators()
+
+def _stream_csv(response, dtypes, categories, row_filter):
+    """
+    Parse a streamed CSV body chunk by chunk, keeping only `dtypes` columns
+    and the rows accepted by `row_filter`.
+    """
+    response.raw.decode_content = True
+    reader = pd.read_csv(
+        response.raw,
+        usecols=lambda column: column in dtypes,
+        dtype=dtypes,
+        chunksize=CSV_CHUNK_ROWS,
+        skipinitialspace=True,
+    )
+    kept = [chunk[row_filter(chunk)] for chunk in reader]
+    df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=list(dtypes))
+    for column in categories:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+def _in_ontario(chunk):
+    lat_min, lat_max, lon_min, lon_max = ONTARIO_BBOX
+    return (chunk['longitude'].between(lon_min, lon_max) &
+            chunk['latitude'].between(lat_min, lat_max))
+
+def _is_ontario_agency(chunk):
+    if 'src_agency' in chunk.columns:
+        return chunk['src_agency'] == 'ON'
+    return pd.Series(True, index=chunk.index)
+
+def _parse_firms(response):
+    return compact_hotspots(_stream_csv(response, FIRMS_DTYPES, FIRMS_CATEGORIES, _in_ontario))
+
+def _parse_cwfis(response):
+    return _stream_csv(response, CWFIS_DTYPES, CWFIS_CATEGORIES, _is_ontario_agency)
+
+# Freshly downloaded snapshots (not 304 revalidations) are appended to the archive
+def _parse_and_archive_firms(response):
+    return archive_snapshot('firms', _parse_firms(response))
+
+def _parse_and_archive_cwfis(response):
+    return archive_snapshot('cwfis', _parse_cwfis(response))
+
+def _download_firms():
+    log.info("🛰️ Fetching NASA FIRMS data...")
+    # Unchanged feed -> 304 and the previously parsed frame is reused
+    return fetch_if_modified(FIRMS_URL, _parse_and_archive_firms, timeout=15)
+
+def _download_cwfis():
+    log.info("🔥 Fetching CWFIS data...")
+    return fetch_if_modified(CWFIS_URL, _parse_and_archive_cwfis, timeout=15)
+
+def _flag_age(df, age, stale):
+    """Shallow copy of a cached frame carrying its snapshot age in .attrs"""
+    flagged = df.copy(deep=False)
+    flagged.attrs = {'age_seconds': round(age, 1), 'stale': stale}
+    return flagged
 
 def fetch_nasa_firms_data():
     """Fetch NASA FIRMS satellite hotspots for Ontario"""
     try:
-        url = "https://firms.modaps.eosdis.nasa.gov/data/active_fire/modis-c6.1/csv/MODIS_C6_1_Canada_24h.csv"
-        print("🛰️ Fetching NASA FIRMS data...")
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
+        ontario_fires, age, stale = cached_feed_swr(
+            ('firms', FIRMS_URL), _download_firms, FEED_TTL, FEED_MAX_STALE, get_breaker('firms'))
         
-        df = pd.read_csv(StringIO(response.text))
-        ontario_fires = df[
-            (df['longitude'] >= -95) & (df['longitude'] <= -74) &
-            (df['latitude'] >= 41) & (df['latitude'] <= 57)
-        ]
-        
-        print(f"✅ Found {len(ontario_fires)} hotspots")
-        return ontario_fires
+        if stale:
+            log.info("♻️ Serving %d hotspots from %.0fs ago (refreshing)", len(ontario_fires), age)
+        else:
+            log.debug("✅ Found %d hotspots", len(ontario_fires))
+        return _flag_age(ontario_fires, age, stale)
     except Exception as e:
-        print(f"⚠️ NASA FIRMS failed: {e}")
+        log.warning("⚠️ NASA FIRMS failed: %s", e)
         return None
 
 def fetch_cwfis_data():
     """Fetch Canadian wildfire data"""
     try:
-        url = "https://cwfis.cfs.nrcan.gc.ca/downloads/activefires/activefires.csv"
-        print("🔥 Fetching CWFIS data...")
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
+        ontario_fires, age, stale = cached_feed_swr(
+            ('cwfis', CWFIS_URL), _download_cwfis, FEED_TTL, FEED_MAX_STALE, get_breaker('cwfis'))
         
-        df = pd.read_csv(StringIO(response.text))
-        if 'src_agency' in df.columns:
-            ontario_fires = df[df['src_agency'] == 'ON']
+        if stale:
+            log.info("♻️ Serving %d fires from %.0fs ago (refreshing)", len(ontario_fires), age)
         else:
-            ontario_fires = df
-        
-        print(f"✅ Found {len(ontario_fires)} fires")
-        return ontario_fires
+            log.debug("✅ Found %d fires", len(ontario_fires))
+        return _flag_age(ontario_fires, age, stale)
     except Exception as e:
-        print(f"⚠️ CWFIS failed: {e}")
+        log.warning("⚠️ CWFIS failed: %s", e)
         return None
 
+def _download_weather(lat, lon):
+    url = (f"{WEATHER_URL}?"
+           f"latitude={lat}&longitude={lon}"
+           f"&current={','.join(WEATHER_FIELDS)}"
+           f"&timezone=America/Toronto&forecast_days=1")
+    log.debug("🌡️ Fetching weather for (%s, %s)...", lat, lon)
+    data = http_get(url, timeout=10).json()
+    if 'current' not in data:
+        raise ValueError("response has no current conditions")
+    return data
+
 def fetch_weather_data(lat=43.65, lon=-79.38):
     """Fetch weather data for location"""
     try:
-        url = (f"https://api.open-meteo.com/v1/forecast?"
-               f"latitude={lat}&longitude={lon}"
-               f"&current=temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation"
-               f"&timezone=America/Toronto&forecast_days=1")
+        data, age, stale = cached_feed_swr(
+            ('weather', WEATHER_URL, round(lat, 2), round(lon, 2)),
+            lambda: _download_weather(lat, lon),
+            WEATHER_TTL, WEATHER_MAX_STALE, get_breaker('weather'))
         
-        print(f"🌡️ Fetching weather for ({lat}, {lon})...")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        if 'current' in data:
-            print(f"✅ Weather: {data['current']['temperature_2m']}°C")
-            return data
-        return None
+        log.debug("✅ Weather: %s°C", data['current']['temperature_2m'])
+        return {**data, 'age_seconds': round(age, 1), 'stale': stale}
     except Exception as e:
-        print(f"⚠️ Weather failed: {e}")
+        log.warning("⚠️ Weather failed: %s", e)
         return None
 
+def _weather_locations(data, expected):
+    """One Open-Meteo entry per requested location, or ValueError."""
+    # A single location comes back as an object, several as a list
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or len(data) != expected:
+        got = len(data) if isinstance(data, list) else type(data).__name__
+        raise ValueError(f"expected {expected} locations, got {got}")
+    return data
+
+
+def fetch_weather_batch(lats, lons, batch_size=WEATHER_BATCH_SIZE):
+    """
+    Fetch current weather for many coordinates in as few requests as possible.
+    Returns a DataFrame aligned row-for-row with the inputs; rows whose
+    request failed are NaN.
+    """
+    lats = np.asarray(lats, dtype=np.float64).ravel()
+    lons = np.asarray(lons, dtype=np.float64).ravel()
+    result = pd.DataFrame({'latitude': lats, 'longitude': lons})
+    for field in WEATHER_FIELDS:
+        result[field] = np.nan
+
+    # Request each distinct coordinate once
+    coords, inverse = np.unique(np.column_stack([lats, lons]), axis=0, return_inverse=True)
+    values = np.full((len(coords), len(WEATHER_FIELDS)), np.nan)
+
+    breaker = get_breaker('weather')
+    log.info("🌡️ Fetching weather for %d locations in %d requests...",
+             len(coords), -(-len(coords) // batch_size))
+    for start in range(0, len(coords), batch_size):
+        chunk = coords[start:start + batch_size]
+        url = (f"{WEATHER_URL}?"
+               f"latitude={','.join(f'{v:.4f}' for v in chunk[:, 0])}"
+               f"&longitude={','.join(f'{v:.4f}' for v in chunk[:, 1])}"
+               f"&current={','.join(WEATHER_FIELDS)}"
+               f"&timezone=America/Toronto&forecast_days=1")
+        try:
+            data = breaker.call(lambda: _weather_locations(http_get(url, timeout=15).json(), len(chunk)))
+        except SourceUnavailable:
+            log.warning("🚧 Weather circuit open, skipping remaining batches")
+            break
+        except Exception as e:
+            log.warning("⚠️ Weather batch %d failed: %s", start // batch_size + 1, e)
+            continue
+        for offset, item in enumerate(data):
+            current = item.get('current', {})
+            values[start + offset] = [current.get(field, np.nan) for field in WEATHER_FIELDS]
+
+    result[WEATHER_FIELDS] = values[inverse.ravel()]
+    return result
+
 if __name__ == "__main__":
     print("Testing data fetch...")
     fetch_nasa_firms_data()
@@ -3,118 +3,134 @@
 # Purpose: Main fire detection logic combining all data sources
 # ===============================================
 
-from fetch_live_data import fetch_nasa_firms_data, fetch_cwfis_data, fetch_weather_data
-from iot_data import fetch_iot_sensor_data, analyze_iot_risk
-from vegetation_data import fetch_vegetation_data, get_vegetation_fire_risk
+from parallel_fetch import fetch_all_sources
+from iot_data import iot_votes
+from vegetation_data import get_vegetation_fire_risk
+from hotspot_index import nearby_count, SATELLITE_RADIUS_KM, OFFICIAL_RADIUS_KM
 from datetime import datetime
+import logging
+
+from detection_result import DetectionResult
+from log_config import get_logger
+
+log = get_logger(__name__)
 
 def detect_fire(lat=43.65, lon=-79.38, location_name="Toronto"):
     """
     Main fire detection function using voting logic.
     Combines satellite, weather, IoT, and vegetation data.
+    Returns a DetectionResult.
     """
-    print("=" * 70)
-    print(f"WILDFIRE DETECTION - {location_name}")
-    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 70)
-    print()
+    debug = log.isEnabledFor(logging.DEBUG)
+    log.debug("WILDFIRE DETECTION - %s (%s, %s)", location_name, lat, lon)
     
-    # Fetch all data sources
-    nasa_data = fetch_nasa_firms_data()
-    cwfis_data = fetch_cwfis_data()
-    weather_data = fetch_weather_data(lat, lon)
-    iot_data = fetch_iot_sensor_data(location=location_name)
-    veg_data = fetch_vegetation_data(lat, lon)
+    # Fetch all data sources in parallel
+    sources = fetch_all_sources(lat, lon, location_name)
+    nasa_data = sources['nasa']
+    cwfis_data = sources['cwfis']
+    weather_data = sources['weather']
+    iot_data = sources['iot']
+    veg_data = sources['vegetation']
     
-    print()
-    print("=" * 70)
-    print("ANALYSIS & VOTING")
-    print("=" * 70)
-    
-    # Voting system: count how many sources indicate fire
-    fire_votes = 0
-    total_votes = 0
     evidence = []
     
-    # Vote 1: Satellite hotspots
-    total_votes += 1
-    if nasa_data is not None and len(nasa_data) > 0:
-        fire_votes += 1
-        evidence.append(f"Satellite: {len(nasa_data)} hotspots detected")
-        print(f"✅ VOTE 1: Satellite shows {len(nasa_data)} hotspots - FIRE")
-    else:
-        print(f"⭕ VOTE 1: No satellite hotspots - NO FIRE")
+    # Vote 1: Satellite hotspots near this location
+    nearby_hotspots = int(nearby_count(nasa_data, lat, lon, SATELLITE_RADIUS_KM)[0])
+    satellite_vote = nearby_hotspots > 0
+    if satellite_vote:
+        evidence.append(f"Satellite: {nearby_hotspots} hotspots within {SATELLITE_RADIUS_KM} km")
+    if debug:
+        log.debug("%s VOTE 1: %d satellite hotspots within %d km", "✅" if satellite_vote else "⭕",
+                  nearby_hotspots, SATELLITE_RADIUS_KM)
     
-    # Vote 2: Official fire reports
-    total_votes += 1
-    if cwfis_data is not None and len(cwfis_data) > 0:
-        fire_votes += 1
-        evidence.append(f"Official: {len(cwfis_data)} fires reported")
-        print(f"✅ VOTE 2: {len(cwfis_data)} official fires - FIRE")
-    else:
-        print(f"⭕ VOTE 2: No official fire reports - NO FIRE")
+    # Vote 2: Official fire reports near this location
+    nearby_fires = int(nearby_count(cwfis_data, lat, lon, OFFICIAL_RADIUS_KM)[0])
+    official_vote = nearby_fires > 0
+    if official_vote:
+        evidence.append(f"Official: {nearby_fires} fires reported within {OFFICIAL_RADIUS_KM} km")
+    if debug:
+        log.debug("%s VOTE 2: %d official fires within %d km", "✅" if official_vote else "⭕",
+                  nearby_fires, OFFICIAL_RADIUS_KM)
     
     # Vote 3: Weather conditions
-    total_votes += 1
+    weather_vote = False
     if weather_data and 'current' in weather_data:
         temp = weather_data['current']['temperature_2m']
         humidity = weather_data['current']['relative_humidity_2m']
-        
-        if temp > 30 and humidity < 30:
-            fire_votes += 1
+        weather_vote = temp > 30 and humidity < 30
+        if weather_vote:
             evidence.append(f"Weather: {temp}°C, {humidity}% humidity - High risk")
-            print(f"✅ VOTE 3: Extreme weather ({temp}°C, {humidity}%) - FIRE RISK")
-        else:
-            print(f"⭕ VOTE 3: Weather conditions normal - LOW RISK")
+        if debug:
+            log.debug("%s VOTE 3: weather %s°C, %s%%", "✅" if weather_vote else "⭕", temp, humidity)
     
     # Vote 4: IoT sensors
-    total_votes += 1
-    iot_risk = analyze_iot_risk(iot_data)
-    if iot_risk in ['HIGH', 'MEDIUM'] or iot_data['flame_detected']:
-        fire_votes += 1
-        evidence.append(f"IoT: {iot_risk} risk, flame={iot_data['flame_detected']}")
-        print(f"✅ VOTE 4: IoT sensors show {iot_risk} risk - FIRE")
+    iot_vote = False
+    iot_risk = None
+    if iot_data is None:
+        log.debug("⭕ VOTE 4: no IoT sensor data near this location")
     else:
-        print(f"⭕ VOTE 4: IoT sensors normal - NO FIRE")
+        # iot_data is the riskiest of the nearby sensors' readings; a sharp
+        # rise against any nearby sensor's own baseline counts too
+        anomalies = [f"{', '.join(r['anomaly_fields'])} at {r['sensor_id']}"
+                     for r in iot_data.get('readings', [iot_data]) if r.get('anomaly')]
+        risks, votes = iot_votes([iot_data['temperature']], [iot_data['smoke_level']],
+                                 [iot_data['flame_detected']], [bool(anomalies)])
+        iot_risk, iot_vote = str(risks[0]), bool(votes[0])
+        if iot_vote:
+            evidence.append(f"IoT: {iot_risk} risk at {iot_data.get('sensor_id')}, "
+                            f"flame={iot_data['flame_detected']}")
+        for anomaly in anomalies:
+            evidence.append(f"IoT: sudden rise in {anomaly} vs. sensor baseline")
+        if debug:
+            log.debug("%s VOTE 4: IoT sensors show %s risk", "✅" if iot_vote else "⭕", iot_risk)
     
-    # Vote 5: Vegetation risk
+    # Vegetation risk (informational)
     veg_risk = get_vegetation_fire_risk(veg_data)
-    print(f"ℹ️  INFO: Vegetation fire risk is {veg_risk}")
     
-    print()
+    # Decision: If 2 or more votes say fire, then FIRE DETECTED
+    result = DetectionResult(
+        location_name, lat, lon,
+        fire_votes=int(satellite_vote) + int(official_vote) + int(weather_vote) + int(iot_vote),
+        satellite_vote=satellite_vote, official_vote=official_vote,
+        weather_vote=weather_vote, iot_vote=iot_vote,
+        nearby_hotspots=nearby_hotspots, nearby_fires=nearby_fires,
+        iot_risk=iot_risk, vegetation_risk=veg_risk, evidence=evidence,
+        timestamp=datetime.now().isoformat(),
+    )
+    log.info("%s %s: %s votes, vegetation risk %s",
+             "🔥 FIRE DETECTED -" if result.fire_detected else "✅ No fire -",
+             location_name, result.confidence, veg_risk)
+    return result
+
+def print_report(result):
+    """Console report of a DetectionResult."""
     print("=" * 70)
-    print("DETECTION RESULT")
+    print(f"WILDFIRE DETECTION - {result.location}")
+    print(f"Time: {result.timestamp}")
     print("=" * 70)
-    
-    # Decision: If 2 or more votes say fire, then FIRE DETECTED
-    fire_detected = fire_votes >= 2
-    
-    if fire_detected:
+    votes = (
+        (result.satellite_vote, f"Satellite: {result.nearby_hotspots} hotspots within {SATELLITE_RADIUS_KM} km"),
+        (result.official_vote, f"Official: {result.nearby_fires} fires within {OFFICIAL_RADIUS_KM} km"),
+        (result.weather_vote, "Weather: hot and dry"),
+        (result.iot_vote, f"IoT: {result.iot_risk} risk"),
+    )
+    for i, (vote, label) in enumerate(votes, 1):
+        print(f"{'✅' if vote else '⭕'} VOTE {i}: {label}")
+    print(f"ℹ️  Vegetation risk: {result.vegetation_risk}")
+    print("=" * 70)
+    if result.fire_detected:
         print(f"🔥 FIRE DETECTED!")
-        print(f"   Confidence: {fire_votes}/{total_votes} sources confirm")
-        print(f"   Location: {location_name} ({lat}, {lon})")
-        print(f"   Vegetation Risk: {veg_risk}")
+        print(f"   Confidence: {result.confidence} sources confirm")
+        print(f"   Location: {result.location} ({result.lat}, {result.lon})")
         print(f"   Evidence:")
-        for ev in evidence:
+        for ev in result.evidence:
             print(f"     - {ev}")
     else:
         print(f"✅ NO FIRE DETECTED")
-        print(f"   Votes: {fire_votes}/{total_votes}")
-        print(f"   Location: {location_name}")
-        print(f"   Vegetation Risk: {veg_risk}")
-    
+        print(f"   Votes: {result.confidence}")
+        print(f"   Location: {result.location}")
     print("=" * 70)
-    
-    return {
-        'fire_detected': fire_detected,
-        'confidence': f"{fire_votes}/{total_votes}",
-        'location': location_name,
-        'coordinates': (lat, lon),
-        'vegetation_risk': veg_risk,
-        'evidence': evidence,
-        'timestamp': datetime.now().isoformat()
-    }
 
 if __name__ == "__main__":
     result = detect_fire(43.65, -79.38, "Toronto")
-    print(f"\n📊 Result: {result}")
+    print_report(result)
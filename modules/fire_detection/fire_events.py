@@ -0,0 +1,380 @@
+# ===============================================
+# File: modules/fire_detection/fire_events.py
+# Purpose: Group FIRMS hotspots into fire events and track them over time
+# ===============================================
+#
+# Hotspots closer than CLUSTER_LINK_KM belong to the same fire. Links are
+# found with the spatial grid from hotspot_index and merged with a
+# vectorized union-find. FireTracker keeps the grid of live hotspots
+# between cycles, so each update only looks at the new hotspots and the
+# fires they touch.
+
+import heapq
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from feed_diff import SnapshotTracker
+from hotspot_index import (
+    PointIndex, EARTH_RADIUS_KM, _OFFSETS, _cell_keys, _chord, _unit_vectors,
+)
+
+CLUSTER_LINK_KM = 2.0      # hotspots closer than this are one fire
+EVENT_EXPIRY_HOURS = 48    # no new hotspot for this long -> fire is out
+PIXEL_AREA_HA = 14.0       # footprint of one VIIRS 375 m pixel
+RETIRED_EVENTS = 1000      # summaries of fires that went out, kept for reports
+
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+
+
+def _components(n, a, b):
+    """Connected components of n nodes joined by edges (a[i], b[i]); labels 0..k-1."""
+    parent = np.arange(n)
+    if len(a):
+        while True:
+            # Hook every edge's roots onto the smaller one, then flatten the trees
+            ra, rb = parent[a], parent[b]
+            low = np.minimum(ra, rb)
+            np.minimum.at(parent, ra, low)
+            np.minimum.at(parent, rb, low)
+            while True:
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+            if np.array_equal(parent[a], parent[b]):
+                break
+    return np.unique(parent, return_inverse=True)[1]
+
+
+def _hull_vertices(lats, lons):
+    """Convex hull corners (lats, lons) of a point set, by Andrew's monotone chain."""
+    # Hull corners in (lon, lat) stay corners under the local flat projection
+    # (a positive scaling of each axis), so hulls can be kept in degrees and merged
+    points = sorted(set(zip(np.asarray(lons, dtype=np.float64).tolist(),
+                            np.asarray(lats, dtype=np.float64).tolist())))
+    if len(points) >= 3:
+        def cross(o, p, q):
+            return (p[0] - o[0]) * (q[1] - o[1]) - (p[1] - o[1]) * (q[0] - o[0])
+
+        lower, upper = [], []
+        for p in points:
+            while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+                lower.pop()
+            lower.append(p)
+        for p in reversed(points):
+            while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+                upper.pop()
+            upper.append(p)
+        points = lower[:-1] + upper[:-1]
+    hull = np.array(points, dtype=np.float64).reshape(-1, 2)
+    return hull[:, 1], hull[:, 0]
+
+
+def _polygon_area_km2(lats, lons, lat0):
+    """Area of a polygon (corners in order) on a flat projection around latitude lat0."""
+    if len(lats) < 3:
+        return 0.0
+    x = (lons - lons.mean()) * KM_PER_DEG * np.cos(np.radians(lat0))
+    y = (lats - lat0) * KM_PER_DEG
+    return float(0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+
+
+def _hull_area_km2(lats, lons):
+    """Convex hull area of a small point set on a local flat projection."""
+    if len(lats) < 3:
+        return 0.0
+    hull_lats, hull_lons = _hull_vertices(lats, lons)
+    return _polygon_area_km2(hull_lats, hull_lons, float(np.mean(lats)))
+
+
+def _area_ha(hull_km2, hotspots):
+    return round(max(hull_km2 * 100, hotspots * PIXEL_AREA_HA), 2)
+
+
+def fire_area_ha(lats, lons):
+    """Burning area of one fire: its hull, but never less than its pixel footprint."""
+    return _area_ha(_hull_area_km2(lats, lons), len(lats))
+
+
+def cluster_hotspots(df, link_km=CLUSTER_LINK_KM):
+    """Fire label (0..k-1) for every hotspot in a FIRMS frame."""
+    if df is None or len(df) == 0:
+        return np.empty(0, dtype=np.int64)
+    lats = df['latitude'].to_numpy(dtype=np.float64)
+    lons = df['longitude'].to_numpy(dtype=np.float64)
+    a, b, _ = PointIndex(lats, lons).query_radius(lats, lons, link_km)
+    return _components(len(lats), a, b)
+
+
+def cluster_summary(df, link_km=CLUSTER_LINK_KM):
+    """One row per fire: hotspot count, centroid and estimated area."""
+    columns = ['cluster', 'hotspots', 'latitude', 'longitude', 'area_ha']
+    labels = cluster_hotspots(df, link_km)
+    if len(labels) == 0:
+        return pd.DataFrame(columns=columns)
+    lats = df['latitude'].to_numpy(dtype=np.float64)
+    lons = df['longitude'].to_numpy(dtype=np.float64)
+    counts = np.bincount(labels)
+    rows = []
+    order = np.argsort(labels, kind='stable')
+    for label, members in enumerate(np.split(order, np.cumsum(counts)[:-1])):
+        rows.append((label, len(members), lats[members].mean(), lons[members].mean(),
+                     fire_area_ha(lats[members], lons[members])))
+    return pd.DataFrame(rows, columns=columns)
+
+
+class FireEvent:
+    """One tracked fire with a persistent ID and its growth history."""
+
+    __slots__ = ('event_id', 'first_seen', 'last_seen', 'points', 'status',
+                 'merged_into', 'history', 'absorbed', 'hull_lat', 'hull_lon', 'lat_sum', 'lon_sum')
+
+    def __init__(self, event_id, seen):
+        self.event_id = event_id
+        self.first_seen = seen
+        self.last_seen = seen
+        self.points = []          # ids into the tracker's point arrays
+        self.status = 'active'    # active | out | merged
+        self.merged_into = None
+        self.history = []         # (time, hotspots, area_ha)
+        self.absorbed = []        # ids of fires merged into this one
+        self.hull_lat = np.empty(0)   # convex hull corners, merged with each update
+        self.hull_lon = np.empty(0)
+        self.lat_sum = 0.0        # running sums for the centroid
+        self.lon_sum = 0.0
+
+    @property
+    def hotspots(self):
+        return len(self.points)
+
+    @property
+    def area_ha(self):
+        return self.history[-1][2] if self.history else 0.0
+
+    def __repr__(self):
+        return (f"FireEvent(id={self.event_id}, status={self.status}, "
+                f"hotspots={self.hotspots}, area_ha={self.area_ha})")
+
+
+class FireTracker:
+    """
+    Matches new hotspots to known fires cycle after cycle.
+    Cost per update follows the number of new hotspots and the fires they touch.
+    Fires that go out leave `events` (a summary stays in `retired`) and their
+    points are reclaimed, so memory follows the live fires only.
+    """
+
+    def __init__(self, link_km=CLUSTER_LINK_KM, expiry_hours=EVENT_EXPIRY_HOURS):
+        self.link_km = link_km
+        self.expiry = pd.Timedelta(hours=expiry_hours)
+        self._cell = max(float(_chord(link_km)), 1e-6)
+        self._chord = float(_chord(link_km))
+        self._xyz = np.empty((0, 3))
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._event = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._cells = {}           # grid cell key -> point ids of live fires
+        self._snapshots = SnapshotTracker()
+        self.events = {}           # active fires and the fires merged into them
+        self.retired = deque(maxlen=RETIRED_EVENTS)
+        self._expiry = []          # heap of (last_seen, event_id); stale entries skipped
+        self._dead_points = 0
+        self._next_id = 1
+
+    def __len__(self):
+        return sum(1 for e in self.events.values() if e.status == 'active')
+
+    @property
+    def stored_points(self):
+        """Hotspots held in memory (live fires plus retired ones not yet reclaimed)."""
+        return self._size
+
+    def _append_points(self, xyz, lats, lons, events):
+        """Grow the point arrays geometrically so appends stay amortized O(new)."""
+        need = self._size + len(lats)
+        if need > len(self._lat):
+            capacity = max(need, 2 * len(self._lat), 1024)
+            self._xyz = np.resize(self._xyz, (capacity, 3))
+            self._lat = np.resize(self._lat, capacity)
+            self._lon = np.resize(self._lon, capacity)
+            self._event = np.resize(self._event, capacity)
+        ids = np.arange(self._size, need)
+        self._xyz[ids] = xyz
+        self._lat[ids] = lats
+        self._lon[ids] = lons
+        self._event[ids] = events
+        self._size = need
+        return ids
+
+    def _expire(self, now):
+        """Retire fires with no hotspot for `expiry`; only due heap entries are visited."""
+        heap = self._expiry
+        while heap and now - heap[0][0] > self.expiry:
+            last_seen, event_id = heapq.heappop(heap)
+            event = self.events.get(event_id)
+            if event is None or event.status != 'active' or event.last_seen != last_seen:
+                continue          # merged, already retired, or seen again since
+            event.status = 'out'
+            self.retired.append(self._summary(event))
+            self._forget(event.points)
+            self._dead_points += len(event.points)
+            for absorbed_id in event.absorbed:
+                self.events.pop(absorbed_id, None)
+            del self.events[event_id]
+        if self._dead_points > max(self._size // 2, 1024):
+            self._compact()
+
+    def _compact(self):
+        """Drop the points of retired fires and renumber the live ones."""
+        live = [e for e in self.events.values() if e.status == 'active']
+        old_ids = np.array([p for e in live for p in e.points], dtype=np.int64)
+        n = len(old_ids)
+        self._xyz = self._xyz[old_ids]
+        self._lat = self._lat[old_ids]
+        self._lon = self._lon[old_ids]
+        self._event = self._event[old_ids]
+        self._size = n
+        self._dead_points = 0
+        start = 0
+        for event in live:
+            event.points = list(range(start, start + len(event.points)))
+            start += len(event.points)
+        self._cells = {}
+        keys = _cell_keys(np.floor(self._xyz / self._cell).astype(np.int64))
+        for key, pid in zip(keys.tolist(), range(n)):
+            self._cells.setdefault(key, []).append(pid)
+
+    def _forget(self, point_ids):
+        keys = _cell_keys(np.floor(self._xyz[point_ids] / self._cell).astype(np.int64))
+        for key, pid in zip(keys.tolist(), point_ids):
+            members = self._cells.get(key)
+            if members is not None:
+                members.remove(pid)
+                if not members:
+                    del self._cells[key]
+
+    def _links_to_live(self, xyz):
+        """(new point, live point) pairs within the link distance."""
+        cells = np.floor(xyz / self._cell).astype(np.int64)
+        keys = _cell_keys(cells[:, None, :] + _OFFSETS[None, :, :]).ravel().tolist()
+        new_idx, old_idx = [], []
+        for position, key in enumerate(keys):
+            members = self._cells.get(key)
+            if members:
+                new_idx.extend([position // len(_OFFSETS)] * len(members))
+                old_idx.extend(members)
+        if not new_idx:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        new_idx, old_idx = np.array(new_idx), np.array(old_idx)
+        close = np.linalg.norm(xyz[new_idx] - self._xyz[old_idx], axis=1) <= self._chord
+        return new_idx[close], old_idx[close]
+
+    def update(self, snapshot, now=None):
+        """Feed a full FIRMS snapshot; only hotspots not seen before are processed."""
+        return self.add_hotspots(self._snapshots.update('firms', snapshot).added, now)
+
+    def add_hotspots(self, hotspots, now=None):
+        """Attach new hotspots to fires. Returns the events that changed."""
+        now = pd.Timestamp(now if now is not None else datetime.now())
+        self._expire(now)
+        if hotspots is None or len(hotspots) == 0:
+            return []
+
+        lats = hotspots['latitude'].to_numpy(dtype=np.float64)
+        lons = hotspots['longitude'].to_numpy(dtype=np.float64)
+        xyz = _unit_vectors(lats, lons)
+        m = len(lats)
+
+        # Nodes 0..m-1 are the new hotspots, m.. are live fires they touch
+        a, b, _ = PointIndex(lats, lons).query_radius(lats, lons, self.link_km)
+        link_new, link_old = self._links_to_live(xyz)
+        touched = np.unique(self._event[link_old])
+        labels = _components(m + len(touched),
+                             np.concatenate([a, link_new]),
+                             np.concatenate([b, m + np.searchsorted(touched, self._event[link_old])]))
+
+        # Live fires joined by each component (touched is sorted, so oldest first)
+        joined_by = {}
+        for event_id, label in zip(touched.tolist(), labels[m:].tolist()):
+            joined_by.setdefault(label, []).append(event_id)
+
+        changed = {}
+        assigned = np.empty(m, dtype=np.int64)
+        order = np.argsort(labels[:m], kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[:m][order])) + 1
+        for members in np.split(order, bounds):
+            joined = joined_by.get(int(labels[members[0]]))
+            if joined:
+                # The oldest fire keeps its ID; fires bridged by new hotspots merge into it
+                event = self.events[joined[0]]
+                for other_id in joined[1:]:
+                    self._merge(self.events[other_id], event)
+            else:
+                event = FireEvent(self._next_id, now)
+                self.events[event.event_id] = event
+                self._next_id += 1
+            assigned[members] = event.event_id
+            event.last_seen = now
+            changed[event.event_id] = event
+            heapq.heappush(self._expiry, (now, event.event_id))
+
+        ids = self._append_points(xyz, lats, lons, assigned)
+        cells = _cell_keys(np.floor(xyz / self._cell).astype(np.int64))
+        for key, pid, event_id in zip(cells.tolist(), ids.tolist(), assigned.tolist()):
+            self._cells.setdefault(key, []).append(pid)
+            self.events[event_id].points.append(pid)
+
+        # Grow each fire's hull from its old corners and its new hotspots only
+        order = np.argsort(assigned, kind='stable')
+        bounds = np.flatnonzero(np.diff(assigned[order])) + 1
+        for members in np.split(order, bounds):
+            event = self.events[int(assigned[members[0]])]
+            event.lat_sum += float(lats[members].sum())
+            event.lon_sum += float(lons[members].sum())
+            event.hull_lat, event.hull_lon = _hull_vertices(np.concatenate([event.hull_lat, lats[members]]),
+                                                            np.concatenate([event.hull_lon, lons[members]]))
+            hotspots = len(event.points)
+            hull_km2 = _polygon_area_km2(event.hull_lat, event.hull_lon, event.lat_sum / hotspots)
+            event.history.append((now, hotspots, _area_ha(hull_km2, hotspots)))
+        return list(changed.values())
+
+    def _merge(self, source, target):
+        self._event[source.points] = target.event_id
+        target.points.extend(source.points)
+        target.first_seen = min(target.first_seen, source.first_seen)
+        target.absorbed.extend([source.event_id] + source.absorbed)
+        target.hull_lat = np.concatenate([target.hull_lat, source.hull_lat])
+        target.hull_lon = np.concatenate([target.hull_lon, source.hull_lon])
+        target.lat_sum += source.lat_sum
+        target.lon_sum += source.lon_sum
+        source.absorbed = []
+        source.points = []
+        source.status = 'merged'
+        source.merged_into = target.event_id
+
+    def _summary(self, event):
+        pts = event.points
+        previous = event.history[-2][2] if len(event.history) > 1 else 0.0
+        return {
+            'event_id': event.event_id,
+            'status': event.status,
+            'hotspots': len(pts),
+            'latitude': event.lat_sum / len(pts),
+            'longitude': event.lon_sum / len(pts),
+            'area_ha': event.area_ha,
+            'growth_ha': round(event.area_ha - previous, 2),
+            'first_seen': event.first_seen,
+            'last_seen': event.last_seen,
+        }
+
+    def events_frame(self, include_inactive=False):
+        """Summary table of tracked fires (active ones by default; retired ones too on request)."""
+        rows = [self._summary(e) for e in self.events.values() if e.status == 'active']
+        if include_inactive:
+            rows = list(self.retired) + rows
+        return pd.DataFrame(rows, columns=['event_id', 'status', 'hotspots', 'latitude', 'longitude',
+                                           'area_ha', 'growth_ha', 'first_seen', 'last_seen'])
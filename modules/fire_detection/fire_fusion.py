@@ -0,0 +1,106 @@
+# ===============================================
+# File: modules/fire_detection/fire_fusion.py
+# Purpose: Match FIRMS hotspots to official CWFIS fires in one vectorized join
+# ===============================================
+#
+# Every hotspot gets a status:
+#   confirmed - an active reported fire is nearby and started no later
+#               than shortly after the hotspot was seen
+#   new       - no reported fire explains it (early-detection candidate)
+#   stale     - too old to matter, or only explained by a fire declared out
+
+import numpy as np
+import pandas as pd
+
+from hotspot_index import index_for
+from hotspots import acq_timestamps, acquired_at, parse_dates
+
+FUSION_RADIUS_KM = 10      # hotspot this close to a reported fire belongs to it
+MATCH_CANDIDATES = 4       # nearest reported fires checked per hotspot
+REPORT_LAG = pd.Timedelta(days=1)   # a report may trail the first hotspot by this much
+STALE_HOURS = 24           # hotspots older than this (vs. the newest) are stale
+OUT_STAGES = ['OUT']       # CWFIS stage_of_control values for extinguished fires
+
+FUSION_STATUSES = ['confirmed', 'new', 'stale']
+
+
+def fuse_hotspots(firms, cwfis, radius_km=FUSION_RADIUS_KM, now=None):
+    """
+    Label every FIRMS hotspot confirmed / new / stale against the CWFIS list.
+    Returns a compact frame: latitude, longitude, acq_ts, frp, status,
+    fire (matched firename) and distance_km.
+    """
+    columns = ['latitude', 'longitude', 'acq_ts', 'frp', 'status', 'fire', 'distance_km']
+    if firms is None or len(firms) == 0:
+        empty = pd.DataFrame({c: [] for c in columns})
+        empty['status'] = pd.Categorical([], categories=FUSION_STATUSES)
+        return empty
+
+    n = len(firms)
+    lats = firms['latitude'].to_numpy(dtype=np.float64)
+    lons = firms['longitude'].to_numpy(dtype=np.float64)
+    acquired = acquired_at(firms)
+
+    # Spatial candidates: the nearest reported fires within the radius
+    confirmed = np.zeros(n, dtype=bool)
+    out_only = np.zeros(n, dtype=bool)
+    match = np.full(n, -1, dtype=np.int64)
+    distance = np.full(n, np.nan)
+    if cwfis is not None and len(cwfis):
+        idx, dist = index_for(cwfis).nearest(lats, lons, k=min(MATCH_CANDIDATES, len(cwfis)),
+                                             max_km=radius_km)
+        found = idx >= 0
+        safe = np.where(found, idx, 0)
+
+        # Temporal check: the fire was reported before, or soon after, the hotspot
+        if 'startdate' in cwfis.columns:
+            started = parse_dates(cwfis['startdate'])[safe]
+            with np.errstate(invalid='ignore'):
+                in_time = (np.isnat(started) | np.isnat(acquired)[:, None]
+                           | (started <= (acquired + REPORT_LAG.to_timedelta64())[:, None]))
+        else:
+            in_time = np.ones_like(found)
+        if 'stage_of_control' in cwfis.columns:
+            is_out = cwfis['stage_of_control'].astype(str).isin(OUT_STAGES).to_numpy()[safe]
+        else:
+            is_out = np.zeros_like(found)
+
+        active = found & in_time & ~is_out
+        confirmed = active.any(axis=1)
+        out_only = ~confirmed & (found & in_time & is_out).any(axis=1)
+        # Candidates are sorted by distance: confirmed hotspots take the closest
+        # active fire (even if an OUT fire is nearer), the rest the closest usable one
+        first = np.where(confirmed, np.argmax(active, axis=1), np.argmax(found & in_time, axis=1))
+        rows = np.arange(n)
+        matched = confirmed | out_only
+        match[matched] = idx[rows, first][matched]
+        distance[matched] = dist[rows, first][matched]
+
+    reference = np.datetime64(now, 'ns') if now is not None else (
+        acquired.max() if not np.isnat(acquired).all() else np.datetime64('NaT'))
+    with np.errstate(invalid='ignore'):
+        old = ~np.isnat(acquired) & (acquired < reference - np.timedelta64(STALE_HOURS, 'h'))
+
+    status = np.select([old, confirmed, out_only], ['stale', 'confirmed', 'stale'], default='new')
+
+    if match.max(initial=-1) >= 0 and 'firename' in cwfis.columns:
+        names = cwfis['firename'].astype(str).to_numpy()
+        fire = pd.Categorical(np.where(match >= 0, names[np.maximum(match, 0)], None))
+    else:
+        fire = pd.Categorical([None] * n)
+
+    return pd.DataFrame({
+        'latitude': lats.astype(np.float32),
+        'longitude': lons.astype(np.float32),
+        'acq_ts': acq_timestamps(firms),
+        'frp': (firms['frp'].to_numpy(dtype=np.float32) if 'frp' in firms.columns
+                else np.full(n, np.nan, dtype=np.float32)),
+        'status': pd.Categorical(status, categories=FUSION_STATUSES),
+        'fire': fire,
+        'distance_km': distance.astype(np.float32),
+    })
+
+
+def fusion_counts(fused):
+    """Number of hotspots per status."""
+    return {s: int(c) for s, c in fused['status'].value_counts().reindex(FUSION_STATUSES, fill_value=0).items()}
@@ -0,0 +1,189 @@
+# ===============================================
+# File: modules/fire_detection/hotspot_index.py
+# Purpose: Spatial index for "hotspots within R km" and k-nearest queries
+# ===============================================
+#
+# Points are projected to unit vectors on the sphere and hashed into a
+# uniform 3D grid whose cell edge equals the chord of the query radius,
+# so every match lies in the 27 cells around the query point. Chord
+# length is monotonic in great-circle distance, so results are exact.
+
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Votes 1 and 2 only count fires near the location being checked
+SATELLITE_RADIUS_KM = 50
+OFFICIAL_RADIUS_KM = 100
+
+_OFFSETS = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+_KEY_BITS = 21
+_KEY_BIAS = 1 << (_KEY_BITS - 1)
+
+
+def _unit_vectors(lats, lons):
+    lat = np.radians(np.asarray(lats, dtype=np.float64)).ravel()
+    lon = np.radians(np.asarray(lons, dtype=np.float64)).ravel()
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _chord(km):
+    return 2 * np.sin(np.minimum(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _cell_keys(cells):
+    biased = cells.astype(np.int64) + _KEY_BIAS
+    return (biased[..., 0] << (2 * _KEY_BITS)) | (biased[..., 1] << _KEY_BITS) | biased[..., 2]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in km."""
+    chord = np.linalg.norm(_unit_vectors(lat1, lon1) - _unit_vectors(lat2, lon2), axis=1)
+    return _chord_to_km(chord)
+
+
+class PointIndex:
+    """Grid-hash index over a fixed set of lat/lon points."""
+
+    def __init__(self, lats, lons):
+        self.xyz = _unit_vectors(lats, lons)
+        self._grids = {}     # cell size -> (sorted keys, point order)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.xyz)
+
+    def _grid(self, cell):
+        with self._lock:
+            grid = self._grids.get(cell)
+            if grid is None:
+                keys = _cell_keys(np.floor(self.xyz / cell))
+                order = np.argsort(keys, kind='stable')
+                grid = (keys[order], order)
+                self._grids[cell] = grid
+            return grid
+
+    def query_radius(self, lats, lons, radius_km):
+        """
+        All (query, point) pairs within `radius_km`.
+        Returns arrays (query_idx, point_idx, distance_km).
+        """
+        query = _unit_vectors(lats, lons)
+        empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0))
+        if len(self) == 0 or len(query) == 0:
+            return empty
+
+        chord = float(_chord(radius_km))
+        cell = max(chord, 1e-6)
+        sorted_keys, order = self._grid(cell)
+        query_cells = np.floor(query / cell).astype(np.int64)
+
+        # Cell ranges for each of the 27 neighbours of every query point
+        neighbour_keys = _cell_keys(query_cells[:, None, :] + _OFFSETS[None, :, :]).ravel()
+        starts = np.searchsorted(sorted_keys, neighbour_keys, side='left')
+        ends = np.searchsorted(sorted_keys, neighbour_keys, side='right')
+        counts = ends - starts
+        total = int(counts.sum())
+        if total == 0:
+            return empty
+
+        # Expand the ranges into flat candidate lists without a Python loop
+        query_idx = np.repeat(np.repeat(np.arange(len(query)), len(_OFFSETS)), counts)
+        run_start = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        point_idx = order[run_start + np.arange(total)]
+
+        dist = np.linalg.norm(query[query_idx] - self.xyz[point_idx], axis=1)
+        keep = dist <= chord
+        return query_idx[keep], point_idx[keep], _chord_to_km(dist[keep])
+
+    def count_within(self, lats, lons, radius_km):
+        """Number of points within `radius_km` of each query point."""
+        n = len(np.atleast_1d(lats))
+        query_idx, _, _ = self.query_radius(lats, lons, radius_km)
+        return np.bincount(query_idx, minlength=n)
+
+    def nearest(self, lats, lons, k=1, max_km=None):
+        """
+        k nearest points per query. Returns (indices, distances_km), both
+        shaped (n, k); missing neighbours are -1 / inf. With `max_km` only
+        points within that distance are considered.
+        """
+        n = len(np.atleast_1d(lats))
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        indices = np.full((n, k), -1, dtype=np.int64)
+        distances = np.full((n, k), np.inf)
+        if len(self) == 0:
+            return indices, distances
+
+        pending = np.arange(n)
+        radius = max_km if max_km is not None else 25.0
+        while len(pending):
+            q, p, d = self.query_radius(lats[pending], lons[pending], radius)
+            found = np.bincount(q, minlength=len(pending))
+            # Unbounded search: only queries with k hits inside the radius are final
+            done = np.ones(len(pending), dtype=bool) if max_km is not None else (
+                (found >= min(k, len(self))) | (radius >= np.pi * EARTH_RADIUS_KM))
+
+            sel = done[q]
+            q, p, d = q[sel], p[sel], d[sel]
+            order = np.lexsort((d, q))
+            q, p, d = q[order], p[order], d[order]
+            group_start = np.searchsorted(q, q, side='left')
+            rank = np.arange(len(q)) - group_start
+            top = rank < k
+            rows = pending[q[top]]
+            indices[rows, rank[top]] = p[top]
+            distances[rows, rank[top]] = d[top]
+
+            pending = pending[~done]
+            radius *= 4
+        return indices, distances
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 8
+
+
+def _coordinate_columns(df):
+    if 'latitude' in df.columns:
+        return 'latitude', 'longitude'
+    return 'lat', 'lon'
+
+
+def index_for(df):
+    """
+    PointIndex for a FIRMS/CWFIS frame, built once per snapshot.
+    Cached by coordinate content so shallow copies of one snapshot share it.
+    """
+    lat_col, lon_col = _coordinate_columns(df)
+    lats = df[lat_col].to_numpy(dtype=np.float64)
+    lons = df[lon_col].to_numpy(dtype=np.float64)
+    key = (len(lats), hash(lats.tobytes()), hash(lons.tobytes()))
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+    index = PointIndex(lats, lons)
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def nearby_count(df, lats, lons, radius_km):
+    """Fires in `df` within `radius_km` of each point (zeros when df is empty)."""
+    if df is None or len(df) == 0:
+        return np.zeros(len(np.atleast_1d(lats)), dtype=np.int64)
+    return index_for(df).count_within(lats, lons, radius_km)
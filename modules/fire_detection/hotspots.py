@@ -0,0 +1,103 @@
+# ===============================================
+# File: modules/fire_detection/hotspots.py
+# Purpose: Compact in-memory layout for FIRMS hotspot snapshots
+# ===============================================
+#
+# One row per hotspot:
+#   latitude, longitude, brightness, frp   float32
+#   acq_ts                                 uint32 seconds since epoch (UTC)
+#   confidence, satellite, daynight        category
+# acq_date/acq_time from the CSV are folded into acq_ts.
+
+import numpy as np
+import pandas as pd
+
+HOTSPOT_FLOATS = ['latitude', 'longitude', 'brightness', 'frp']
+HOTSPOT_CATEGORIES = ['confidence', 'satellite', 'daynight']
+HOTSPOT_COLUMNS = ['latitude', 'longitude', 'acq_ts', 'brightness', 'frp',
+                   'confidence', 'satellite', 'daynight']
+
+
+def parse_dates(values):
+    """Parse a date column once per distinct value (categorical columns stay cheap)."""
+    series = pd.Series(values)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        parsed = pd.to_datetime(series.cat.categories.astype(str), errors='coerce').to_numpy()
+        codes = series.cat.codes.to_numpy()
+        return np.where(codes >= 0, parsed[np.maximum(codes, 0)], np.datetime64('NaT')).astype('datetime64[ns]')
+    return pd.to_datetime(series, errors='coerce').to_numpy().astype('datetime64[ns]')
+
+
+def acq_timestamps(df):
+    """uint32 acquisition seconds for a FIRMS frame (0 when unknown)."""
+    if 'acq_ts' in df.columns:
+        return df['acq_ts'].to_numpy(dtype=np.uint32)
+    if 'acq_date' not in df.columns:
+        return np.zeros(len(df), dtype=np.uint32)
+    days = parse_dates(df['acq_date'])
+    missing = np.isnat(days)
+    seconds = np.where(missing, 0, days.astype('datetime64[s]').astype(np.int64))
+    if 'acq_time' in df.columns:
+        hhmm = pd.to_numeric(df['acq_time'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        seconds = seconds + np.where(missing, 0, (hhmm // 100) * 3600 + (hhmm % 100) * 60)
+    return seconds.astype(np.uint32)
+
+
+def acquired_at(df):
+    """Acquisition time of each hotspot as datetime64 (NaT when unknown)."""
+    ts = acq_timestamps(df).astype(np.int64)
+    return np.where(ts > 0, ts.astype('datetime64[s]'), np.datetime64('NaT')).astype('datetime64[ns]')
+
+
+def compact_hotspots(df):
+    """Convert any FIRMS-shaped frame to the compact layout (no-op if already compact)."""
+    if df is None:
+        return empty_hotspots()
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df)
+    if is_compact(df):
+        return df
+    out = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for column in HOTSPOT_COLUMNS:
+        if column == 'acq_ts':
+            out[column] = acq_timestamps(df)
+        elif column not in df.columns:
+            continue
+        elif column in HOTSPOT_FLOATS:
+            out[column] = df[column].to_numpy(dtype=np.float32)
+        else:
+            values = df[column]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(str)
+            out[column] = pd.Categorical(values)
+    return out
+
+
+def is_compact(df):
+    return ('acq_ts' in df.columns and 'acq_date' not in df.columns
+            and df['latitude'].dtype == np.float32)
+
+
+def empty_hotspots():
+    return pd.DataFrame({
+        'latitude': np.empty(0, np.float32), 'longitude': np.empty(0, np.float32),
+        'acq_ts': np.empty(0, np.uint32), 'brightness': np.empty(0, np.float32),
+        'frp': np.empty(0, np.float32),
+        **{c: pd.Categorical([]) for c in HOTSPOT_CATEGORIES},
+    })
+
+
+def hotspot_frame(data):
+    """Hotspots from a feed result, a list of records or None, without copying compact frames."""
+    if data is None or (isinstance(data, (list, tuple)) and not data):
+        return empty_hotspots()
+    return compact_hotspots(data)
+
+
+def readable(df):
+    """Copy for display: acq_ts shown as an acquisition time."""
+    shown = df.copy()
+    if 'acq_ts' in shown.columns:
+        shown.insert(shown.columns.get_loc('acq_ts'), 'acquired', pd.to_datetime(acquired_at(df)))
+        shown = shown.drop(columns='acq_ts')
+    return shown
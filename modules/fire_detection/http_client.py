@@ -0,0 +1,100 @@
+# ===============================================
+# File: modules/fire_detection/http_client.py
+# Purpose: Shared pooled HTTP session with retries and conditional GET
+# ===============================================
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizing: a handful of hosts, a few parallel requests each
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE = 16
+
+# Bounded retries with exponential backoff (0.5s, 1s) on transient errors
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+USER_AGENT = "EcoFlare/1.0 (+wildfire detection)"
+
+_session = None
+_session_lock = threading.Lock()
+
+# url -> {'etag', 'last_modified', 'value'} for conditional revalidation
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=RETRY_TOTAL,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset(["GET", "HEAD"]),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"User-Agent": USER_AGENT})
+                _session = session
+    return _session
+
+
+def http_get(url, timeout=10, **kwargs):
+    """Plain GET through the pooled session. Raises on HTTP errors."""
+    response = get_session().get(url, timeout=timeout, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+def fetch_if_modified(url, parse, timeout=15):
+    """
+    GET `url` with ETag / If-Modified-Since validators from the last download.
+    On 200 the response is handed to `parse` and the parsed value is kept;
+    on 304 the previously parsed value is returned without a download.
+    """
+    with _validators_lock:
+        cached = _validators.get(url)
+
+    headers = {}
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = get_session().get(url, timeout=timeout, headers=headers, stream=True)
+    try:
+        if response.status_code == 304 and cached:
+            return cached['value']
+        response.raise_for_status()
+        value = parse(response)
+    finally:
+        response.close()
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        with _validators_lock:
+            _validators[url] = {'etag': etag, 'last_modified': last_modified, 'value': value}
+    return value
+
+
+def clear_validators():
+    """Forget stored validators so the next request downloads in full."""
+    with _validators_lock:
+        _validators.clear()
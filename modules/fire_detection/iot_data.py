@@ -6,12 +6,18 @@
 import random
 from datetime import datetime
 
+import numpy as np
+
+from log_config import get_logger
+
+log = get_logger(__name__)
+
 def fetch_iot_sensor_data(sensor_id="SENSOR_001", location="Toronto"):
     """
     Simulate IoT sensor readings for fire detection.
     In real implementation, this would connect to actual IoT devices.
     """
-    print(f"📡 Fetching IoT data from {sensor_id} at {location}...")
+    log.debug("📡 Fetching IoT data from %s at %s...", sensor_id, location)
     
     # Simulated sensor data
     sensor_data = {
@@ -25,29 +31,92 @@ def fetch_iot_sensor_data(sensor_id="SENSOR_001", location="Toronto"):
         'flame_detected': random.choice([True, False])
     }
     
-    print(f"✅ IoT Data: Temp={sensor_data['temperature']}°C, "
-          f"Smoke={sensor_data['smoke_level']}, "
-          f"Flame={sensor_data['flame_detected']}")
+    log.debug("✅ IoT Data: Temp=%s°C, Smoke=%s, Flame=%s", sensor_data['temperature'],
+              sensor_data['smoke_level'], sensor_data['flame_detected'])
     
+    # Simulated readings stay out of sensor_store, which holds only
+    # readings that real sensors sent to the ingest server
     return sensor_data
 
+# Risk rules shared by the scalar and batch scorers:
+#   (field, threshold, points) - points added when field > threshold
+#   (threshold None means the field is a flag)
+IOT_RISK_RULES = [
+    ('temperature', 30, 30),
+    ('smoke_level', 50, 40),
+    ('flame_detected', None, 30),
+]
+IOT_RISK_THRESHOLDS = [40, 70]           # score at which MEDIUM / HIGH start
+IOT_RISK_LEVELS = ['LOW', 'MEDIUM', 'HIGH']
+
+def iot_risk_label(risk_score):
+    """HIGH/MEDIUM/LOW for one risk score."""
+    level = 0
+    for threshold in IOT_RISK_THRESHOLDS:
+        if risk_score >= threshold:
+            level += 1
+    return IOT_RISK_LEVELS[level]
+
+def iot_risk_score(sensor_data):
+    """Risk score (0-100) for one reading."""
+    risk_score = 0
+    for field, threshold, points in IOT_RISK_RULES:
+        value = sensor_data[field]
+        if (bool(value) if threshold is None else value > threshold):
+            risk_score += points
+    return risk_score
+
 def analyze_iot_risk(sensor_data):
     """Analyze IoT data for fire risk"""
-    risk_score = 0
-    
-    if sensor_data['temperature'] > 30:
-        risk_score += 30
-    if sensor_data['smoke_level'] > 50:
-        risk_score += 40
-    if sensor_data['flame_detected']:
-        risk_score += 30
-    
-    if risk_score >= 70:
-        return "HIGH"
-    elif risk_score >= 40:
-        return "MEDIUM"
-    else:
-        return "LOW"
+    return iot_risk_label(iot_risk_score(sensor_data))
+
+def simulate_iot_batch(n, rng=None):
+    """
+    Simulated readings for `n` sensors at once, as columnar NumPy arrays
+    with the same ranges as fetch_iot_sensor_data.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    return {
+        'temperature': rng.uniform(15, 35, n).round(2),
+        'smoke_level': rng.uniform(0, 100, n).round(2),
+        'humidity': rng.uniform(30, 80, n).round(2),
+        'air_quality_index': rng.integers(20, 151, n),
+        'flame_detected': rng.random(n) < 0.5,
+    }
+
+def iot_risk_scores(readings):
+    """
+    Vectorized iot_risk_score over columnar readings: a dict of equal-length
+    arrays (a sensor fleet, or a sensor_store window). Returns uint8 scores.
+    """
+    risk_score = None
+    for field, threshold, points in IOT_RISK_RULES:
+        values = np.asarray(readings[field])
+        hit = values.astype(bool) if threshold is None else values > threshold
+        term = hit.astype(np.uint8) * np.uint8(points)
+        risk_score = term if risk_score is None else risk_score + term
+    return risk_score
+
+def iot_risk_codes(risk_scores):
+    """Index into IOT_RISK_LEVELS for each score."""
+    return np.searchsorted(IOT_RISK_THRESHOLDS, risk_scores, side='right').astype(np.uint8)
+
+def analyze_iot_risk_batch(temperature, smoke_level, flame_detected):
+    """Vectorized analyze_iot_risk; returns an array of HIGH/MEDIUM/LOW labels."""
+    risk_scores = iot_risk_scores({'temperature': temperature, 'smoke_level': smoke_level,
+                                   'flame_detected': flame_detected})
+    return np.asarray(IOT_RISK_LEVELS)[iot_risk_codes(risk_scores)]
+
+def iot_votes(temperature, smoke_level, flame_detected, anomaly=None):
+    """
+    The IoT vote shared by every detector: MEDIUM/HIGH risk, a flame, or a
+    reading anomalous for its sensor's own baseline. Returns (risk labels, votes).
+    """
+    iot_risk = analyze_iot_risk_batch(temperature, smoke_level, flame_detected)
+    vote = (iot_risk != 'LOW') | np.asarray(flame_detected, dtype=bool)
+    if anomaly is not None:
+        vote |= np.asarray(anomaly, dtype=bool)
+    return iot_risk, vote
 
 if __name__ == "__main__":
     data = fetch_iot_sensor_data()
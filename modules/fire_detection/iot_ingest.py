@@ -0,0 +1,391 @@
+# ===============================================
+# File: modules/fire_detection/iot_ingest.py
+# Purpose: Asyncio ingestion endpoint for IoT sensor readings
+# ===============================================
+#
+# Devices push readings over TCP (stream) or UDP (datagrams) in either
+#   text:   one CSV line per reading
+#           sensor_id,timestamp,temperature,smoke_level,humidity,air_quality_index,flame_detected
+#           (timestamp in epoch seconds; empty means "received now")
+#   binary: the 4-byte magic b"EFB1" followed by packed RECORD_DTYPE records
+#           (a TCP connection sends the magic once; a datagram starts with it)
+# Readings with an empty or non-numeric sensor field, or a sensor ID that
+# is empty, non-ASCII or longer than 16 bytes, are rejected (counted as
+# malformed), never repaired or truncated.
+#
+# Decoded chunks go through a bounded queue to one writer task that groups
+# them by sensor and appends to the sensor store (the shared sensor_store
+# publishes them to every process on the host). When the queue is full,
+# TCP handlers stop reading (the kernel then pushes back on the device);
+# UDP has no flow control, so full-queue datagrams are dropped and counted.
+#
+#   python iot_ingest.py serve --tcp-port 9750 --udp-port 9751
+#   python iot_ingest.py bench --readings 200000 --sensors 1000 --binary
+
+import argparse
+import asyncio
+import io
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from sensor_store import SENSOR_FIELDS, sensor_store
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+BINARY_MAGIC = b"EFB1"
+RECORD_DTYPE = np.dtype([('sensor_id', 'S16'), ('timestamp', '<f8')]
+                        + [(f, '<f4') for f in SENSOR_FIELDS])      # 44 bytes, no padding
+LINE_COLUMNS = ['sensor_id', 'timestamp'] + SENSOR_FIELDS
+
+QUEUE_CHUNKS = 256        # decoded chunks waiting for the writer (backpressure bound)
+WRITE_MAX_CHUNKS = 64     # chunks merged into one store write
+READ_SIZE = 1 << 16       # bytes per TCP read
+SMALL_PAYLOAD_LINES = 32  # below this, parse lines in Python instead of pandas
+MAX_SENSOR_ID = RECORD_DTYPE['sensor_id'].itemsize   # longer IDs are rejected, never truncated
+
+
+# --- Wire formats ---
+
+def _records(n):
+    return np.zeros(n, dtype=RECORD_DTYPE)
+
+
+def encode_lines(readings):
+    """Columnar readings (dict of arrays incl. sensor_id/timestamp) -> CSV bytes."""
+    frame = pd.DataFrame({c: readings[c] for c in LINE_COLUMNS})
+    frame['flame_detected'] = np.asarray(frame['flame_detected'], dtype=bool).astype(np.uint8)
+    return frame.to_csv(header=False, index=False).encode()
+
+
+def encode_binary(readings, magic=True):
+    """Columnar readings -> packed records (prefixed with BINARY_MAGIC)."""
+    records = _records(len(readings['sensor_id']))
+    for name in RECORD_DTYPE.names:
+        records[name] = readings[name]
+    return (BINARY_MAGIC if magic else b"") + records.tobytes()
+
+
+def _valid(records):
+    """Mask of records with a non-empty ASCII sensor ID and finite sensor fields."""
+    ids = np.ascontiguousarray(records['sensor_id']).view(np.uint8).reshape(len(records), MAX_SENSOR_ID)
+    ok = (ids[:, 0] != 0) & (ids < 128).all(axis=1)
+    for name in SENSOR_FIELDS:
+        ok &= np.isfinite(records[name])
+    return ok
+
+
+def decode_binary(data):
+    """
+    Packed records -> RECORD_DTYPE array of the valid ones.
+    Returns (records, rejected count, leftover bytes).
+    """
+    usable = len(data) - len(data) % RECORD_DTYPE.itemsize
+    records = np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+    ok = _valid(records)
+    return records[ok], len(records) - int(ok.sum()), data[usable:]
+
+
+def _decode_small(lines):
+    records = _records(len(lines))
+    kept = 0
+    for line in lines:
+        parts = line.split(b",")
+        if len(parts) != len(LINE_COLUMNS):
+            continue
+        sensor_id = parts[0].strip()
+        if not sensor_id or len(sensor_id) > MAX_SENSOR_ID or not sensor_id.isascii():
+            continue
+        # Only the timestamp may be empty ("received now")
+        if not all(p.strip() for p in parts[2:]):
+            continue
+        try:
+            values = [float(p) if p.strip() else np.nan for p in parts[1:]]
+        except ValueError:
+            continue
+        record = records[kept]
+        record['sensor_id'] = sensor_id
+        for name, value in zip(LINE_COLUMNS[1:], values):
+            record[name] = value
+        kept += 1
+    return records[:kept]
+
+
+def _decode_frame(data):
+    frame = pd.read_csv(io.BytesIO(data), header=None, names=LINE_COLUMNS, dtype={'sensor_id': str},
+                        on_bad_lines='skip', skip_blank_lines=True, encoding_errors='replace')
+    for name in LINE_COLUMNS[1:]:
+        frame[name] = pd.to_numeric(frame[name], errors='coerce')
+    ids = frame['sensor_id'].str.strip()
+    good_id = ids.notna() & ids.map(lambda v: isinstance(v, str) and v.isascii() and 0 < len(v) <= MAX_SENSOR_ID)
+    frame = frame[good_id & frame[SENSOR_FIELDS].notna().all(axis=1)]
+    records = _records(len(frame))
+    records['sensor_id'] = ids[frame.index].to_numpy(dtype='S16')
+    for name in LINE_COLUMNS[1:]:
+        records[name] = frame[name].to_numpy()
+    return records
+
+
+def decode_lines(data):
+    """
+    Complete CSV lines -> RECORD_DTYPE array of the well-formed ones.
+    Returns (records, rejected count).
+    """
+    lines = [l for l in data.splitlines() if l.strip()]
+    records = _decode_small(lines) if len(lines) < SMALL_PAYLOAD_LINES else _decode_frame(data)
+    records = records[_valid(records)]
+    return records, len(lines) - len(records)
+
+
+def decode_payload(data):
+    """One datagram (text lines or magic-prefixed binary) -> (records, rejected count)."""
+    if data.startswith(BINARY_MAGIC):
+        records, rejected, leftover = decode_binary(data[len(BINARY_MAGIC):])
+        return records, rejected + bool(leftover)      # a truncated trailing record counts too
+    return decode_lines(data)
+
+
+# --- Server ---
+
+class IngestStats:
+    """Counters for one ingestion server."""
+
+    __slots__ = ('received', 'written', 'dropped', 'malformed', 'writes')
+
+    def __init__(self):
+        self.received = self.written = self.dropped = self.malformed = self.writes = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server._offer(*decode_payload(data))
+
+
+class IngestServer:
+    """TCP + UDP endpoints feeding one batched writer into a SensorStore."""
+
+    def __init__(self, store=sensor_store, host="127.0.0.1", tcp_port=0, udp_port=0,
+                 queue_chunks=QUEUE_CHUNKS):
+        self.store = store
+        self.host = host
+        self.tcp_port = tcp_port
+        self.udp_port = udp_port
+        self.stats = IngestStats()
+        self._queue = asyncio.Queue(maxsize=queue_chunks)
+        self._tcp = None
+        self._udp = None
+        self._writer = None
+
+    async def start(self):
+        if self.tcp_port is not None:
+            self._tcp = await asyncio.start_server(self._handle_stream, self.host, self.tcp_port)
+            self.tcp_port = self._tcp.sockets[0].getsockname()[1]
+        if self.udp_port is not None:
+            loop = asyncio.get_running_loop()
+            self._udp, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), local_addr=(self.host, self.udp_port))
+            self.udp_port = self._udp.get_extra_info('sockname')[1]
+        self._writer = asyncio.create_task(self._write_loop())
+        log.info("📥 IoT ingest listening on tcp=%s udp=%s", self.tcp_port, self.udp_port)
+        return self
+
+    async def stop(self):
+        """Close the endpoints, then flush everything already queued."""
+        if self._tcp is not None:
+            self._tcp.close()
+            await self._tcp.wait_closed()
+        if self._udp is not None:
+            self._udp.close()
+        await self._queue.join()
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def _offer(self, records, rejected):
+        """Queue a chunk without waiting (UDP); drop it if the queue is full."""
+        self.stats.received += len(records) + rejected
+        self.stats.malformed += rejected
+        if not len(records):
+            return
+        try:
+            self._queue.put_nowait(records)
+        except asyncio.QueueFull:
+            self.stats.dropped += len(records)
+
+    async def _put(self, records, rejected):
+        """Queue a chunk, waiting for room (TCP backpressure)."""
+        self.stats.received += len(records) + rejected
+        self.stats.malformed += rejected
+        if len(records):
+            await self._queue.put(records)
+
+    async def _handle_stream(self, reader, writer):
+        buffer = b""
+        binary = None
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                buffer += data
+                if binary is None:
+                    if len(buffer) < len(BINARY_MAGIC) and BINARY_MAGIC.startswith(buffer):
+                        continue
+                    binary = buffer.startswith(BINARY_MAGIC)
+                    if binary:
+                        buffer = buffer[len(BINARY_MAGIC):]
+                if binary:
+                    records, rejected, buffer = decode_binary(buffer)
+                    await self._put(records, rejected)
+                else:
+                    end = buffer.rfind(b"\n") + 1
+                    if end:
+                        chunk, buffer = buffer[:end], buffer[end:]
+                        await self._put(*decode_lines(chunk))
+            if buffer.strip() and not binary:
+                await self._put(*decode_lines(buffer))
+            elif buffer and binary:
+                await self._put(_records(0), 1)          # truncated trailing record
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write_loop(self):
+        while True:
+            chunks = [await self._queue.get()]
+            while len(chunks) < WRITE_MAX_CHUNKS and not self._queue.empty():
+                chunks.append(self._queue.get_nowait())
+            try:
+                self._write(np.concatenate(chunks) if len(chunks) > 1 else chunks[0])
+            except Exception as e:
+                log.warning("⚠️ IoT ingest write failed: %s", e)
+            finally:
+                for _ in chunks:
+                    self._queue.task_done()
+
+    def _write(self, records):
+        """Group one merged batch by sensor (time-ordered) and append it."""
+        timestamps = records['timestamp'].copy()
+        missing = ~(timestamps > 0)
+        if missing.any():
+            timestamps[missing] = time.time()
+        ids, sensor_of = np.unique(records['sensor_id'], return_inverse=True)
+        order = np.lexsort((timestamps, sensor_of))
+        values = np.stack([records[f] for f in SENSOR_FIELDS])[:, order]
+        timestamps = timestamps[order]
+        bounds = np.cumsum(np.bincount(sensor_of, minlength=len(ids)))
+        start = 0
+        for sensor_id, end in zip(ids, bounds):
+            self.store.extend(sensor_id.decode('ascii'), timestamps[start:end], values[:, start:end])
+            start = end
+        self.stats.written += len(records)
+        self.stats.writes += 1
+
+
+def start_ingest_server(store=sensor_store, host="127.0.0.1", tcp_port=0, udp_port=0, **kwargs):
+    """Run an IngestServer on its own event loop thread and return it."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    holder = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        holder['server'] = loop.run_until_complete(
+            IngestServer(store, host, tcp_port, udp_port, **kwargs).start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="iot-ingest", daemon=True).start()
+    started.wait()
+    server = holder['server']
+
+    def shutdown():
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    server.shutdown = shutdown
+    return server
+
+
+# --- Stand-in device client ---
+
+def simulated_readings(n, sensors=100, rng=None):
+    """Columnar readings from `sensors` simulated devices, with timestamps."""
+    from iot_data import simulate_iot_batch
+
+    rng = rng if rng is not None else np.random.default_rng()
+    readings = simulate_iot_batch(n, rng)
+    readings['sensor_id'] = np.char.add("SENSOR_", np.char.zfill(rng.integers(1, sensors + 1, n).astype(str), 3))
+    readings['timestamp'] = time.time() + np.arange(n) * 1e-6
+    return readings
+
+
+def send_readings(readings, host="127.0.0.1", port=None, protocol="tcp", binary=False, chunk=1000):
+    """Push columnar readings to an ingest server like a device gateway would."""
+    n = len(readings['sensor_id'])
+    encode = (lambda part: encode_binary(part, magic=protocol == "udp")) if binary else encode_lines
+    parts = ({k: v[i:i + chunk] for k, v in readings.items()} for i in range(0, n, chunk))
+    if protocol == "udp":
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for part in parts:
+                sock.sendto(encode(part), (host, port))
+    else:
+        with socket.create_connection((host, port)) as sock:
+            if binary:
+                sock.sendall(BINARY_MAGIC)
+            for part in parts:
+                sock.sendall(encode(part))
+    return n
+
+
+def main(argv=None):
+    from sensor_store import SensorStore
+    from sensor_stats import StatsTracker
+
+    parser = argparse.ArgumentParser(description="EcoFlare IoT ingestion server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--tcp-port", type=int, default=9750)
+    serve.add_argument("--udp-port", type=int, default=9751)
+    bench = sub.add_parser("bench")
+    bench.add_argument("--readings", type=int, default=200000)
+    bench.add_argument("--sensors", type=int, default=1000)
+    bench.add_argument("--binary", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        async def serve_forever():
+            await IngestServer(host=args.host, tcp_port=args.tcp_port, udp_port=args.udp_port).start()
+            await asyncio.Event().wait()
+        try:
+            asyncio.run(serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server = start_ingest_server(SensorStore(stats=StatsTracker(SENSOR_FIELDS)), udp_port=None)
+    readings = simulated_readings(args.readings, args.sensors)
+    start = time.perf_counter()
+    send_readings(readings, port=server.tcp_port, binary=args.binary)
+    while server.stats.written + server.stats.malformed < args.readings:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    print(f"📥 {args.readings} readings from {args.sensors} sensors in {elapsed:.2f}s "
+          f"({args.readings / elapsed:,.0f}/s) {server.stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
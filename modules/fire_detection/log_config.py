@@ -0,0 +1,33 @@
+# ===============================================
+# File: modules/fire_detection/log_config.py
+# Purpose: Leveled logging for the detection modules
+# ===============================================
+#
+# All modules log through children of the "ecoflare" logger with lazy
+# %-style arguments, so a disabled level costs one level check and no
+# string formatting. Set ECOFLARE_LOG_LEVEL=DEBUG to see per-call detail
+# (per-location fetches, votes) or WARNING for quiet batch runs.
+
+import logging
+import os
+import sys
+
+LOG_LEVEL = os.environ.get("ECOFLARE_LOG_LEVEL", "INFO").upper()
+
+_root = logging.getLogger("ecoflare")
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _root.addHandler(_handler)
+    _root.setLevel(LOG_LEVEL)
+    _root.propagate = False
+
+
+def get_logger(name):
+    """Logger for one module, e.g. get_logger(__name__)."""
+    return logging.getLogger(f"ecoflare.{name}")
+
+
+def set_log_level(level):
+    """Change the level for every EcoFlare logger at once."""
+    _root.setLevel(level.upper() if isinstance(level, str) else level)
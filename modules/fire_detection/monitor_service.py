@@ -0,0 +1,242 @@
+# ===============================================
+# File: modules/fire_detection/monitor_service.py
+# Purpose: Scheduled monitoring of a watch list of locations
+# ===============================================
+#
+# Each source is refreshed on its own interval. Only locations whose
+# inputs actually changed are re-evaluated, and only changed results are
+# published, so CPU and network use follow the data rather than the clock.
+# Whenever a fire feed changes, the tracked fire events and the fused
+# hotspots are published too (under FIRE_EVENTS_KEY / FUSED_HOTSPOTS_KEY).
+
+import heapq
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fetch_live_data import fetch_nasa_firms_data, fetch_cwfis_data, WEATHER_FIELDS
+from weather_field import weather_field
+from iot_data import iot_votes
+from sensor_registry import nearby_sensor_readings
+from feed_diff import SnapshotTracker
+from fire_events import FireTracker
+from fire_fusion import fuse_hotspots
+from hotspot_index import nearby_count, SATELLITE_RADIUS_KM, OFFICIAL_RADIUS_KM
+from batch_detection import detect_fire_batch
+from feed_cache import feed_cache
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+# Seconds between refreshes of each source
+REFRESH_INTERVALS = {
+    'nasa': 300,
+    'cwfis': 300,
+    'weather': 3600,
+    'iot': 15,
+}
+
+DEFAULT_WATCH_LIST = pd.DataFrame({
+    'name': ["Toronto", "Ottawa", "Thunder Bay", "Sault Ste. Marie"],
+    'lat': [43.65, 45.42, 48.38, 46.49],
+    'lon': [-79.38, -75.70, -89.25, -84.35],
+})
+
+RESULT_TTL = 24 * 3600
+FIRE_EVENTS_KEY = '__fire_events__'          # ResultStore names of the published fire state
+FUSED_HOTSPOTS_KEY = '__fused_hotspots__'
+
+
+class ResultStore:
+    """Latest result per location, shared through the disk cache when available."""
+
+    def __init__(self, store=None):
+        self.store = store
+        self._memory = {}
+
+    def publish(self, name, result):
+        self._memory[name] = result
+        if self.store is not None:
+            try:
+                self.store.set(('monitor', name), result, RESULT_TTL)
+            except Exception as e:
+                log.warning("⚠️ Could not publish result for %s: %s", name, e)
+
+    def get(self, name):
+        if self.store is not None:
+            try:
+                hit = self.store.get(('monitor', name))
+            except Exception as e:
+                log.warning("⚠️ Could not read result for %s: %s", name, e)
+                hit = None
+            if hit is not None:
+                return hit[0]
+        return self._memory.get(name)
+
+
+def _changed_points(delta, lat_col, lon_col):
+    frames = [f[[lat_col, lon_col]] for f in (delta.added, delta.removed, delta.updated)
+              if len(f) and lat_col in f.columns]
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+class MonitorService:
+    """
+    Refreshes each source on its own schedule and re-evaluates only the
+    watch-list locations affected by what changed.
+    """
+
+    def __init__(self, watch_list=None, intervals=None, results=None, on_result=None):
+        self.locations = (watch_list if watch_list is not None else DEFAULT_WATCH_LIST).reset_index(drop=True)
+        self.lats = self.locations['lat'].to_numpy(dtype=np.float64)
+        self.lons = self.locations['lon'].to_numpy(dtype=np.float64)
+        self.intervals = {**REFRESH_INTERVALS, **(intervals or {})}
+        self.results = results or ResultStore(feed_cache.store)
+        self.on_result = on_result
+        self.inputs = {'nasa': None, 'cwfis': None, 'weather': None, 'iot': None}
+        self.tracker = SnapshotTracker()
+        self.fires = FireTracker()
+        self.fused = None          # hotspots labelled against official reports
+        self._queue = [(0.0, name) for name in self.intervals]
+        heapq.heapify(self._queue)
+        self._dirty = np.zeros(len(self.locations), dtype=bool)
+        self._last = {}            # name -> last published result
+        self._iot_state = None
+        self._stop = threading.Event()
+        self.evaluations = 0
+        self.refreshes = 0
+
+    # --- Source refreshers: each returns a mask of affected locations ---
+
+    def _refresh_feed(self, source, fetch, lat_col, lon_col, radius_km):
+        snapshot = fetch()
+        if snapshot is None:
+            return np.zeros(len(self.locations), dtype=bool)
+        self.inputs[source] = snapshot
+        feed = 'firms' if source == 'nasa' else 'cwfis'
+        delta = self.tracker.update(feed, snapshot)
+        if feed == 'firms':
+            self.fires.add_hotspots(delta.added)
+        if not delta.is_empty:
+            self.fused = fuse_hotspots(self.inputs['nasa'], self.inputs['cwfis'])
+            self._publish_fire_state()
+        points = _changed_points(delta, lat_col, lon_col)
+        if points is None:
+            return np.zeros(len(self.locations), dtype=bool)
+        return nearby_count(points, self.lats, self.lons, radius_km) > 0
+
+    def _publish_fire_state(self):
+        """Publish tracked fire events and fused hotspots next to the per-location results."""
+        self.results.publish(FIRE_EVENTS_KEY, self.fires.events_frame())
+        self.results.publish(FUSED_HOTSPOTS_KEY, self.fused)
+
+    def _refresh_nasa(self):
+        return self._refresh_feed('nasa', fetch_nasa_firms_data, 'latitude', 'longitude',
+                                  SATELLITE_RADIUS_KM)
+
+    def _refresh_cwfis(self):
+        return self._refresh_feed('cwfis', fetch_cwfis_data, 'lat', 'lon', OFFICIAL_RADIUS_KM)
+
+    def _refresh_weather(self):
+        previous = self.inputs['weather']
+        weather = weather_field.sample(self.lats, self.lons)
+        self.inputs['weather'] = weather
+        if previous is None:
+            return np.ones(len(self.locations), dtype=bool)
+        old = previous[WEATHER_FIELDS].to_numpy()
+        new = weather[WEATHER_FIELDS].to_numpy()
+        same = (old == new) | (np.isnan(old) & np.isnan(new))
+        return ~same.all(axis=1)
+
+    def _refresh_iot(self):
+        readings = nearby_sensor_readings(self.lats, self.lons)
+        self.inputs['iot'] = readings
+        # Only a change in what the IoT vote sees makes a location dirty
+        anomaly = readings.get('anomaly')
+        iot_risk, _ = iot_votes(readings['temperature'], readings['smoke_level'],
+                                readings['flame_detected'], anomaly)
+        state = np.char.add(
+            np.char.add(iot_risk.astype(str), np.where(readings['flame_detected'], '+flame', '')),
+            np.where(anomaly if anomaly is not None else False, '+anomaly', ''),
+        )
+        previous, self._iot_state = self._iot_state, state
+        if previous is None:
+            return np.ones(len(self.locations), dtype=bool)
+        return state != previous
+
+    # --- Evaluation and publishing ---
+
+    def _evaluate(self, mask):
+        if not mask.any():
+            return []
+        subset = self.locations[mask]
+        inputs = {'nasa': self.inputs['nasa'], 'cwfis': self.inputs['cwfis']}
+        if self.inputs['weather'] is not None:
+            inputs['weather'] = self.inputs['weather'][mask]
+        if self.inputs['iot'] is not None:
+            inputs['iot'] = {k: v[mask] for k, v in self.inputs['iot'].items()}
+        table = detect_fire_batch(subset, inputs)
+        self.evaluations += len(table)
+
+        published = []
+        checked_at = datetime.now().isoformat()
+        for row in table.to_dict('records'):
+            name = row.get('name', f"{row['lat']:.4f},{row['lon']:.4f}")
+            key = (row['fire_detected'], row['fire_votes'], row['satellite_vote'],
+                   row['official_vote'], row['weather_vote'], row['iot_vote'])
+            if self._last.get(name) == key:
+                continue
+            self._last[name] = key
+            row['timestamp'] = checked_at
+            self.results.publish(name, row)
+            published.append(row)
+            if self.on_result is not None:
+                self.on_result(row)
+        return published
+
+    def run_once(self, now=None):
+        """Refresh every source that is due, then re-evaluate dirty locations."""
+        now = time.monotonic() if now is None else now
+        refreshers = {'nasa': self._refresh_nasa, 'cwfis': self._refresh_cwfis,
+                      'weather': self._refresh_weather, 'iot': self._refresh_iot}
+        while self._queue and self._queue[0][0] <= now:
+            _, source = heapq.heappop(self._queue)
+            try:
+                self._dirty |= refreshers[source]()
+                self.refreshes += 1
+            except Exception as e:
+                log.warning("⚠️ Monitor refresh of %s failed: %s", source, e)
+            heapq.heappush(self._queue, (now + self.intervals[source], source))
+
+        # Wait until every source has reported once before the first evaluation
+        if any(self.inputs[s] is None for s in ('weather', 'iot')):
+            return []
+        mask, self._dirty = self._dirty, np.zeros(len(self.locations), dtype=bool)
+        return self._evaluate(mask)
+
+    def seconds_until_due(self):
+        return max(0.0, self._queue[0][0] - time.monotonic()) if self._queue else 1.0
+
+    def run_forever(self):
+        """Run until stop() is called (or KeyboardInterrupt)."""
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.seconds_until_due())
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    def _print(row):
+        status = "🔥 FIRE DETECTED" if row['fire_detected'] else "✅ No fire"
+        print(f"[{row['timestamp']}] {row['name']}: {status} ({row['fire_votes']}/4 votes)")
+
+    service = MonitorService(on_result=_print)
+    try:
+        service.run_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Stopped after {service.refreshes} refreshes, {service.evaluations} evaluations")
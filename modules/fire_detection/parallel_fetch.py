@@ -0,0 +1,61 @@
+# ===============================================
+# File: modules/fire_detection/parallel_fetch.py
+# Purpose: Fetch all detection sources concurrently with one deadline
+# ===============================================
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from fetch_live_data import fetch_nasa_firms_data, fetch_cwfis_data
+from weather_field import get_interpolated_weather
+from sensor_registry import fetch_nearby_iot_data
+from vegetation_data import fetch_vegetation_data
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+# Overall budget for one detection cycle, in seconds. Sources that have not
+# answered by then are treated as unavailable for this cycle.
+FETCH_DEADLINE = 20
+
+
+def fetch_all_sources(lat=43.65, lon=-79.38, location_name="Toronto", deadline=FETCH_DEADLINE):
+    """
+    Run every data source in parallel and return whatever arrived in time.
+    Returns a dict with keys nasa, cwfis, weather, iot and vegetation;
+    sources that failed or missed the deadline are None.
+    """
+    tasks = {
+        'nasa': (fetch_nasa_firms_data, ()),
+        'cwfis': (fetch_cwfis_data, ()),
+        'weather': (get_interpolated_weather, (lat, lon)),
+        'iot': (fetch_nearby_iot_data, (lat, lon, location_name)),
+        'vegetation': (fetch_vegetation_data, (lat, lon)),
+    }
+    sources = dict.fromkeys(tasks)
+
+    executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="ecoflare-fetch")
+    futures = {executor.submit(func, *args): name for name, (func, args) in tasks.items()}
+    done, not_done = wait(futures, timeout=deadline)
+
+    for future in done:
+        name = futures[future]
+        try:
+            sources[name] = future.result()
+        except Exception as e:
+            log.warning("⚠️ %s failed: %s", name, e)
+
+    for future in not_done:
+        log.warning("⏱️ %s missed the %ss deadline", futures[future], deadline)
+
+    # Do not block on stragglers; they finish in the background and are dropped
+    executor.shutdown(wait=False, cancel_futures=True)
+    return sources
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    sources = fetch_all_sources()
+    print(f"Fetched {sum(v is not None for v in sources.values())}/{len(sources)} "
+          f"sources in {time.perf_counter() - start:.2f}s")
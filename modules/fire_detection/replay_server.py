@@ -0,0 +1,346 @@
+# ===============================================
+# File: modules/fire_detection/replay_server.py
+# Purpose: Local stand-in for FIRMS, CWFIS and Open-Meteo
+# ===============================================
+#
+# Serves recorded fixtures or synthetic payloads with tunable latency,
+# size and failure rate so the pipeline can be load-tested offline.
+#
+#   python replay_server.py serve --port 8765 --hotspots 20000 --latency 0.2
+#   python replay_server.py record fixtures/
+#   python replay_server.py bench --cycles 50 --failure-rate 0.1
+#
+# Routes:  /firms.csv   /cwfis.csv   /v1/forecast?latitude=..&longitude=..
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+FIRMS_HEADER = ("latitude,longitude,brightness,scan,track,acq_date,acq_time,"
+                "satellite,confidence,version,bright_t31,frp,daynight")
+CWFIS_HEADER = "src_agency,agency,firename,lat,lon,startdate,hectares,stage_of_control"
+
+
+def synthetic_firms_csv(n_hotspots, seed=0):
+    """Canada-wide MODIS-style CSV; roughly half the rows fall in Ontario."""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(41, 60, n_hotspots)
+    lon = rng.uniform(-125, -60, n_hotspots)
+    in_ontario = rng.random(n_hotspots) < 0.5
+    lat[in_ontario] = rng.uniform(42, 56, in_ontario.sum())
+    lon[in_ontario] = rng.uniform(-94, -75, in_ontario.sum())
+    date = time.strftime("%Y-%m-%d", time.gmtime())
+    lines = [FIRMS_HEADER]
+    for i in range(n_hotspots):
+        lines.append(
+            f"{lat[i]:.4f},{lon[i]:.4f},{rng.uniform(300, 380):.1f},1.0,1.0,{date},"
+            f"{rng.integers(0, 2400):d},{'Terra' if i % 2 else 'Aqua'},{rng.integers(30, 100):d},"
+            f"6.1NRT,{rng.uniform(280, 300):.1f},{rng.uniform(1, 200):.1f},{'D' if i % 3 else 'N'}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def synthetic_cwfis_csv(n_fires, seed=0):
+    """CWFIS-style active fire list; about a third attributed to Ontario."""
+    rng = np.random.default_rng(seed + 1)
+    agencies = ['ON', 'BC', 'AB', 'QC', 'MB', 'SK']
+    date = time.strftime("%Y-%m-%d", time.gmtime())
+    lines = [CWFIS_HEADER]
+    for i in range(n_fires):
+        agency = 'ON' if i % 3 == 0 else agencies[1 + i % 5]
+        lat, lon = ((rng.uniform(44, 55), rng.uniform(-94, -76)) if agency == 'ON'
+                    else (rng.uniform(49, 60), rng.uniform(-125, -65)))
+        lines.append(
+            f"{agency},{agency.lower()},{agency}{i:04d},{lat:.4f},{lon:.4f},{date},"
+            f"{rng.uniform(0.1, 5000):.1f},{random.Random(i).choice(['OC', 'BH', 'UC'])}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def synthetic_weather(lats, lons):
+    """Deterministic Open-Meteo-shaped readings derived from coordinates."""
+    items = []
+    for lat, lon in zip(lats, lons):
+        items.append({
+            'latitude': lat,
+            'longitude': lon,
+            'current': {
+                'temperature_2m': round(35 - (lat - 41) * 1.5 + (lon % 1), 1),
+                'relative_humidity_2m': round(25 + (lat - 41) * 3, 1),
+                'wind_speed_10m': round(5 + abs(lon) % 20, 1),
+                'precipitation': 0.0,
+            },
+        })
+    return items
+
+
+class ReplayConfig:
+    """Tunable behaviour of the replay server."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, hang_rate=0.0,
+                 hang_seconds=30.0, hotspots=5000, fires=300, fixtures_dir=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.hotspots = hotspots
+        self.fires = fires
+        self.fixtures_dir = fixtures_dir
+        self.seed = seed
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, ReplayHandler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.requests_served = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self.payloads = {}
+        self.load_payloads()
+
+    def load_payloads(self, seed=None):
+        """(Re)build the CSV payloads; a new seed simulates a feed update."""
+        config = self.config
+        seed = config.seed if seed is None else seed
+        payloads = {}
+        if config.fixtures_dir:
+            for route, name in (('/firms.csv', 'firms.csv'), ('/cwfis.csv', 'cwfis.csv'),
+                                ('/v1/forecast', 'weather.json')):
+                path = os.path.join(config.fixtures_dir, name)
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        payloads[route] = f.read()
+        if '/v1/forecast' in payloads:
+            # Recorded readings, replayed for whatever coordinates are asked for
+            recorded = json.loads(payloads['/v1/forecast'])
+            payloads['/v1/forecast'] = recorded if isinstance(recorded, list) else [recorded]
+        payloads.setdefault('/firms.csv', synthetic_firms_csv(config.hotspots, seed))
+        payloads.setdefault('/cwfis.csv', synthetic_cwfis_csv(config.fires, seed))
+        self.payloads = payloads
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoints(self):
+        return {
+            'firms': f"{self.base_url}/firms.csv",
+            'cwfis': f"{self.base_url}/cwfis.csv",
+            'weather': f"{self.base_url}/v1/forecast",
+        }
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/plain", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        config = server.config
+        with server._lock:
+            server.requests_served += 1
+            roll = server.rng.random()
+            delay = max(0.0, config.latency + server.rng.uniform(-config.jitter, config.jitter))
+
+        if roll < config.hang_rate:
+            time.sleep(config.hang_seconds)
+        elif delay:
+            time.sleep(delay)
+        if roll < config.hang_rate + config.failure_rate:
+            self._send(503, b"replay: injected failure")
+            return
+
+        url = urlparse(self.path)
+        if url.path == '/v1/forecast':
+            self._send_weather(parse_qs(url.query))
+        elif url.path in ('/firms.csv', '/cwfis.csv'):
+            self._send_feed(server.payloads[url.path])
+        else:
+            self._send(404, b"not found")
+
+    def _send_feed(self, body):
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.server._lock:
+                self.server.not_modified += 1
+            self._send(304, headers={"ETag": etag})
+            return
+        self._send(200, body, "text/csv", {"ETag": etag})
+
+    def _send_weather(self, query):
+        try:
+            lats = [float(v) for v in query['latitude'][0].split(',')]
+            lons = [float(v) for v in query['longitude'][0].split(',')]
+        except (KeyError, ValueError):
+            self._send(400, b"latitude and longitude are required")
+            return
+        if len(lats) != len(lons):
+            self._send(400, b"latitude and longitude lists differ in length")
+            return
+        recorded = self.server.payloads.get('/v1/forecast')
+        if recorded:
+            # One entry per requested coordinate, cycling through the recorded ones
+            items = [dict(recorded[i % len(recorded)], latitude=lat, longitude=lon)
+                     for i, (lat, lon) in enumerate(zip(lats, lons))]
+        else:
+            items = synthetic_weather(lats, lons)
+        payload = items[0] if len(items) == 1 else items
+        self._send(200, json.dumps(payload).encode(), "application/json")
+
+
+def start_replay_server(config=None, host="127.0.0.1", port=0):
+    """Start a replay server on a background thread and return it."""
+    server = ReplayServer((host, port), config or ReplayConfig())
+    threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+    return server
+
+
+def record_fixtures(directory):
+    """Save the current live FIRMS/CWFIS feeds and a Toronto weather reading."""
+    from http_client import http_get
+    from fetch_live_data import DEFAULT_FIRMS_URL, DEFAULT_CWFIS_URL, DEFAULT_WEATHER_URL
+
+    os.makedirs(directory, exist_ok=True)
+    sources = {
+        'firms.csv': DEFAULT_FIRMS_URL,
+        'cwfis.csv': DEFAULT_CWFIS_URL,
+        'weather.json': (f"{DEFAULT_WEATHER_URL}?latitude=43.65&longitude=-79.38"
+                         f"&current=temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation"
+                         f"&timezone=America/Toronto&forecast_days=1"),
+    }
+    for name, url in sources.items():
+        response = http_get(url, timeout=30)
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(response.content)
+        print(f"💾 Recorded {name} ({len(response.content)} bytes)")
+
+
+def run_benchmark(server, cycles=20, cold=False):
+    """
+    Run detection cycles against `server` and report latency/throughput.
+    The run uses a throwaway disk cache and feed archive, so nothing it
+    fetches reaches the host-wide cache or archived history that live
+    dashboards read. `cold` drops cached feeds and
+    HTTP validators every cycle, so each one downloads in full.
+    """
+    import contextlib
+    import io
+    import tempfile
+    import feed_archive
+    from fetch_live_data import configure_endpoints, endpoint_key
+    from feed_cache import clear_feed_cache, feed_cache
+    from http_client import clear_validators
+    from fire_detection_logic import detect_fire
+    from weather_field import weather_field
+
+    production = endpoint_key()
+    store = feed_cache.store
+    home_path = store.path if store is not None else None
+    home_archive = feed_archive.ARCHIVE_DIR
+    latencies = []
+    with tempfile.TemporaryDirectory(prefix="ecoflare-bench-") as tmp:
+        if store is not None:
+            store.reopen(os.path.join(tmp, "cache.sqlite3"))
+        feed_archive.ARCHIVE_DIR = os.path.join(tmp, "archive")
+        try:
+            configure_endpoints(**server.endpoints())
+            for _ in range(cycles):
+                if cold:
+                    clear_feed_cache()
+                    clear_validators()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    detect_fire(43.65, -79.38, "Toronto")
+                latencies.append(time.perf_counter() - start)
+        finally:
+            # Let a grid refresh started against the replay server finish first
+            weather_field.wait_for_refresh(timeout=60)
+            configure_endpoints(*production)
+            feed_archive.ARCHIVE_DIR = home_archive
+            if store is not None:
+                store.reopen(home_path)
+
+    latencies = np.array(latencies)
+    print(f"cycles={cycles} requests={server.requests_served} "
+          f"p50={np.percentile(latencies, 50) * 1000:.1f}ms "
+          f"p95={np.percentile(latencies, 95) * 1000:.1f}ms "
+          f"max={latencies.max() * 1000:.1f}ms "
+          f"throughput={cycles / latencies.sum():.2f} cycles/s")
+    return latencies
+
+
+def _config_from_args(args):
+    return ReplayConfig(latency=args.latency, jitter=args.jitter,
+                        failure_rate=args.failure_rate, hang_rate=args.hang_rate,
+                        hotspots=args.hotspots, fires=args.fires,
+                        fixtures_dir=args.fixtures, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EcoFlare feed replay server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("--port", type=int, default=8765 if name == "serve" else 0)
+        p.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+        p.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of latency noise")
+        p.add_argument("--failure-rate", type=float, default=0.0, help="fraction of 503 responses")
+        p.add_argument("--hang-rate", type=float, default=0.0, help="fraction of hung responses")
+        p.add_argument("--hotspots", type=int, default=5000, help="synthetic FIRMS rows")
+        p.add_argument("--fires", type=int, default=300, help="synthetic CWFIS rows")
+        p.add_argument("--fixtures", help="directory with firms.csv / cwfis.csv / weather.json")
+        p.add_argument("--seed", type=int, default=0)
+        if name == "bench":
+            p.add_argument("--cycles", type=int, default=20)
+            p.add_argument("--cold", action="store_true", help="clear the feed cache every cycle")
+
+    record = sub.add_parser("record")
+    record.add_argument("directory")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record_fixtures(args.directory)
+    elif args.command == "serve":
+        server = ReplayServer(("127.0.0.1", args.port), _config_from_args(args))
+        print(f"🔁 Replay server on {server.base_url}")
+        for source, url in server.endpoints().items():
+            print(f"   ECOFLARE_{source.upper()}_URL={url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    else:
+        server = start_replay_server(_config_from_args(args), port=args.port)
+        run_benchmark(server, cycles=args.cycles, cold=args.cold)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
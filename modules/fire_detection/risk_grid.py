@@ -0,0 +1,278 @@
+# ===============================================
+# File: modules/fire_detection/risk_grid.py
+# Purpose: Province-wide fire risk raster, recomputed once per cycle
+# ===============================================
+#
+# Every cell of a regular grid over Ontario runs the detect_fire votes
+# (satellite, official, weather and the nearest sensors' IoT vote),
+# vegetation risk and the combined risk level in one vectorized pass.
+# The raster is cached in memory and in the shared disk cache so every
+# dashboard samples the same result until the next cycle. Once it expires
+# the old raster keeps being served while a background thread computes
+# the next one, so no dashboard render waits on the network.
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from fetch_live_data import (
+    ONTARIO_BBOX, FEED_TTL, FEED_MAX_STALE, endpoint_key, fetch_nasa_firms_data, fetch_cwfis_data,
+)
+from weather_field import weather_field
+from batch_detection import detect_fire_batch
+from sensor_registry import nearby_sensor_readings
+from feed_cache import feed_cache
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+RISK_GRID_STEP = 0.1       # degrees (~11 km north-south)
+RISK_GRID_TTL = FEED_TTL   # one raster per feed refresh cycle
+RISK_GRID_MAX_STALE = FEED_MAX_STALE   # an older raster is served only while a new one computes
+
+# Combined risk level (weights from the FireApp risk card)
+VEGETATION_SCORES = {'UNKNOWN': 0.4, 'LOW': 0.2, 'MEDIUM': 0.5, 'HIGH': 0.8, 'VERY_HIGH': 1.0}
+SENSOR_SCORES = {'HIGH': 1.0, 'MEDIUM': 0.6, 'LOW': 0.3, 'UNKNOWN': 0.4}
+RISK_THRESHOLDS = [0.3, 0.6, 0.8]
+RISK_LEVELS = ["🟢 Low", "🟡 Medium", "🟠 High", "🔴 Very High"]
+
+
+def _scores(labels, table):
+    """Numeric score for risk labels (numbers pass through)."""
+    labels = np.asarray(labels)
+    if labels.dtype.kind in 'fiu':
+        return labels.astype(np.float64)
+    return pd.Series(labels).map(table).fillna(table['UNKNOWN']).to_numpy(dtype=np.float64)
+
+
+def risk_scores(wind, humidity, vegetation_risk, sensor_risk):
+    """
+    Vectorized combined risk score in [0, ~1.3]. Vegetation and sensor
+    risks may be labels or numbers; missing weather uses calm, 50% humidity.
+    """
+    wind = np.nan_to_num(np.asarray(wind, dtype=np.float64), nan=0.0)
+    humidity = np.nan_to_num(np.asarray(humidity, dtype=np.float64), nan=50.0)
+    return (0.4 * _scores(vegetation_risk, VEGETATION_SCORES)
+            + 0.3 * (wind / 30)
+            + 0.2 * (1 - humidity / 100)
+            + 0.1 * _scores(sensor_risk, SENSOR_SCORES))
+
+
+def risk_level_codes(scores):
+    """Index into RISK_LEVELS for each score."""
+    return np.digitize(scores, RISK_THRESHOLDS).astype(np.uint8)
+
+
+def compute_risk_level(weather_data, vegetation_risk, sensor_risk):
+    """Single-location risk level from a fetch_weather_data()-style dict."""
+    current = (weather_data or {}).get('current', {})
+    score = risk_scores([current.get('wind_speed_10m', 0)], [current.get('relative_humidity_2m', 50)],
+                        [vegetation_risk], [sensor_risk])
+    return RISK_LEVELS[int(risk_level_codes(score)[0])]
+
+
+class RiskRaster:
+    """One computed risk grid: 2D arrays over (lat nodes, lon nodes)."""
+
+    __slots__ = ('lat_nodes', 'lon_nodes', 'layers', 'computed_at')
+
+    def __init__(self, lat_nodes, lon_nodes, layers, computed_at):
+        self.lat_nodes = lat_nodes
+        self.lon_nodes = lon_nodes
+        self.layers = layers
+        self.computed_at = computed_at
+
+    @property
+    def shape(self):
+        return len(self.lat_nodes), len(self.lon_nodes)
+
+    def sample(self, lats, lons):
+        """Values of the nearest cell for each point (NaN/-1 outside the grid)."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        step_lat = self.lat_nodes[1] - self.lat_nodes[0]
+        step_lon = self.lon_nodes[1] - self.lon_nodes[0]
+        i = np.rint((lats - self.lat_nodes[0]) / step_lat).astype(np.int64)
+        j = np.rint((lons - self.lon_nodes[0]) / step_lon).astype(np.int64)
+        inside = (i >= 0) & (i < len(self.lat_nodes)) & (j >= 0) & (j < len(self.lon_nodes))
+        i, j = np.clip(i, 0, len(self.lat_nodes) - 1), np.clip(j, 0, len(self.lon_nodes) - 1)
+
+        result = pd.DataFrame({'latitude': lats, 'longitude': lons})
+        for name, layer in self.layers.items():
+            values = layer[i, j]
+            if values.dtype.kind == 'f':
+                values = np.where(inside, values, np.nan)
+            elif values.dtype.kind == 'b':
+                values = values & inside
+            else:
+                values = np.where(inside, values, -1)
+            result[name] = values
+        result['risk_label'] = np.where(inside, np.array(RISK_LEVELS)[self.layers['risk_level'][i, j]], None)
+        return result
+
+    def to_frame(self, min_level=0):
+        """Long table of cells at or above `min_level` for maps and tables."""
+        lon_grid, lat_grid = np.meshgrid(self.lon_nodes, self.lat_nodes)
+        keep = self.layers['risk_level'] >= min_level
+        frame = pd.DataFrame({'latitude': lat_grid[keep], 'longitude': lon_grid[keep]})
+        for name, layer in self.layers.items():
+            frame[name] = layer[keep]
+        frame['risk_label'] = pd.Categorical.from_codes(frame['risk_level'], RISK_LEVELS)
+        return frame
+
+
+class RiskGrid:
+    """Computes the raster at most once per `ttl` and shares it via the disk cache."""
+
+    def __init__(self, bbox=ONTARIO_BBOX, step=RISK_GRID_STEP, ttl=RISK_GRID_TTL, store=None,
+                 max_stale=RISK_GRID_MAX_STALE):
+        lat_min, lat_max, lon_min, lon_max = bbox
+        self.lat_nodes = np.arange(lat_min, lat_max + step / 2, step)
+        self.lon_nodes = np.arange(lon_min, lon_max + step / 2, step)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.store = store
+        self.bbox = bbox
+        self.step = step
+        self._raster = None
+        self._computed = None    # monotonic time of _raster
+        self._raster_key = None  # store key (endpoints) _raster was built for
+        self._lock = threading.Lock()          # guards the fields above; never held across I/O
+        self._compute_lock = threading.Lock()  # one compute at a time
+        self._computing = False
+
+    @property
+    def _store_key(self):
+        # Rasters built from a mirror or the replay server are kept apart
+        return ('risk_grid', endpoint_key(), self.bbox, self.step)
+
+    def compute(self, inputs=None):
+        """One vectorized pass over every grid cell."""
+        lon_grid, lat_grid = np.meshgrid(self.lon_nodes, self.lat_nodes)
+        lats, lons = lat_grid.ravel(), lon_grid.ravel()
+        inputs = dict(inputs or {})
+        if 'nasa' not in inputs:
+            inputs['nasa'] = fetch_nasa_firms_data()
+        if 'cwfis' not in inputs:
+            inputs['cwfis'] = fetch_cwfis_data()
+        if 'weather' not in inputs:
+            # Interpolate only: a point-by-point fallback would mean thousands of requests
+            if not weather_field.is_fresh():
+                weather_field.refresh()
+            inputs['weather'], _ = weather_field.interpolate(lats, lons)
+        if 'iot' not in inputs:
+            inputs['iot'] = nearby_sensor_readings(lats, lons)
+
+        table = detect_fire_batch(np.column_stack([lats, lons]), inputs)
+        wind = np.asarray(inputs['weather']['wind_speed_10m'], dtype=np.float64)
+        # Cells without a reporting sensor score as UNKNOWN, like the risk card
+        reporting = (inputs['iot'] or {}).get('reporting', np.zeros(len(lats), dtype=bool))
+        sensor_risk = np.where(reporting, table['iot_risk'].astype(str).to_numpy(), 'UNKNOWN')
+        scores = risk_scores(wind, table['humidity'].to_numpy(), table['vegetation_risk'].astype(str).to_numpy(),
+                             sensor_risk)
+
+        shape = lat_grid.shape
+        layers = {
+            'fire_votes': table['fire_votes'].to_numpy().reshape(shape),
+            'fire_detected': table['fire_detected'].to_numpy().reshape(shape),
+            'nearby_hotspots': table['nearby_hotspots'].to_numpy().reshape(shape),
+            'nearby_fires': table['nearby_fires'].to_numpy().reshape(shape),
+            'iot_vote': table['iot_vote'].to_numpy().reshape(shape),
+            'temperature': table['temperature'].to_numpy().reshape(shape),
+            'humidity': table['humidity'].to_numpy().reshape(shape),
+            'wind_speed': wind.astype(np.float32).reshape(shape),
+            'risk_score': scores.astype(np.float32).reshape(shape),
+            'risk_level': risk_level_codes(scores).reshape(shape),
+        }
+        return RiskRaster(self.lat_nodes, self.lon_nodes, layers, time.time())
+
+    def _age(self):
+        return time.monotonic() - self._computed
+
+    def _load(self, key):
+        """Latest raster for `key` from memory or the disk cache (fresh or not), or None."""
+        if self._raster_key != key:
+            self._raster, self._raster_key = None, key     # endpoints changed
+        if (self._raster is None or self._age() >= self.ttl) and self.store is not None:
+            try:
+                hit = self.store.get(key)
+            except Exception as e:
+                log.warning("⚠️ Disk cache read failed for risk grid: %s", e)
+                hit = None
+            if hit is not None and (self._raster is None or hit[1] < self._age()):
+                self._raster, self._computed = hit[0], time.monotonic() - hit[1]
+        return self._raster
+
+    def _recompute(self, key):
+        log.info("🗺️ Computing risk grid (%dx%d cells)...", len(self.lat_nodes), len(self.lon_nodes))
+        raster = self.compute()
+        with self._lock:
+            if self._raster_key == key:
+                self._raster, self._computed = raster, time.monotonic()
+        if self.store is not None:
+            try:
+                self.store.set(key, raster, self.ttl)
+            except Exception as e:
+                log.warning("⚠️ Disk cache write failed for risk grid: %s", e)
+        return raster
+
+    def _recompute_async(self, key):
+        """Start a background recompute unless one is already running."""
+        with self._lock:
+            if self._computing:
+                return
+            self._computing = True
+
+        def _run():
+            try:
+                with self._compute_lock:
+                    self._recompute(key)
+            except Exception as e:
+                log.warning("⚠️ Risk grid recompute failed: %s", e)
+            finally:
+                with self._lock:
+                    self._computing = False
+
+        threading.Thread(target=_run, name="risk-grid-recompute", daemon=True).start()
+
+    def current(self):
+        """
+        The raster for this cycle. An expired one (up to max_stale) is
+        returned at once while a background thread computes the next; only
+        a cold start computes in the caller.
+        """
+        key = self._store_key
+        with self._lock:
+            raster = self._load(key)
+            age = self._age() if raster is not None else None
+        if raster is not None and age < self.ttl:
+            return raster
+        if raster is not None and age < self.ttl + self.max_stale:
+            self._recompute_async(key)
+            return raster
+        with self._compute_lock:
+            with self._lock:
+                raster = self._load(key)
+                if raster is not None and self._age() < self.ttl:
+                    return raster      # computed while we waited
+            return self._recompute(key)
+
+    def invalidate(self):
+        with self._lock:
+            self._raster = None
+        if self.store is not None:
+            try:
+                self.store.delete(self._store_key)
+            except Exception as e:
+                log.warning("⚠️ Disk cache delete failed for risk grid: %s", e)
+
+
+# Shared raster for every entry point in this process
+risk_grid = RiskGrid(store=feed_cache.store)
+
+
+def sample_risk(lats, lons):
+    """Risk grid values at arbitrary points."""
+    return risk_grid.current().sample(lats, lons)
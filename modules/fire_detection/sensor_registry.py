@@ -0,0 +1,252 @@
+# ===============================================
+# File: modules/fire_detection/sensor_registry.py
+# Purpose: Registry of IoT sensors with spatial lookup
+# ===============================================
+#
+# Every sensor has an ID, coordinates, a type and a status. Active sensors
+# are held in a PointIndex (rebuilt only after the registry changes), so
+# the k nearest or all within-radius sensors of any number of points come
+# from one vectorized query instead of a scan over every sensor.
+#
+# The registry starts with DEFAULT_SENSORS; point ECOFLARE_SENSOR_REGISTRY
+# at a CSV (sensor_id,lat,lon[,sensor_type,status]) to load a deployment.
+#
+# Readings come from the sensor store (fed by iot_ingest). A sensor only
+# votes with its latest reading, and only while that reading is younger
+# than SENSOR_MAX_AGE; silent sensors are skipped, never simulated. Each
+# reading carries the store's anomaly flag for its sensor, so every
+# detector casts the same iot_votes().
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hotspot_index import PointIndex
+from iot_data import iot_risk_score, iot_risk_scores
+from sensor_store import SENSOR_FIELDS, sensor_store
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+SENSOR_TYPES = ['multi', 'smoke', 'thermal', 'flame']
+SENSOR_STATUSES = ['active', 'offline', 'maintenance']
+SENSOR_RADIUS_KM = 25      # sensors this close can vote for a location
+SENSOR_NEIGHBOURS = 3      # at most this many sensors read per location
+SENSOR_MAX_AGE = 900       # seconds; older latest readings are ignored
+
+DEFAULT_SENSORS = pd.DataFrame({
+    'sensor_id': ['SENSOR_001', 'SENSOR_002', 'SENSOR_003', 'SENSOR_004', 'SENSOR_005'],
+    'lat': [43.65, 45.42, 48.38, 46.52, 46.49],
+    'lon': [-79.38, -75.70, -89.25, -84.35, -80.99],
+    'sensor_type': ['multi', 'multi', 'multi', 'smoke', 'thermal'],
+    'status': ['active'] * 5,
+})
+REGISTRY_PATH = os.environ.get("ECOFLARE_SENSOR_REGISTRY")
+
+
+def _normalize(frame):
+    frame = pd.DataFrame(frame).copy()
+    missing = {'sensor_id', 'lat', 'lon'} - set(frame.columns)
+    if missing:
+        raise ValueError(f"sensor registry needs columns {sorted(missing)}")
+    if 'sensor_type' not in frame.columns:
+        frame['sensor_type'] = 'multi'
+    if 'status' not in frame.columns:
+        frame['status'] = 'active'
+    frame = frame[['sensor_id', 'lat', 'lon', 'sensor_type', 'status']]
+    frame['sensor_id'] = frame['sensor_id'].astype(str)
+    frame['lat'] = frame['lat'].astype(np.float64)
+    frame['lon'] = frame['lon'].astype(np.float64)
+    frame['sensor_type'] = pd.Categorical(frame['sensor_type'], categories=SENSOR_TYPES)
+    frame['status'] = pd.Categorical(frame['status'], categories=SENSOR_STATUSES)
+    if frame['sensor_type'].isna().any() or frame['status'].isna().any():
+        raise ValueError(f"sensor_type must be one of {SENSOR_TYPES}, status one of {SENSOR_STATUSES}")
+    return frame
+
+
+class SensorRegistry:
+    """Sensor metadata plus a spatial index over the active sensors."""
+
+    def __init__(self, sensors=None):
+        self._frame = _normalize(DEFAULT_SENSORS.iloc[:0] if sensors is None else sensors)
+        self._frame = self._frame.drop_duplicates('sensor_id', keep='last').set_index('sensor_id')
+        self._index = None     # (PointIndex, active sensor ids)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frame)
+
+    def __contains__(self, sensor_id):
+        return sensor_id in self._frame.index
+
+    def register(self, sensor_id, lat, lon, sensor_type='multi', status='active'):
+        """Add or update one sensor."""
+        self.register_many(pd.DataFrame({'sensor_id': [sensor_id], 'lat': [lat], 'lon': [lon],
+                                         'sensor_type': [sensor_type], 'status': [status]}))
+
+    def register_many(self, sensors):
+        """Add or update many sensors from a frame (sensor_id, lat, lon[, sensor_type, status])."""
+        new = _normalize(sensors).drop_duplicates('sensor_id', keep='last').set_index('sensor_id')
+        with self._lock:
+            kept = self._frame[~self._frame.index.isin(new.index)]
+            self._frame = pd.concat([kept, new]) if len(kept) else new
+            self._index = None
+
+    def set_status(self, sensor_id, status):
+        if status not in SENSOR_STATUSES:
+            raise ValueError(f"status must be one of {SENSOR_STATUSES}")
+        with self._lock:
+            self._frame.loc[sensor_id, 'status'] = status     # KeyError for unknown sensors
+            self._index = None
+
+    def get(self, sensor_id):
+        """Metadata dict for one sensor, or None."""
+        if sensor_id not in self._frame.index:
+            return None
+        row = self._frame.loc[sensor_id]
+        return {'sensor_id': sensor_id, 'lat': row['lat'], 'lon': row['lon'],
+                'sensor_type': row['sensor_type'], 'status': row['status']}
+
+    def frame(self):
+        return self._frame.reset_index()
+
+    def _active(self):
+        with self._lock:
+            if self._index is None:
+                active = self._frame[self._frame['status'] == 'active']
+                self._index = (PointIndex(active['lat'].to_numpy(), active['lon'].to_numpy()),
+                               active.index.to_numpy(dtype=object))
+            return self._index
+
+    def nearest(self, lats, lons, k=SENSOR_NEIGHBOURS, max_km=SENSOR_RADIUS_KM):
+        """
+        k nearest active sensors per point. Returns (sensor_ids, distances_km)
+        shaped (n, k); missing neighbours are None / inf.
+        """
+        index, ids = self._active()
+        idx, dist = index.nearest(lats, lons, k=k, max_km=max_km)
+        found = idx >= 0
+        sensor_ids = np.full(idx.shape, None, dtype=object)
+        sensor_ids[found] = ids[idx[found]]
+        return sensor_ids, dist
+
+    def within(self, lats, lons, radius_km=SENSOR_RADIUS_KM):
+        """All (point, sensor) pairs within `radius_km`: (point_idx, sensor_ids, distances_km)."""
+        index, ids = self._active()
+        query_idx, point_idx, dist = index.query_radius(lats, lons, radius_km)
+        return query_idx, ids[point_idx], dist
+
+
+def load_registry(path=REGISTRY_PATH):
+    """Registry from a CSV deployment file, or DEFAULT_SENSORS."""
+    if path:
+        try:
+            return SensorRegistry(pd.read_csv(path))
+        except (OSError, ValueError) as e:
+            log.warning("⚠️ Could not load sensor registry %s: %s", path, e)
+    return SensorRegistry(DEFAULT_SENSORS)
+
+
+# Shared registry for every entry point in this process
+sensor_registry = load_registry()
+
+
+def _fresh_readings(sensor_ids, store, max_age, now=None):
+    """
+    Latest reading of each sensor with its anomaly flag, skipping silent
+    sensors and stale readings.
+    """
+    now = time.time() if now is None else now
+    readings = {}
+    for sensor_id in sensor_ids:
+        reading = store.latest(sensor_id)
+        if reading is not None and now - reading['timestamp'] <= max_age:
+            stats = store.stats.get(sensor_id) if store.stats is not None else None
+            reading['anomaly'] = stats is not None and stats.anomaly
+            reading['anomaly_fields'] = list(stats.anomaly_fields) if reading['anomaly'] else []
+            readings[sensor_id] = reading
+    return readings
+
+
+def fetch_nearby_iot_data(lat, lon, location="Unknown", registry=None, store=None,
+                          k=SENSOR_NEIGHBOURS, radius_km=SENSOR_RADIUS_KM, max_age=SENSOR_MAX_AGE):
+    """
+    Latest readings of the active sensors nearest to (lat, lon). Returns the
+    riskiest reading (same keys as fetch_iot_sensor_data, plus distance_km
+    and anomaly flags) with all nearby readings under 'readings', or None
+    when no sensor in range has reported within `max_age` seconds.
+    """
+    if registry is None:
+        registry = sensor_registry
+    if store is None:
+        store = sensor_store
+    sensor_ids, distances = registry.nearest([lat], [lon], k=k, max_km=radius_km)
+    nearby = [(sid, d) for sid, d in zip(sensor_ids[0], distances[0]) if sid is not None]
+    fresh = _fresh_readings([sid for sid, _ in nearby], store, max_age)
+    readings = []
+    for sensor_id, distance in nearby:
+        if sensor_id not in fresh:
+            continue
+        reading = dict(fresh[sensor_id], sensor_id=sensor_id, location=location,
+                       distance_km=round(float(distance), 2))
+        reading['timestamp'] = datetime.fromtimestamp(reading['timestamp']).isoformat()
+        readings.append(reading)
+    if not readings:
+        log.debug("📡 No fresh sensor readings within %s km of %s", radius_km, location)
+        return None
+    riskiest = dict(max(readings, key=iot_risk_score))
+    riskiest['anomaly'] = any(r['anomaly'] for r in readings)
+    riskiest['readings'] = readings
+    return riskiest
+
+
+def nearby_sensor_readings(lats, lons, registry=None, store=None,
+                           k=SENSOR_NEIGHBOURS, radius_km=SENSOR_RADIUS_KM, max_age=SENSOR_MAX_AGE):
+    """
+    Columnar fetch_nearby_iot_data for many points: the riskiest fresh
+    reading among each point's nearest sensors. Returns arrays temperature,
+    smoke_level, flame_detected and sensor_id, an 'anomaly' flag (any
+    reporting neighbour anomalous) and a 'reporting' mask; points without a
+    fresh reading are NaN / False / None.
+    """
+    if registry is None:
+        registry = sensor_registry
+    if store is None:
+        store = sensor_store
+    sensor_ids, _ = registry.nearest(lats, lons, k=k, max_km=radius_km)
+    n = len(sensor_ids)
+
+    # Latest reading of each distinct neighbour, gathered back to (n, k);
+    # column `missing` stands for "no fresh reading"
+    flat = sensor_ids.ravel()
+    present = np.flatnonzero(flat != None)  # noqa: E711 (element-wise)
+    unique_ids, inverse = np.unique(flat[present].astype(str), return_inverse=True)
+    values, timestamps, fresh = store.latest_many(unique_ids)
+    fresh &= time.time() - timestamps <= max_age
+    missing = len(unique_ids)
+    index = np.full(flat.shape, missing)
+    index[present] = np.where(fresh[inverse], inverse, missing)
+    index = index.reshape(sensor_ids.shape)
+    found = index < missing
+    values = np.concatenate([values, np.full((len(SENSOR_FIELDS), 1), np.nan, dtype=np.float32)], axis=1)
+    columns = {field: values[SENSOR_FIELDS.index(field)][index].astype(np.float64)
+               for field in ('temperature', 'smoke_level', 'flame_detected')}
+    columns['flame_detected'] = columns['flame_detected'] > 0
+    anomalous = np.zeros(missing + 1, dtype=bool)
+    if store.stats is not None:
+        anomalous[:missing] = [store.stats.is_anomalous(sensor_id) for sensor_id in unique_ids]
+
+    # Riskiest reporting sensor per point (-1 keeps silent neighbours out)
+    scores = np.where(found, iot_risk_scores(columns).astype(np.int16), -1)
+    best = np.argmax(scores, axis=1)
+    rows = np.arange(n)
+    reporting = found[rows, best]
+    result = {field: values[rows, best] for field, values in columns.items()}
+    result['sensor_id'] = np.where(reporting, sensor_ids[rows, best], None)
+    result['anomaly'] = anomalous[index].any(axis=1)
+    result['reporting'] = reporting
+    return result
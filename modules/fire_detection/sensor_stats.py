@@ -0,0 +1,172 @@
+# ===============================================
+# File: modules/fire_detection/sensor_stats.py
+# Purpose: Streaming per-sensor statistics and anomaly flags
+# ===============================================
+#
+# Each reading updates, in O(1) per tracked field:
+#   - time-based EWMA mean and variance (alpha = 1 - exp(-dt / EWMA_SECONDS),
+#     so irregular sampling rates weigh history the same way)
+#   - rate of change since the previous reading (units per second)
+#   - rolling max over ROLLING_SECONDS (monotonic deque, amortized O(1))
+# A reading is anomalous for a sensor's own baseline when it sits more than
+# ANOMALY_Z standard deviations above the EWMA mean, or rises faster than
+# the field's RATE_LIMITS while at least RATE_Z above it, once
+# WARMUP_READINGS have been seen. Until then alpha is at least 1/n (a plain
+# running mean), so the baseline and its variance are usable from the start.
+
+import math
+import threading
+from collections import deque
+
+import pandas as pd
+
+STATS_FIELDS = ['temperature', 'smoke_level', 'air_quality_index']
+EWMA_SECONDS = 300          # time constant of the baseline
+ROLLING_SECONDS = 60        # window of the rolling max
+WARMUP_READINGS = 30        # readings before a sensor can be flagged
+ANOMALY_Z = 4.0             # rise above baseline, in standard deviations
+RATE_Z = 3.0                # a fast rise must also be this far above baseline
+RATE_LIMITS = {'temperature': 0.5, 'smoke_level': 2.0, 'air_quality_index': 5.0}   # per second
+MIN_STD = {'temperature': 0.5, 'smoke_level': 1.0, 'air_quality_index': 2.0}       # noise floor
+
+
+class FieldStats:
+    """Streaming statistics of one field of one sensor."""
+
+    __slots__ = ('name', 'mean', 'var', 'last', 'rate', 'z', '_window')
+
+    def __init__(self, name):
+        self.name = name
+        self.mean = None
+        self.var = 0.0
+        self.last = None
+        self.rate = 0.0
+        self.z = 0.0
+        self._window = deque()   # (t, value), values strictly decreasing
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    @property
+    def rolling_max(self):
+        return self._window[0][1] if self._window else None
+
+    def update(self, value, alpha, dt, t):
+        """Fold in one reading; returns True if it is anomalous."""
+        if self.mean is None:
+            self.mean = self.last = value
+            self._window.append((t, value))
+            return False
+
+        # Score against the baseline before this reading moves it
+        std = max(math.sqrt(self.var), MIN_STD.get(self.name, 0.0))
+        self.z = (value - self.mean) / std
+        self.rate = (value - self.last) / dt if dt > 0 else 0.0
+        anomalous = self.z > ANOMALY_Z or (self.rate > RATE_LIMITS.get(self.name, math.inf)
+                                           and self.z > RATE_Z)
+
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+        self.last = value
+
+        window = self._window
+        while window and window[-1][1] <= value:
+            window.pop()
+        window.append((t, value))
+        while window[0][0] < t - ROLLING_SECONDS:
+            window.popleft()
+        return anomalous
+
+
+class SensorStats:
+    """Streaming statistics of every tracked field of one sensor."""
+
+    __slots__ = ('fields', 'count', 'last_time', 'anomaly', 'anomaly_fields', 'anomalies')
+
+    def __init__(self):
+        self.fields = [FieldStats(name) for name in STATS_FIELDS]
+        self.count = 0
+        self.last_time = None
+        self.anomaly = False         # flag of the latest reading
+        self.anomaly_fields = []
+        self.anomalies = 0           # anomalous readings seen
+
+    def update(self, t, values):
+        """Fold in one reading; `values` are in STATS_FIELDS order."""
+        dt = 0.0 if self.last_time is None else max(t - self.last_time, 0.0)
+        alpha = max(1.0 - math.exp(-dt / EWMA_SECONDS), 1.0 / (self.count + 1))
+        warm = self.count >= WARMUP_READINGS
+        flagged = [f.name for f, v in zip(self.fields, values) if f.update(v, alpha, dt, t) and warm]
+        self.count += 1
+        self.last_time = t if self.last_time is None else max(t, self.last_time)
+        self.anomaly = bool(flagged)
+        self.anomaly_fields = flagged
+        self.anomalies += self.anomaly
+        return self.anomaly
+
+    def snapshot(self):
+        result = {'readings': self.count, 'anomaly': self.anomaly, 'anomaly_fields': list(self.anomaly_fields)}
+        for f in self.fields:
+            result[f.name] = {'mean': f.mean, 'std': f.std, 'rate': f.rate, 'max': f.rolling_max, 'z': f.z}
+        return result
+
+
+class StatsTracker:
+    """SensorStats for every sensor, fed by the sensor store."""
+
+    def __init__(self, row_fields=None):
+        # Positions of STATS_FIELDS within incoming rows (default: STATS_FIELDS order)
+        row_fields = list(row_fields or STATS_FIELDS)
+        self._columns = [row_fields.index(name) for name in STATS_FIELDS]
+        self._sensors = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, sensor_id):
+        stats = self._sensors.get(sensor_id)
+        if stats is None:
+            stats = self._sensors.setdefault(sensor_id, SensorStats())
+        return stats
+
+    def update(self, sensor_id, timestamp, row):
+        """One reading (row in row_fields order); returns its anomaly flag."""
+        values = [float(row[c]) for c in self._columns]
+        with self._lock:
+            return self._stats(sensor_id).update(float(timestamp), values)
+
+    def update_many(self, sensor_id, timestamps, rows):
+        """Readings of one sensor in time order (rows: fields x n); returns anomalous count."""
+        columns = [rows[c].tolist() for c in self._columns]
+        flagged = 0
+        with self._lock:
+            stats = self._stats(sensor_id)
+            for t, *values in zip(timestamps.tolist(), *columns):
+                flagged += stats.update(t, values)
+        return flagged
+
+    def get(self, sensor_id):
+        return self._sensors.get(sensor_id)
+
+    def clear(self):
+        with self._lock:
+            self._sensors = {}
+
+    def is_anomalous(self, sensor_id):
+        stats = self._sensors.get(sensor_id)
+        return stats is not None and stats.anomaly
+
+    def anomalous_sensors(self):
+        return [sensor_id for sensor_id, stats in self._sensors.items() if stats.anomaly]
+
+    def frame(self):
+        """One row per sensor: readings, anomaly flag and mean/std/rate/max per field."""
+        rows = []
+        for sensor_id, stats in self._sensors.items():
+            row = {'sensor_id': sensor_id, 'readings': stats.count, 'anomaly': stats.anomaly}
+            for f in stats.fields:
+                row.update({f"{f.name}_mean": f.mean, f"{f.name}_std": f.std,
+                            f"{f.name}_rate": f.rate, f"{f.name}_max": f.rolling_max})
+            rows.append(row)
+        return pd.DataFrame(rows)
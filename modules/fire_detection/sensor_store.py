@@ -0,0 +1,283 @@
+# ===============================================
+# File: modules/fire_detection/sensor_store.py
+# Purpose: In-memory time series of IoT readings, one ring buffer per sensor
+# ===============================================
+#
+# Each sensor owns fixed-size arrays sized 2 x capacity. Every reading is
+# written twice (slot i and slot i + capacity), so the newest n readings
+# are always one contiguous slice: windows are NumPy views, never copies,
+# and append is O(1). Memory per sensor is fixed at creation:
+#   capacity x (5 float32 fields + float64 timestamp) x 2 = 56 B/reading
+# i.e. ~200 KB for an hour of 1 Hz readings.
+#
+# Views alias the buffer and are overwritten after `capacity` more
+# appends; copy() a window if you keep it longer than that.
+#
+# With a `shared` DiskCache, appends go to its sensor_readings log instead
+# and every process replays that log into its own buffers (reads pull new
+# rows at most every SENSOR_SYNC_SECONDS), so readings ingested by one
+# process vote in the dashboards and the monitor too.
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from sensor_stats import StatsTracker
+from feed_cache import feed_cache
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+SENSOR_FIELDS = ['temperature', 'smoke_level', 'humidity', 'air_quality_index', 'flame_detected']
+SENSOR_CAPACITY = 3600      # readings kept per sensor (1 h at 1 Hz)
+SENSOR_SHARED_READINGS = 600   # readings per sensor kept in the shared log
+SENSOR_SYNC_SECONDS = 1.0      # reads pull other processes' readings at most this often
+
+
+def _epoch(timestamp):
+    """Epoch seconds from None (now), a number or an ISO string."""
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp).timestamp()
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+class SensorBuffer:
+    """Mirrored ring buffer for one sensor."""
+
+    __slots__ = ('capacity', 'values', 'timestamps', 'count', '_head')
+
+    def __init__(self, capacity=SENSOR_CAPACITY):
+        self.capacity = capacity
+        self.values = np.zeros((len(SENSOR_FIELDS), 2 * capacity), dtype=np.float32)
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.count = 0      # readings ever appended
+        self._head = 0      # slot of the next write, in [0, capacity)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, row):
+        """Store one reading; `row` holds one value per SENSOR_FIELDS entry."""
+        i, j = self._head, self._head + self.capacity
+        self.values[:, i] = row
+        self.values[:, j] = row
+        self.timestamps[i] = self.timestamps[j] = timestamp
+        self._head = (i + 1) % self.capacity
+        self.count += 1
+
+    def extend(self, timestamps, rows):
+        """Store many readings; `rows` is (len(SENSOR_FIELDS), n)."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        rows = np.asarray(rows, dtype=np.float32)
+        n = len(timestamps)
+        if n > self.capacity:
+            timestamps, rows = timestamps[-self.capacity:], rows[:, -self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+        slots = (self._head + np.arange(n)) % self.capacity
+        for offset in (0, self.capacity):
+            self.values[:, slots + offset] = rows
+            self.timestamps[slots + offset] = timestamps
+        self._head = (self._head + n) % self.capacity
+        self.count += n
+
+    def _span(self, n):
+        end = self._head + self.capacity
+        return end - min(n, len(self)), end
+
+    def window(self, n=None, seconds=None, now=None):
+        """
+        Newest readings as zero-copy views: the last `n` readings, or those
+        from the last `seconds` (relative to `now`, default the newest one).
+        Returns (timestamps, values) with values shaped (fields, readings).
+        """
+        start, end = self._span(len(self) if n is None else n)
+        if seconds is not None and end > start:
+            ts = self.timestamps[start:end]
+            reference = ts[-1] if now is None else _epoch(now)
+            start += int(np.searchsorted(ts, reference - seconds, side='left'))
+        return self.timestamps[start:end], self.values[:, start:end]
+
+    def _newest_slot(self):
+        return (self._head - 1) % self.capacity
+
+    def latest(self):
+        """The newest reading as a dict, or None if empty."""
+        if not self.count:
+            return None
+        slot = self._newest_slot()
+        reading = {f: float(v) for f, v in zip(SENSOR_FIELDS, self.values[:, slot])}
+        reading['flame_detected'] = bool(reading['flame_detected'])
+        reading['air_quality_index'] = int(reading['air_quality_index'])
+        reading['timestamp'] = float(self.timestamps[slot])
+        return reading
+
+
+class SensorStore:
+    """
+    Ring buffers for every sensor, created on first reading.
+    An optional StatsTracker is updated with every appended reading, and an
+    optional `shared` DiskCache shares readings with other processes.
+    """
+
+    def __init__(self, capacity=SENSOR_CAPACITY, stats=None, shared=None):
+        self.capacity = capacity
+        self.stats = stats
+        self.shared = shared
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._seen = (None, 0)             # (shared file, last log seq applied)
+        self._synced_at = float('-inf')
+
+    def _buffer(self, sensor_id):
+        buffer = self._buffers.get(sensor_id)
+        if buffer is None:
+            buffer = self._buffers.setdefault(sensor_id, SensorBuffer(self.capacity))
+        return buffer
+
+    def _append(self, sensor_id, timestamps, rows):
+        # Caller holds self._lock
+        self._buffer(sensor_id).extend(timestamps, rows)
+        if self.stats is not None:
+            self.stats.update_many(sensor_id, timestamps, rows)
+
+    def _publish(self, sensor_id, timestamps, rows):
+        """Write readings to the shared log and pull them back; False keeps them local."""
+        if self.shared is None:
+            return False
+        try:
+            self.shared.append_readings(sensor_id, timestamps, np.ascontiguousarray(rows.T), SENSOR_SHARED_READINGS)
+        except Exception as e:
+            log.warning("⚠️ Shared sensor store write failed, keeping readings local: %s", e)
+            return False
+        self.sync(force=True)
+        return True
+
+    def record(self, reading):
+        """Append a fetch_iot_sensor_data()-style dict."""
+        row = [float(reading.get(f) or 0) for f in SENSOR_FIELDS]
+        timestamp = _epoch(reading.get('timestamp'))
+        if self._publish(reading['sensor_id'], np.array([timestamp]), np.array(row, dtype=np.float32)[:, None]):
+            return
+        with self._lock:
+            self._buffer(reading['sensor_id']).append(timestamp, row)
+            if self.stats is not None:
+                self.stats.update(reading['sensor_id'], timestamp, row)
+
+    def extend(self, sensor_id, timestamps, rows):
+        """Append a batch of readings for one sensor (rows: fields x n)."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        rows = np.asarray(rows, dtype=np.float32)
+        if self._publish(sensor_id, timestamps, rows):
+            return
+        with self._lock:
+            self._append(sensor_id, timestamps, rows)
+
+    def sync(self, force=False):
+        """Replay readings added to the shared log since the last sync."""
+        if self.shared is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._synced_at < SENSOR_SYNC_SECONDS:
+            return
+        with self._sync_lock:
+            path, seen = self._seen
+            if path != self.shared.path:
+                # Another shared file: its log replaces everything held here
+                with self._lock:
+                    self._buffers = {}
+                    if self.stats is not None:
+                        self.stats.clear()
+                path, seen = self.shared.path, 0
+            try:
+                rows = self.shared.readings_since(seen)
+            except Exception as e:
+                log.warning("⚠️ Shared sensor store read failed: %s", e)
+                self._seen = (path, seen)
+                return
+            if rows:
+                self._apply(rows)
+                seen = rows[-1][0]
+            self._seen = (path, seen)
+            self._synced_at = now
+
+    def _apply(self, rows):
+        """Append log rows (in seq order) to the buffers, grouped by sensor."""
+        _, sensor_ids, timestamps, blobs = zip(*rows)
+        values = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(rows), len(SENSOR_FIELDS)).T
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        ids, sensor_of = np.unique(np.asarray(sensor_ids), return_inverse=True)
+        order = np.argsort(sensor_of, kind='stable')
+        bounds = np.cumsum(np.bincount(sensor_of, minlength=len(ids)))
+        start = 0
+        with self._lock:
+            for sensor_id, end in zip(ids, bounds):
+                picked = order[start:end]
+                self._append(str(sensor_id), timestamps[picked], values[:, picked])
+                start = end
+
+    def window(self, sensor_id, n=None, seconds=None, now=None):
+        """
+        Recent readings of one sensor as a dict of field -> view, plus
+        'timestamp'. Unknown sensors give empty arrays.
+        """
+        self.sync()
+        buffer = self._buffers.get(sensor_id)
+        if buffer is None:
+            buffer = SensorBuffer(1)
+        timestamps, values = buffer.window(n, seconds, now)
+        result = dict(zip(SENSOR_FIELDS, values))
+        result['timestamp'] = timestamps
+        return result
+
+    def latest(self, sensor_id):
+        self.sync()
+        buffer = self._buffers.get(sensor_id)
+        return buffer.latest() if buffer is not None else None
+
+    def latest_many(self, sensor_ids):
+        """
+        Newest reading of each sensor, columnar: (values, timestamps, found)
+        with values shaped (fields, len(sensor_ids)). Unknown or silent
+        sensors are NaN with found False.
+        """
+        self.sync()
+        m = len(sensor_ids)
+        values = np.full((len(SENSOR_FIELDS), m), np.nan, dtype=np.float32)
+        timestamps = np.full(m, np.nan)
+        found = np.zeros(m, dtype=bool)
+        for i, sensor_id in enumerate(sensor_ids):
+            buffer = self._buffers.get(sensor_id)
+            if buffer is not None and buffer.count:
+                slot = buffer._newest_slot()
+                values[:, i] = buffer.values[:, slot]
+                timestamps[i] = buffer.timestamps[slot]
+                found[i] = True
+        return values, timestamps, found
+
+    def sensors(self):
+        self.sync()
+        return list(self._buffers)
+
+    def __len__(self):
+        self.sync()
+        return len(self._buffers)
+
+    def __contains__(self, sensor_id):
+        self.sync()
+        return sensor_id in self._buffers
+
+    def memory_bytes(self):
+        return sum(b.values.nbytes + b.timestamps.nbytes for b in self._buffers.values())
+
+
+# Shared store (with streaming statistics) for every entry point, kept in
+# step with other processes on this host through the feed cache's disk store
+sensor_store = SensorStore(stats=StatsTracker(SENSOR_FIELDS), shared=feed_cache.store)
@@ -0,0 +1,95 @@
+# ===============================================
+# File: modules/fire_detection/source_guard.py
+# Purpose: Circuit breakers for slow or failing upstream sources
+# ===============================================
+
+import threading
+import time
+
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+FAILURE_THRESHOLD = 3    # consecutive failures before the circuit opens
+COOLDOWN = 120           # seconds an open circuit rejects calls
+
+
+class SourceUnavailable(Exception):
+    """Raised when a source's circuit is open and nothing is cached."""
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls go through; consecutive failures are counted
+    open      -> calls are rejected until the cool-down passes
+    half_open -> a single trial call decides between closed and open
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def ready(self):
+        """Like allow() but without claiming the half-open trial call."""
+        with self._lock:
+            if self.state == 'open':
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return self.state == 'closed'
+
+    def allow(self):
+        """True if a call to the source may be made now."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    log.warning("🚧 %s: circuit open for %ss", self.name, self.cooldown)
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """Run `func` through the breaker, recording the outcome."""
+        if not self.allow():
+            raise SourceUnavailable(f"{self.name} circuit is open")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Process-wide breaker for a named source."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states():
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
@@ -0,0 +1,782 @@
+# test_fire_detection_module.py
+import time
+import pytest
+import parallel_fetch
+from parallel_fetch import fetch_all_sources
+
+@pytest.fixture(autouse=True)
+def private_disk_cache(tmp_path):
+    """Point the shared disk cache at a per-test file instead of ~/.ecoflare."""
+    import feed_cache
+    store = feed_cache.feed_cache.store
+    if store is None:
+        yield None
+        return
+    home_path = store.path
+    store.reopen(str(tmp_path / "cache.sqlite3"))
+    yield store
+    store.reopen(home_path)
+
+@pytest.fixture
+def fake_sources(monkeypatch):
+    monkeypatch.setattr(parallel_fetch, "fetch_nasa_firms_data", lambda: "nasa")
+    monkeypatch.setattr(parallel_fetch, "fetch_cwfis_data", lambda: "cwfis")
+    monkeypatch.setattr(parallel_fetch, "get_interpolated_weather", lambda lat, lon: {"current": {}})
+    monkeypatch.setattr(parallel_fetch, "fetch_nearby_iot_data", lambda lat, lon, location: {"sensor_id": "SENSOR_001"})
+    monkeypatch.setattr(parallel_fetch, "fetch_vegetation_data", lambda lat, lon: {"has_forest": True})
+    return monkeypatch
+
+def test_fetch_all_sources_runs_in_parallel(fake_sources):
+    def slow(*args):
+        time.sleep(0.3)
+        return "slow"
+    fake_sources.setattr(parallel_fetch, "fetch_nasa_firms_data", slow)
+    fake_sources.setattr(parallel_fetch, "fetch_cwfis_data", slow)
+    start = time.perf_counter()
+    sources = fetch_all_sources(43.65, -79.38, "Toronto", deadline=5)
+    assert time.perf_counter() - start < 0.55
+    assert sources["nasa"] == "slow" and sources["cwfis"] == "slow"
+    assert sources["iot"] == {"sensor_id": "SENSOR_001"}
+
+def test_fetch_all_sources_drops_late_sources(fake_sources):
+    fake_sources.setattr(parallel_fetch, "fetch_cwfis_data", lambda: time.sleep(1) or "late")
+    sources = fetch_all_sources(deadline=0.2)
+    assert sources["cwfis"] is None
+    assert sources["nasa"] == "nasa"
+
+def test_feed_cache_shares_one_download():
+    from concurrent.futures import ThreadPoolExecutor
+    from feed_cache import FeedCache
+    cache = FeedCache()
+    calls = []
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return "feed"
+    with ThreadPoolExecutor(4) as pool:
+        values = list(pool.map(lambda _: cache.get("firms", loader, ttl=60), range(4)))
+    assert values == ["feed"] * 4
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+def test_weather_batch_rejects_responses_of_the_wrong_length(monkeypatch):
+    import numpy as np
+    import fetch_live_data
+    class Response:
+        def __init__(self, data):
+            self.data = data
+        def json(self):
+            return self.data
+    replies = iter([[{"current": {"temperature_2m": 1.0}}],
+                    [{"current": {"temperature_2m": 3.0}}, {"current": {"temperature_2m": 4.0}}]])
+    monkeypatch.setattr(fetch_live_data, "http_get", lambda url, timeout: Response(next(replies)))
+    df = fetch_live_data.fetch_weather_batch([44, 45, 46, 47], [-79, -79, -79, -79], batch_size=2)
+    assert np.isnan(df["temperature_2m"][:2]).all()
+    assert list(df["temperature_2m"][2:]) == [3.0, 4.0]
+
+def test_parse_firms_prunes_columns_and_filters_bbox():
+    import io, types
+    from fetch_live_data import _parse_firms
+    body = (b"latitude,longitude,brightness,scan,acq_date,acq_time,satellite,confidence,frp,daynight\n"
+            b"45.5,-80.1,310.2,1.0,2026-10-17,1230,T,80,12.5,D\n"
+            b"49.0,-120.0,305.0,1.0,2026-10-17,1300,A,60,8.0,D\n")
+    df = _parse_firms(types.SimpleNamespace(raw=io.BytesIO(body)))
+    assert len(df) == 1
+    assert "scan" not in df.columns
+    assert str(df["latitude"].dtype) == "float32"
+    assert str(df["satellite"].dtype) == "category"
+
+def test_firms_fetch_through_replay_server_revalidates(monkeypatch):
+    import feed_archive
+    import feed_cache
+    import fetch_live_data
+    from feed_cache import clear_feed_cache
+    from replay_server import ReplayConfig, start_replay_server
+    server = start_replay_server(ReplayConfig(hotspots=500, seed=1))
+    try:
+        monkeypatch.setattr(feed_archive, "ARCHIVE_ENABLED", False)
+        monkeypatch.setattr(feed_cache.feed_cache, "store", None)
+        monkeypatch.setattr(fetch_live_data, "FIRMS_URL", server.endpoints()["firms"])
+        clear_feed_cache()
+        first = fetch_live_data.fetch_nasa_firms_data()
+        clear_feed_cache()
+        second = fetch_live_data.fetch_nasa_firms_data()
+        assert 0 < len(first) < 500
+        assert second.equals(first)
+        assert server.requests_served == 2
+        assert server.not_modified == 1  # second call revalidated with a 304
+    finally:
+        clear_feed_cache()
+        server.shutdown()
+
+def test_replay_weather_answers_every_requested_coordinate(monkeypatch, tmp_path):
+    import json
+    import numpy as np
+    import fetch_live_data
+    from replay_server import ReplayConfig, start_replay_server
+    (tmp_path / "weather.json").write_text(json.dumps({"latitude": 43.65, "longitude": -79.38, "current": {
+        "temperature_2m": 21.5, "relative_humidity_2m": 55, "wind_speed_10m": 12, "precipitation": 0.0}}))
+    for fixtures in (str(tmp_path), None):
+        server = start_replay_server(ReplayConfig(fixtures_dir=fixtures))
+        try:
+            monkeypatch.setattr(fetch_live_data, "WEATHER_URL", server.endpoints()["weather"])
+            weather = fetch_live_data.fetch_weather_batch([44.0, 46.0, 48.0], [-80.0, -81.0, -82.0])
+        finally:
+            server.shutdown()
+        assert not np.isnan(weather[fetch_live_data.WEATHER_FIELDS].to_numpy()).any()
+        if fixtures:
+            assert list(weather["temperature_2m"]) == [21.5] * 3
+
+def test_replay_endpoints_never_share_cache_keys_with_production(monkeypatch, private_disk_cache):
+    import feed_archive
+    import fetch_live_data
+    from replay_server import ReplayConfig, start_replay_server
+    store = private_disk_cache
+    monkeypatch.setattr(feed_archive, "ARCHIVE_ENABLED", False)
+    production = fetch_live_data.endpoint_key()
+    store.set(("firms", production[0]), "production hotspots", 300)
+    store.set(("monitor", "Toronto"), "published result", 300)
+    server = start_replay_server(ReplayConfig(hotspots=200, seed=2))
+    try:
+        fetch_live_data.configure_endpoints(**server.endpoints())
+        replayed = fetch_live_data.fetch_nasa_firms_data()
+        assert len(replayed) > 0
+        assert store.get(("firms", server.endpoints()["firms"])) is not None
+        fetch_live_data.configure_endpoints(*production)
+        # Switching endpoints dropped only the replayed feed
+        assert store.get(("firms", server.endpoints()["firms"])) is None
+        assert store.get(("firms", production[0]))[0] == "production hotspots"
+        assert store.get(("monitor", "Toronto"))[0] == "published result"
+    finally:
+        fetch_live_data.configure_endpoints(*production)
+        server.shutdown()
+
+def test_cold_benchmark_downloads_every_cycle_into_a_throwaway_cache(monkeypatch, private_disk_cache, tmp_path):
+    import feed_archive
+    from replay_server import ReplayConfig, start_replay_server, run_benchmark
+    shared_archive = tmp_path / "shared-archive"
+    monkeypatch.setattr(feed_archive, "ARCHIVE_DIR", str(shared_archive))
+    shared_path = private_disk_cache.path
+    server = start_replay_server(ReplayConfig(hotspots=100, seed=3))
+    try:
+        run_benchmark(server, cycles=2, cold=True)
+    finally:
+        server.shutdown()
+    assert server.not_modified == 0          # no 304s: validators were reset too
+    assert private_disk_cache.path == shared_path
+    assert private_disk_cache.get(("firms", server.endpoints()["firms"])) is None
+    # Synthetic hotspots never reach the shared archive either
+    assert feed_archive.ARCHIVE_DIR == str(shared_archive) and not shared_archive.exists()
+
+def test_stale_snapshot_served_while_circuit_is_open():
+    from feed_cache import FeedCache
+    from source_guard import CircuitBreaker
+    cache = FeedCache()
+    breaker = CircuitBreaker("firms", failure_threshold=1, cooldown=60)
+    assert cache.get_swr("firms", lambda: "v1", ttl=0, max_stale=0, breaker=breaker) == ("v1", 0.0, False)
+    def failing():
+        raise ConnectionError("upstream down")
+    value, age, stale = cache.get_swr("firms", failing, ttl=0, max_stale=0, breaker=breaker)
+    assert (value, stale) == ("v1", True)
+    assert breaker.state == "open"
+    calls = []
+    value, _, stale = cache.get_swr("firms", lambda: calls.append(1), ttl=0, max_stale=0, breaker=breaker)
+    assert (value, stale, calls) == ("v1", True, [])
+
+def test_disk_cache_shares_feeds_between_caches(tmp_path):
+    from disk_cache import DiskCache
+    from feed_cache import FeedCache
+    store = DiskCache(str(tmp_path / "cache.sqlite3"))
+    FeedCache(store=store).get("cwfis", lambda: "fires", ttl=60)
+    calls = []
+    other_process = FeedCache(store=DiskCache(store.path))
+    assert other_process.get("cwfis", lambda: calls.append(1), ttl=60) == "fires"
+    assert calls == []
+
+def test_disk_cache_opens_lazily_and_reopens(tmp_path):
+    from disk_cache import DiskCache
+    path = tmp_path / "sub" / "cache.sqlite3"
+    store = DiskCache(str(path))
+    assert not path.parent.exists()          # constructing touches nothing
+    store.set("k", 1, ttl=60)
+    assert path.exists() and store.get("k")[0] == 1
+    store.reopen(str(tmp_path / "other.sqlite3"))
+    assert store.get("k") is None
+
+def test_snapshot_tracker_emits_only_changes():
+    import pandas as pd
+    from feed_diff import SnapshotTracker
+    tracker = SnapshotTracker()
+    first = pd.DataFrame({"agency": ["on", "on", "on"], "firename": ["A", "B", "C"],
+                          "hectares": [1.0, 2.0, 3.0]})
+    assert len(tracker.update("cwfis", first).added) == 3
+    second = pd.DataFrame({"agency": ["on", "on", "on"], "firename": ["B", "C", "D"],
+                           "hectares": [2.0, 9.0, 4.0]})
+    delta = tracker.update("cwfis", second)
+    assert list(delta.added["firename"]) == ["D"]
+    assert list(delta.removed["firename"]) == ["A"]
+    assert list(delta.updated["firename"]) == ["C"]
+    assert tracker.update("cwfis", second.copy()).is_empty
+
+def test_detect_fire_batch_votes_per_location():
+    import numpy as np
+    import pandas as pd
+    from batch_detection import detect_fire_batch
+    sites = pd.DataFrame({"name": ["hot", "mild"], "lat": [43.65, 48.38], "lon": [-79.38, -89.25]})
+    inputs = {
+        "nasa": pd.DataFrame({"latitude": [43.7], "longitude": [-79.4]}),
+        "cwfis": None,
+        "weather": pd.DataFrame({"temperature_2m": [35.0, 20.0], "relative_humidity_2m": [20.0, 60.0]}),
+        "iot": {"temperature": np.array([20.0, 20.0]), "smoke_level": np.array([10.0, 10.0]),
+                "flame_detected": np.array([False, False])},
+    }
+    table = detect_fire_batch(sites, inputs)
+    # The hotspot is next to Toronto and ~1000 km from Thunder Bay
+    assert list(table["nearby_hotspots"]) == [1, 0]
+    assert list(table["fire_votes"]) == [2, 0]
+    assert list(table["fire_detected"]) == [True, False]
+    assert list(table["vegetation_risk"]) == ["VERY_HIGH", "HIGH"]
+
+def test_point_index_matches_brute_force():
+    import numpy as np
+    from hotspot_index import PointIndex, haversine_km
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(42, 56, 300), rng.uniform(-94, -75, 300)
+    index = PointIndex(lats, lons)
+    counts = index.count_within([46.0, 50.0], [-80.0, -88.0], 150)
+    nearest, dist = index.nearest([46.0], [-80.0], k=2)
+    brute = haversine_km(np.full(300, 46.0), np.full(300, -80.0), lats, lons)
+    assert counts[0] == (brute <= 150).sum()
+    assert list(nearest[0]) == list(np.argsort(brute)[:2])
+    assert np.allclose(dist[0], np.sort(brute)[:2])
+
+def test_monitor_reevaluates_only_affected_locations(monkeypatch):
+    import numpy as np
+    import pandas as pd
+    import monitor_service
+    from monitor_service import MonitorService, ResultStore
+    hotspots = [pd.DataFrame({"latitude": [43.7], "longitude": [-79.4]})]
+    monkeypatch.setattr(monitor_service, "fetch_nasa_firms_data", lambda: hotspots[0])
+    monkeypatch.setattr(monitor_service, "fetch_cwfis_data", lambda: None)
+    monkeypatch.setattr(monitor_service.weather_field, "sample", lambda lats, lons: pd.DataFrame(
+        {f: np.full(len(lats), 20.0) for f in monitor_service.WEATHER_FIELDS}))
+    flames = [np.zeros(4, dtype=bool)]
+    monkeypatch.setattr(monitor_service, "nearby_sensor_readings", lambda lats, lons: {
+        "temperature": np.full(len(lats), 20.0), "smoke_level": np.full(len(lats), 10.0),
+        "flame_detected": flames[0].copy()})
+    service = MonitorService(results=ResultStore(), intervals={"nasa": 10, "cwfis": 10, "weather": 10, "iot": 10})
+    assert len(service.run_once(now=0)) == 4
+    assert service.evaluations == 4
+    # Nothing changed: no refresh is due and nothing is re-evaluated
+    assert service.run_once(now=5) == [] and service.evaluations == 4
+    # A new hotspot near Thunder Bay only re-evaluates Thunder Bay
+    hotspots[0] = pd.DataFrame({"latitude": [43.7, 48.4], "longitude": [-79.4, -89.3]})
+    service.run_once(now=10)
+    assert service.evaluations == 5
+    assert service.results.get("Thunder Bay")["nearby_hotspots"] == 1
+    # Fire events and fused hotspots are published alongside the results
+    assert len(service.results.get(monitor_service.FIRE_EVENTS_KEY)) == 2
+    assert list(service.results.get(monitor_service.FUSED_HOTSPOTS_KEY)["status"]) == ["new", "new"]
+    # Unchanged sensor readings dirty nothing; a flame at Ottawa re-evaluates Ottawa only
+    service.run_once(now=20)
+    assert service.evaluations == 5
+    flames[0][1] = True
+    service.run_once(now=30)
+    assert service.evaluations == 6 and service.results.get("Ottawa")["iot_vote"]
+
+def test_fire_tracker_keeps_ids_and_merges_bridged_fires():
+    import pandas as pd
+    from fire_events import FireTracker, cluster_hotspots
+    west = pd.DataFrame({"latitude": [50.0, 50.01], "longitude": [-85.0, -85.0]})
+    east = pd.DataFrame({"latitude": [50.04, 50.05], "longitude": [-85.0, -85.0]})
+    assert list(cluster_hotspots(pd.concat([west, east]))) == [0, 0, 1, 1]
+    tracker = FireTracker()
+    first = tracker.add_hotspots(west, now="2026-07-01 00:00")[0]
+    second = tracker.add_hotspots(east, now="2026-07-01 06:00")[0]
+    assert (first.event_id, second.event_id) == (1, 2)
+    # A hotspot between the two fires joins them under the older ID
+    bridge = pd.DataFrame({"latitude": [50.025], "longitude": [-85.0]})
+    merged = tracker.add_hotspots(bridge, now="2026-07-01 12:00")
+    assert [e.event_id for e in merged] == [1] and merged[0].hotspots == 5
+    assert tracker.events[2].merged_into == 1
+    assert [h[1] for h in tracker.events[1].history] == [2, 5]
+    assert tracker.add_hotspots(None, now="2026-07-05") == [] and len(tracker) == 0
+    # Retired fires leave the tracker; a summary is kept
+    assert tracker.events == {} and list(tracker.events_frame(include_inactive=True)["event_id"]) == [1]
+    # A month of short-lived fires: memory follows the live fires, not history
+    import numpy as np
+    rng = np.random.default_rng(0)
+    for hour in range(0, 30 * 24, 6):
+        batch = pd.DataFrame({"latitude": rng.uniform(45, 55, 200), "longitude": rng.uniform(-95, -75, 200)})
+        tracker.add_hotspots(batch, now=pd.Timestamp("2026-08-01") + pd.Timedelta(hours=hour))
+    assert len(tracker.events) < 2000 and tracker.stored_points < 4 * 200 * 9
+    live = tracker.events_frame()
+    assert live["hotspots"].sum() == sum(e.hotspots for e in tracker.events.values())
+    # Areas grown hull by hull match the hull of every hotspot of the fire
+    from fire_events import fire_area_ha
+    grower = FireTracker()
+    blob = pd.DataFrame({"latitude": rng.uniform(50, 50.03, 60), "longitude": rng.uniform(-85, -84.955, 60)})
+    for part in range(0, 60, 10):
+        fire, = grower.add_hotspots(blob.iloc[:part + 10].iloc[-10:], now="2026-09-01")
+        seen = blob.iloc[:part + 10]
+        assert fire.area_ha == fire_area_ha(seen["latitude"].to_numpy(), seen["longitude"].to_numpy())
+    assert fire.area_ha > fire.hotspots * 14.0          # the hull, not the pixel footprint
+
+def test_fuse_hotspots_labels_confirmed_new_and_stale():
+    import pandas as pd
+    from fire_fusion import fuse_hotspots, fusion_counts
+    firms = pd.DataFrame({"latitude": [50.0, 50.0, 45.0, 47.0], "longitude": [-85.0, -85.0, -80.0, -82.0],
+                          "acq_date": ["2026-07-02", "2026-06-01", "2026-07-02", "2026-07-02"],
+                          "acq_time": [100, 100, 1200, 1300]})
+    cwfis = pd.DataFrame({"firename": ["A", "B"], "lat": [50.05, 45.0], "lon": [-85.0, -80.0],
+                          "startdate": ["2026-07-01", "2026-07-01"], "stage_of_control": ["OC", "OUT"]})
+    fused = fuse_hotspots(firms, cwfis)
+    # Near A and recent; too old; only near a fire that is out; nowhere near a report
+    assert list(fused["status"]) == ["confirmed", "stale", "stale", "new"]
+    assert fused["fire"].iloc[0] == "A"
+    assert fusion_counts(fused) == {"confirmed": 1, "new": 1, "stale": 2}
+    # A nearer fire that is out does not steal the match from the active one
+    cwfis = pd.DataFrame({"firename": ["OLD_OUT", "ACTIVE"], "lat": [50.02, 50.06], "lon": [-85.0, -85.0],
+                          "startdate": ["2026-07-01", "2026-07-01"], "stage_of_control": ["OUT", "OC"]})
+    fused = fuse_hotspots(firms.iloc[:1], cwfis)
+    assert fused["status"].iloc[0] == "confirmed" and fused["fire"].iloc[0] == "ACTIVE"
+    assert 6 < fused["distance_km"].iloc[0] < 7
+
+def test_risk_grid_scores_every_cell_in_one_pass():
+    import numpy as np
+    import pandas as pd
+    from risk_grid import RiskGrid, compute_risk_level
+    from fetch_live_data import WEATHER_FIELDS
+    grid = RiskGrid(bbox=(49, 51, -86, -84), step=0.5)
+    cells = len(grid.lat_nodes) * len(grid.lon_nodes)
+    weather = pd.DataFrame({f: np.full(cells, 35.0 if f == "temperature_2m" else 10.0) for f in WEATHER_FIELDS})
+    raster = grid.compute({"nasa": pd.DataFrame({"latitude": [50.0], "longitude": [-85.0]}),
+                           "cwfis": None, "weather": weather})
+    assert raster.shape == (5, 5) and raster.layers["fire_detected"].sum() > 0
+    near, far = raster.sample([50.0, 30.0], [-85.0, -85.0]).to_dict("records")
+    assert near["fire_detected"] and near["risk_label"] == compute_risk_level(
+        {"current": {"wind_speed_10m": 10.0, "relative_humidity_2m": 10.0}}, "HIGH", "UNKNOWN")
+    assert far["risk_level"] == -1 and far["risk_label"] is None
+
+def test_risk_grid_serves_stale_raster_while_recomputing(private_disk_cache):
+    import threading
+    from risk_grid import RiskGrid
+    grid = RiskGrid(bbox=(49, 50, -86, -85), step=0.5, ttl=60, store=private_disk_cache)
+    release, built = threading.Event(), []
+
+    def compute():
+        if built:
+            release.wait(5)
+        built.append(f"raster-{len(built)}")
+        return built[-1]
+    grid.compute = compute
+    assert grid.current() == "raster-0"         # cold: computed in the caller
+    assert grid.current() == "raster-0" and len(built) == 1
+    grid._computed -= 120                       # expired, and gone from disk
+    private_disk_cache.delete(grid._store_key)
+    assert grid.current() == "raster-0"         # served while the recompute waits
+    assert grid.current() == "raster-0" and grid._computing
+    release.set()
+    for _ in range(100):
+        if not grid._computing:
+            break
+        threading.Event().wait(0.05)
+    assert built == ["raster-0", "raster-1"] and grid.current() == "raster-1"
+    # A broken store does not break invalidation
+    class Broken:
+        def delete(self, key):
+            raise OSError("disk gone")
+    grid.store = Broken()
+    grid.invalidate()
+    assert grid._raster is None
+
+def test_weather_field_interpolates_and_falls_back_to_fetches(monkeypatch):
+    import numpy as np
+    import pandas as pd
+    import weather_field
+    from fetch_live_data import WEATHER_FIELDS
+    fetched = []
+    def batch(lats, lons, temperature=lambda lat, lon: 10 + 2 * lat - lon):
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        fetched.append(len(lats))
+        return pd.DataFrame({f: temperature(lats, lons) if f == "temperature_2m" else np.full(len(lats), 5.0)
+                             for f in WEATHER_FIELDS})
+    monkeypatch.setattr(weather_field, "fetch_weather_batch", batch)
+    field = weather_field.WeatherField(bbox=(44, 46, -80, -78), step=0.5, store=None)
+    assert field.refresh() and fetched == [25]
+
+    # Bilinear interpolation is exact on a linear field; points off the grid are fetched
+    sampled = field.sample([44.3, 45.8, 30.0], [-79.1, -78.2, -79.0])
+    assert np.allclose(sampled["temperature_2m"], 10 + 2 * np.array([44.3, 45.8, 30.0]) + [79.1, 78.2, 79.0])
+    assert list(sampled["source"]) == ["interpolated", "interpolated", "fetched"] and fetched[-1] == 1
+
+    # A refresh that comes back mostly empty keeps the good grid
+    monkeypatch.setattr(weather_field, "fetch_weather_batch",
+                        lambda lats, lons: batch(lats, lons, temperature=lambda lat, lon: lat * np.nan))
+    assert not field.refresh()
+    assert field.interpolate([45.0], [-79.0])[1].all()
+
+    # Past max_stale the grid is ignored and every point is fetched directly
+    monkeypatch.setattr(weather_field, "fetch_weather_batch", batch)
+    field._loaded_at -= field.ttl + field.max_stale
+    field.refresh_async = lambda: None
+    assert list(field.sample([45.0], [-79.0])["source"]) == ["fetched"]
+
+    # A cold grid asked for many points downloads the grid once instead of fetching each point
+    fetched.clear()
+    cold = weather_field.WeatherField(bbox=(44, 46, -80, -78), step=0.5, store=None)
+    lats = np.r_[np.linspace(44.1, 45.9, 60), 30.0, 31.0]
+    sampled = cold.sample(lats, np.full(62, -79.0))
+    assert fetched == [25, 2]                  # grid nodes, then the two points outside it
+    assert (sampled["source"] == "interpolated").sum() == 60
+    # If that download fails, covered points stay NaN rather than fanning out
+    monkeypatch.setattr(weather_field, "fetch_weather_batch",
+                        lambda lats, lons: batch(lats, lons, temperature=lambda lat, lon: lat * np.nan))
+    failed = weather_field.WeatherField(bbox=(44, 46, -80, -78), step=0.5, store=None)
+    assert set(failed.sample(lats[:60], np.full(60, -79.0))["source"]) == {"missing"}
+
+def test_feed_archive_dedups_filters_and_compacts(tmp_path):
+    import os
+    import pandas as pd
+    from feed_archive import append_snapshot, compact_partition, read_archive
+    day1, day2 = pd.Timestamp("2026-10-15 12:00").value // 10**9, pd.Timestamp("2026-10-16 12:00").value // 10**9
+    firms = pd.DataFrame({"latitude": [45.0, 50.0, 45.5], "longitude": [-79.0, -85.0, -79.5],
+                          "acq_ts": [day1, day1, day2], "satellite": ["N", "N", "N"]})
+    assert append_snapshot("firms", firms, root=str(tmp_path)) == 3
+    assert append_snapshot("firms", firms, root=str(tmp_path)) == 0
+    later = pd.DataFrame({"latitude": [46.0], "longitude": [-80.0], "acq_ts": [day1], "satellite": ["N"]})
+    assert append_snapshot("firms", pd.concat([firms, later]), root=str(tmp_path)) == 1
+
+    assert len(read_archive("firms", root=str(tmp_path))) == 4
+    assert len(read_archive("firms", start="2026-10-16", root=str(tmp_path))) == 1
+    assert len(read_archive("firms", end="2026-10-15", root=str(tmp_path))) == 3
+    in_box = read_archive("firms", bbox=(44, 47, -81, -78), root=str(tmp_path))
+    assert sorted(in_box["latitude"]) == [45.0, 45.5, 46.0]
+
+    partition = tmp_path / "source=firms" / "date=2026-10-15"
+    parts = lambda: sorted(n for n in os.listdir(partition) if n.endswith(".parquet"))
+    assert len(parts()) == 2
+    compact_partition("firms", "2026-10-15", root=str(tmp_path))
+    assert parts() == ["part-compacted.parquet"]
+    assert len(read_archive("firms", end="2026-10-15", root=str(tmp_path))) == 3
+    assert append_snapshot("firms", firms, root=str(tmp_path)) == 0
+
+    # Records another process archived meanwhile are not written again here
+    import subprocess, sys
+    today = int(time.time())
+    mine = pd.DataFrame({"latitude": [47.5], "longitude": [-81.0], "acq_ts": [today], "satellite": ["N"]})
+    assert append_snapshot("firms", mine, root=str(tmp_path)) == 1
+    other = pd.DataFrame({"latitude": [47.0], "longitude": [-81.0], "acq_ts": [today], "satellite": ["N"]})
+    other.to_parquet(tmp_path / "other.parquet")
+    subprocess.run([sys.executable, "-c", "import sys, pandas as pd, feed_archive; "
+                    "sys.exit(feed_archive.append_snapshot('firms', pd.read_parquet(sys.argv[1]), root=sys.argv[2]) != 1)",
+                    str(tmp_path / "other.parquet"), str(tmp_path)], check=True, cwd=os.path.dirname(__file__))
+    assert append_snapshot("firms", pd.concat([firms, mine, other]), root=str(tmp_path)) == 0
+    assert len(read_archive("firms", root=str(tmp_path))) == 6
+
+def test_batch_runner_resumes_from_checkpoint(tmp_path):
+    import numpy as np
+    import pandas as pd
+    from batch_runner import run_batch
+    from fetch_live_data import WEATHER_FIELDS
+    sites = pd.DataFrame({"name": ["a", "b", "c", "d", "e"], "lat": [43.65, 45.42, 48.38, 46.49, 50.0],
+                          "lon": [-79.38, -75.70, -89.25, -84.35, -85.0]})
+    sites.to_csv(tmp_path / "sites.csv", index=False)
+    inputs = {"nasa": pd.DataFrame({"latitude": [50.0], "longitude": [-85.0]}), "cwfis": None,
+              "weather": pd.DataFrame({f: np.full(5, 20.0) for f in WEATHER_FIELDS}), "iot": None}
+    out = str(tmp_path / "out")
+    first = run_batch(str(tmp_path / "sites.csv"), out, workers=2, shard_size=2, max_shards=2, inputs=inputs)
+    assert sorted(first["completed"]) == ["0", "1"]
+    written = (tmp_path / "out" / "part-00000.parquet").stat().st_mtime_ns
+    run_batch(str(tmp_path / "sites.csv"), out, workers=2, shard_size=2, inputs=inputs)
+    # Finished shards are not redone; the sweep covers every site once
+    assert (tmp_path / "out" / "part-00000.parquet").stat().st_mtime_ns == written
+    result = pd.read_parquet(out).sort_values("site_id")
+    assert list(result["name"]) == ["a", "b", "c", "d", "e"]
+    assert list(result["satellite_vote"]) == [False, False, False, False, True]
+
+def test_compact_hotspots_fold_timestamps_and_categories():
+    import numpy as np
+    from hotspots import compact_hotspots, hotspot_frame, acquired_at
+    records = [{"latitude": 50.0, "longitude": -85.0, "acq_date": "2026-07-02", "acq_time": 130,
+                "satellite": "N", "confidence": "h", "frp": 3.5},
+               {"latitude": 50.1, "longitude": -85.1, "acq_date": "2026-07-02", "acq_time": 2359,
+                "satellite": "N", "confidence": "n", "frp": 1.0}]
+    compact = hotspot_frame(records)
+    assert "acq_date" not in compact.columns and compact["acq_ts"].dtype == np.uint32
+    assert compact["latitude"].dtype == np.float32
+    assert str(compact["confidence"].dtype) == "category"
+    assert str(acquired_at(compact)[0]) == "2026-07-02T01:30:00.000000000"
+    assert compact_hotspots(compact) is compact
+
+def test_detect_fire_returns_typed_result_and_logs_lazily(fake_sources, caplog):
+    import logging
+    import os
+    import fire_detection_logic
+    from detection_result import DetectionResult
+    fake_sources.setattr(fire_detection_logic, "fetch_all_sources", lambda lat, lon, name: {
+        "nasa": None, "cwfis": None, "vegetation": None,
+        "weather": {"current": {"temperature_2m": 35, "relative_humidity_2m": 20}},
+        "iot": {"temperature": 40, "smoke_level": 80, "flame_detected": True}})
+    logger = logging.getLogger("ecoflare")
+    logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.INFO, logger="ecoflare"):
+            result = fire_detection_logic.detect_fire(45.0, -80.0, "Test")
+            fake_sources.syspath_prepend(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+            from utils.helpers import log_message
+            log_message("helper %s", "WARNING", "line")
+            log_message("helper error", "ERROR")            # baseline positional level
+            log_message("helper detail", level="DEBUG")
+    finally:
+        logger.removeHandler(caplog.handler)
+    assert isinstance(result, DetectionResult)
+    assert result.fire_detected and result["confidence"] == "2/4"
+    assert result.to_dict()["coordinates"] == (45.0, -80.0)
+    # Per-vote detail is DEBUG only; the summary line is INFO
+    assert not any(r.levelno == logging.DEBUG for r in caplog.records)
+    assert any("Test" in r.getMessage() for r in caplog.records)
+    helper = [(r.levelname, r.getMessage()) for r in caplog.records if r.name == "ecoflare.utils"]
+    assert helper == [("WARNING", "helper line"), ("ERROR", "helper error")]
+
+def test_sensor_store_windows_are_views_of_a_bounded_ring():
+    import numpy as np
+    from sensor_store import SensorStore
+    store = SensorStore(capacity=4)
+    for t in range(6):
+        store.record({"sensor_id": "S1", "timestamp": 100.0 + t, "temperature": 20 + t,
+                      "smoke_level": 5, "humidity": 40, "air_quality_index": 30, "flame_detected": t == 5})
+    window = store.window("S1")
+    assert list(window["temperature"]) == [22, 23, 24, 25]   # oldest two dropped
+    assert np.shares_memory(window["temperature"], store._buffers["S1"].values)
+    assert list(store.window("S1", seconds=1.5)["timestamp"]) == [104.0, 105.0]
+    assert store.latest("S1")["flame_detected"] is True
+    store.extend("S1", [106.0, 107.0, 108.0], np.full((5, 3), 1.0))
+    assert list(store.window("S1", n=2)["timestamp"]) == [107.0, 108.0]
+    assert len(store.window("nope")["temperature"]) == 0
+    # Simulated readings never reach the shared store
+    from iot_data import fetch_iot_sensor_data
+    from sensor_store import sensor_store
+    fetch_iot_sensor_data("SIMULATED_ONLY")
+    assert "SIMULATED_ONLY" not in sensor_store
+
+def test_iot_risk_batch_matches_scalar_rules():
+    import numpy as np
+    from iot_data import analyze_iot_risk, iot_risk_scores, iot_risk_codes, IOT_RISK_LEVELS, simulate_iot_batch
+    from sensor_store import SensorStore
+    fleet = simulate_iot_batch(2000, np.random.default_rng(3))
+    codes = iot_risk_codes(iot_risk_scores(fleet))
+    expected = [analyze_iot_risk({k: v[i] for k, v in fleet.items()}) for i in range(2000)]
+    assert [IOT_RISK_LEVELS[c] for c in codes] == expected
+    # A sensor_store window scores the same way, one score per reading
+    store = SensorStore(capacity=8)
+    store.extend("S1", np.arange(3.0), [[35, 20, 35], [60, 10, 10], [40, 40, 40], [50, 50, 50], [0, 0, 1]])
+    assert list(iot_risk_scores(store.window("S1"))) == [70, 0, 60]
+
+def test_ingest_server_accepts_text_and_binary_readings():
+    import numpy as np
+    from sensor_store import SensorStore
+    from iot_ingest import start_ingest_server, send_readings, simulated_readings, encode_binary
+    store = SensorStore(capacity=1000)
+    server = start_ingest_server(store)
+    try:
+        readings = simulated_readings(500, sensors=5, rng=np.random.default_rng(0))
+        send_readings(readings, port=server.tcp_port)
+        send_readings(readings, port=server.tcp_port, binary=True)
+        import socket
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"SENSOR_900,,31.5,60,20,90,1\nnot,a,reading\n", ("127.0.0.1", server.udp_port))
+            extra = {k: v[:3].copy() for k, v in readings.items()}
+            extra["sensor_id"][:] = "SENSOR_901"
+            sock.sendto(encode_binary(extra), ("127.0.0.1", server.udp_port))
+        deadline = time.time() + 5
+        while server.stats.written < 1004 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.shutdown()
+    assert server.stats.written == 1004 and server.stats.malformed == 1
+    assert server.stats.received == 1005
+    first = readings["sensor_id"][0]
+    mine = readings["sensor_id"] == first
+    window = store.window(first)
+    assert len(window["temperature"]) == 2 * mine.sum()
+    assert np.all(np.diff(window["timestamp"][:mine.sum()]) >= 0)   # time-ordered per sensor
+    assert store.latest("SENSOR_900")["flame_detected"] is True
+
+def test_ingest_decoders_reject_rather_than_repair_bad_readings():
+    import numpy as np
+    from iot_ingest import decode_lines, decode_payload, encode_binary, simulated_readings
+    lines = [b"SENSOR_1,,31.5,60,20,90,1",                      # empty timestamp means "now"
+             b"SENSOR_2,1,,60,20,90,1",                          # empty sensor field
+             b"SENSOR_WITH_A_VERY_LONG_ID,1,31,60,20,90,1",       # would not fit in 16 bytes
+             "CAPTEUR_\u00c9,1,31,60,20,90,1".encode(), b"\xff\xfe,1,31,60,20,90,1",
+             b"not,a,reading"]
+    for copies in (1, 10):        # the line-by-line and the pandas decoder
+        records, rejected = decode_lines(b"\n".join(lines * copies) + b"\n")
+        assert list(records["sensor_id"]) == [b"SENSOR_1"] * copies and rejected == 5 * copies
+        assert np.isnan(records["timestamp"]).all()
+    readings = simulated_readings(3, rng=np.random.default_rng(1))
+    readings["temperature"][1] = np.nan
+    records, rejected = decode_payload(encode_binary(readings) + b"\x00")
+    assert len(records) == 2 and rejected == 2            # NaN field + truncated trailing record
+
+def test_sensor_stats_flag_sudden_smoke_rise_against_baseline():
+    import numpy as np
+    from sensor_stats import StatsTracker, STATS_FIELDS
+    tracker = StatsTracker()
+    rng = np.random.default_rng(0)
+    t = np.arange(100.0)
+    baseline = np.stack([20 + rng.normal(0, 0.2, 100), 10 + rng.normal(0, 0.5, 100), 40 + rng.normal(0, 1, 100)])
+    assert tracker.update_many("S1", t, baseline) == 0
+    stats = tracker.get("S1")
+    assert abs(stats.fields[1].mean - 10) < 1 and stats.fields[1].rolling_max < 12
+    assert tracker.update("S1", 100.0, [20.1, 30.0, 40.0])       # smoke jumps 20 units in 1 s
+    assert stats.anomaly_fields == ["smoke_level"] and stats.fields[1].rolling_max == 30.0
+    assert tracker.update("S1", 101.0, [20.1, 30.5, 40.0])       # still far above its baseline
+    assert stats.fields[1].rate < 1 and tracker.anomalous_sensors() == ["S1"]
+    assert list(tracker.frame()["sensor_id"]) == ["S1"] and len(STATS_FIELDS) == 3
+
+def test_sensor_registry_finds_nearby_active_sensors():
+    import numpy as np
+    import pandas as pd
+    from sensor_registry import SensorRegistry, fetch_nearby_iot_data
+    rng = np.random.default_rng(0)
+    n = 5000
+    registry = SensorRegistry(pd.DataFrame({"sensor_id": [f"S{i}" for i in range(n)],
+                                            "lat": rng.uniform(42, 50, n), "lon": rng.uniform(-90, -75, n)}))
+    lats, lons = rng.uniform(42, 50, 200), rng.uniform(-90, -75, 200)
+    ids, dist = registry.nearest(lats, lons, k=3, max_km=50)
+    frame = registry.frame()
+    # Same answer as a brute-force scan over every sensor
+    from hotspot_index import haversine_km
+    for q in range(0, 200, 20):
+        d = haversine_km(lats[q], lons[q], frame["lat"].to_numpy(), frame["lon"].to_numpy())
+        expected = [frame["sensor_id"][i] for i in np.argsort(d)[:3] if d[i] <= 50]
+        assert [s for s in ids[q] if s is not None] == expected
+    # Offline sensors drop out of lookups
+    registry.set_status(ids[0][0], "offline")
+    assert ids[0][0] not in registry.nearest(lats[:1], lons[:1], k=3, max_km=50)[0][0]
+    q, found, _ = registry.within(lats, lons, 10)
+    assert len(q) == len(found)
+    # detect_fire's fetch reads the latest fresh readings of sensors in range
+    from sensor_registry import nearby_sensor_readings, SENSOR_MAX_AGE
+    from sensor_store import SensorStore
+    small = SensorRegistry(pd.DataFrame({"sensor_id": ["A", "B", "C", "D"], "lat": [45.0, 45.05, 45.1, 45.0],
+                                         "lon": [-80.0, -80.0, -80.0, -80.1]}))
+    store = SensorStore(capacity=4)
+    now = time.time()
+    for sensor_id, age, smoke in [("A", 0, 10), ("B", 1, 90), ("C", SENSOR_MAX_AGE + 60, 95)]:   # D never reports
+        store.record({"sensor_id": sensor_id, "timestamp": now - age, "temperature": 20, "smoke_level": smoke,
+                      "humidity": 40, "air_quality_index": 30, "flame_detected": False})
+    reading = fetch_nearby_iot_data(45.0, -80.0, "Test", registry=small, store=store, k=4)
+    assert sorted(r["sensor_id"] for r in reading["readings"]) == ["A", "B"]
+    assert reading["sensor_id"] == "B" and reading["smoke_level"] == 90
+    assert fetch_nearby_iot_data(50.0, -90.0, "Far", registry=small, store=store) is None
+    assert fetch_nearby_iot_data(45.0, -80.0, "Empty", registry=SensorRegistry(), store=store) is None
+    columns = nearby_sensor_readings([45.0, 45.1, 50.0], [-80.0, -80.0, -90.0], registry=small, store=store, k=4)
+    assert list(columns["reporting"]) == [True, True, False]
+    assert list(columns["sensor_id"]) == ["B", "B", None] and np.isnan(columns["smoke_level"][2])
+    assert list(columns["smoke_level"][:2]) == [90, 90] and not columns["flame_detected"].any()
+    values, _, known = store.latest_many(["C", "D"])
+    assert list(known) == [True, False] and values[1, 0] == 95 and np.isnan(values[:, 1]).all()
+
+def test_detect_fire_votes_with_an_ingested_sensor_reading(fake_sources):
+    import fire_detection_logic
+    import sensor_registry
+    from sensor_registry import SensorRegistry
+    from iot_ingest import start_ingest_server
+    fake_sources.setattr(parallel_fetch, "fetch_nasa_firms_data", lambda: None)
+    fake_sources.setattr(parallel_fetch, "fetch_cwfis_data", lambda: None)
+    fake_sources.setattr(parallel_fetch, "fetch_vegetation_data", lambda lat, lon: None)
+    fake_sources.setattr(parallel_fetch, "get_interpolated_weather", lambda lat, lon: {
+        "current": {"temperature_2m": 35, "relative_humidity_2m": 20}})
+    fake_sources.setattr(parallel_fetch, "fetch_nearby_iot_data", sensor_registry.fetch_nearby_iot_data)
+    registry = SensorRegistry()
+    registry.register("TEST_INGEST_1", 47.0, -81.0)
+    fake_sources.setattr(sensor_registry, "sensor_registry", registry)
+    assert not fire_detection_logic.detect_fire(47.0, -81.0, "Quiet")["iot_vote"]
+    server = start_ingest_server(udp_port=None)          # feeds the shared sensor_store
+    try:
+        import socket
+        with socket.create_connection(("127.0.0.1", server.tcp_port)) as sock:
+            sock.sendall(b"TEST_INGEST_1,,33.0,85,20,120,0\n")
+        deadline = time.time() + 5
+        while server.stats.written < 1 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.shutdown()
+    result = fire_detection_logic.detect_fire(47.0, -81.0, "Smoky")
+    assert result["iot_vote"] and result.fire_detected
+    assert result["iot_risk"] == "HIGH" and any("TEST_INGEST_1" in e for e in result.evidence)
+
+def test_readings_ingested_by_another_process_vote_here(fake_sources, private_disk_cache):
+    import os, subprocess, sys
+    import fire_detection_logic
+    import sensor_registry
+    import sensor_store
+    from sensor_registry import SensorRegistry
+    fake_sources.setattr(sensor_store, "SENSOR_SYNC_SECONDS", 0)
+    for name in ("fetch_nasa_firms_data", "fetch_cwfis_data", "fetch_vegetation_data"):
+        fake_sources.setattr(parallel_fetch, name, lambda *args: None)
+    fake_sources.setattr(parallel_fetch, "get_interpolated_weather", lambda lat, lon: {
+        "current": {"temperature_2m": 35, "relative_humidity_2m": 20}})
+    fake_sources.setattr(parallel_fetch, "fetch_nearby_iot_data", sensor_registry.fetch_nearby_iot_data)
+    registry = SensorRegistry()
+    registry.register("REMOTE_1", 47.0, -81.0)
+    fake_sources.setattr(sensor_registry, "sensor_registry", registry)
+    assert not fire_detection_logic.detect_fire(47.0, -81.0, "Quiet")["iot_vote"]
+    ingest = (
+        "import socket, time\n"
+        "from iot_ingest import start_ingest_server\n"
+        "server = start_ingest_server(udp_port=None)\n"
+        "with socket.create_connection(('127.0.0.1', server.tcp_port)) as sock:\n"
+        "    sock.sendall(b'REMOTE_1,,33.0,85,20,120,0\\n')\n"
+        "deadline = time.time() + 5\n"
+        "while server.stats.written < 1 and time.time() < deadline:\n"
+        "    time.sleep(0.01)\n"
+        "server.shutdown()\n"
+        "assert server.stats.written == 1\n"
+    )
+    env = dict(os.environ, ECOFLARE_CACHE_PATH=private_disk_cache.path, ECOFLARE_DISK_CACHE="1")
+    subprocess.run([sys.executable, "-c", ingest], cwd=os.path.dirname(os.path.abspath(__file__)),
+                   env=env, check=True, timeout=60)
+    assert "REMOTE_1" not in sensor_store.sensor_store._buffers     # nothing was ingested here
+    result = fire_detection_logic.detect_fire(47.0, -81.0, "Smoky")
+    assert result["iot_vote"] and result["iot_risk"] == "HIGH" and result.fire_detected
+
+def test_anomalous_sensor_votes_the_same_in_every_detector(fake_sources):
+    import fire_detection_logic
+    import sensor_registry
+    from batch_detection import detect_fire_batch
+    from risk_grid import RiskGrid
+    from sensor_registry import SensorRegistry, nearby_sensor_readings
+    from sensor_stats import StatsTracker
+    from sensor_store import SensorStore, SENSOR_FIELDS
+    for name in ("fetch_nasa_firms_data", "fetch_cwfis_data", "get_interpolated_weather", "fetch_vegetation_data"):
+        fake_sources.setattr(parallel_fetch, name, lambda *args: None)
+    fake_sources.setattr(parallel_fetch, "fetch_nearby_iot_data", sensor_registry.fetch_nearby_iot_data)
+    registry = SensorRegistry()
+    registry.register("ANOMALY_1", 47.0, -81.0)
+    store = SensorStore(capacity=64, stats=StatsTracker(SENSOR_FIELDS))
+    fake_sources.setattr(sensor_registry, "sensor_registry", registry)
+    fake_sources.setattr(sensor_registry, "sensor_store", store)
+    now = time.time()
+    for i, smoke in enumerate([10.0] * 40 + [30.0]):         # a sharp rise, still LOW risk
+        store.record({"sensor_id": "ANOMALY_1", "timestamp": now - 40 + i, "temperature": 15,
+                      "smoke_level": smoke, "humidity": 40, "air_quality_index": 30, "flame_detected": False})
+    assert store.stats.is_anomalous("ANOMALY_1")
+    single = fire_detection_logic.detect_fire(47.0, -81.0, "Anomalous")
+    iot = nearby_sensor_readings([47.0], [-81.0])
+    batch = detect_fire_batch([[47.0, -81.0]], {"nasa": None, "cwfis": None, "weather": None, "iot": iot})
+    assert single["iot_risk"] == batch["iot_risk"][0] == "LOW"
+    assert single["iot_vote"] and bool(batch["iot_vote"][0])
+    assert single["fire_votes"] == batch["fire_votes"][0] == 1
+    assert any("smoke_level at ANOMALY_1" in e for e in single.evidence)
+    # The risk grid cell over the sensor casts the same vote
+    import numpy as np
+    import pandas as pd
+    from fetch_live_data import WEATHER_FIELDS
+    grid = RiskGrid(bbox=(46.5, 47.5, -81.5, -80.5), step=0.5)
+    weather = pd.DataFrame({f: np.full(9, 20.0) for f in WEATHER_FIELDS})
+    raster = grid.compute({"nasa": None, "cwfis": None, "weather": weather})
+    assert raster.sample([47.0], [-81.0])["iot_vote"][0]
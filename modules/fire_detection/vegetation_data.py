@@ -3,12 +3,18 @@
 # Purpose: Fetch vegetation data for fire risk assessment
 # ===============================================
 
+import numpy as np
+
+from log_config import get_logger
+
+log = get_logger(__name__)
+
 def fetch_vegetation_data(lat=43.65, lon=-79.38):
     """
     Get vegetation data using geographic fallback for Ontario.
     Returns fire risk based on region.
     """
-    print(f"🌲 Analyzing vegetation for ({lat}, {lon})...")
+    log.debug("🌲 Analyzing vegetation for (%s, %s)...", lat, lon)
     
     # Southern Ontario (below 46° latitude)
     if lat < 46:
@@ -56,6 +62,20 @@ def get_vegetation_fire_risk(vegetation_data):
         return 'LOW'
     return 'MEDIUM'
 
+def get_vegetation_fire_risk_batch(lats, lons):
+    """
+    Vectorized fetch_vegetation_data + get_vegetation_fire_risk for many points.
+    Uses the same geographic regions; returns an array of risk labels.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    south = lats < 46
+    return np.select(
+        [south & (lons > -80), south],
+        ['VERY_HIGH', 'HIGH'],   # East: forest + grassland; West/Central: forest
+        default='HIGH',          # Northern Ontario: boreal forest
+    )
+
 if __name__ == "__main__":
     veg_data = fetch_vegetation_data(43.65, -79.38)
     risk = get_vegetation_fire_risk(veg_data)
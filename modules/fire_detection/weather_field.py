@@ -0,0 +1,260 @@
+# ===============================================
+# File: modules/fire_detection/weather_field.py
+# Purpose: Interpolated weather from a cached coarse grid over Ontario
+# ===============================================
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import fetch_live_data
+from fetch_live_data import (
+    ONTARIO_BBOX, WEATHER_FIELDS, fetch_weather_data, fetch_weather_batch,
+)
+from feed_cache import feed_cache
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+GRID_STEP = 0.5          # degrees between grid nodes
+GRID_TTL = 3600          # Open-Meteo "current" values update hourly
+GRID_MAX_STALE = 2 * 3600   # past the TTL a grid still answers (while refreshing) this long
+MAX_DISTANCE_KM = 40     # farther than this from a usable node -> real fetch
+MIN_VALID_NODES = 0.5    # a refresh with fewer reporting nodes keeps the previous grid
+DIRECT_FETCH_POINTS = 50 # sample() fetches at most this many grid-covered points one by one
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+
+
+class WeatherField:
+    """
+    Coarse grid of Open-Meteo readings answering arbitrary points by
+    bilinear interpolation. The grid is fetched in a handful of batch
+    requests and refreshed in the background once it expires; an expired
+    grid keeps answering for `max_stale` more seconds, then is ignored.
+    """
+
+    def __init__(self, bbox=ONTARIO_BBOX, step=GRID_STEP, ttl=GRID_TTL,
+                 max_distance_km=MAX_DISTANCE_KM, store=None, max_stale=GRID_MAX_STALE):
+        lat_min, lat_max, lon_min, lon_max = bbox
+        self.store = store
+        self.bbox = bbox
+        self._store_checked = False
+        self._source = None          # weather endpoint the grid came from
+        self.step = step
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_distance_km = max_distance_km
+        self.lat_nodes = np.arange(lat_min, lat_max + step / 2, step)
+        self.lon_nodes = np.arange(lon_min, lon_max + step / 2, step)
+        self._grid = None            # (fields, lat nodes, lon nodes)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()     # one grid download at a time
+        self._refreshing = False
+        self._refresh_thread = None
+
+    @property
+    def _store_key(self):
+        return ('weather_grid', fetch_live_data.WEATHER_URL, self.bbox, self.step)
+
+    def _check_source(self):
+        """Forget a grid fetched from another endpoint (see configure_endpoints)."""
+        if self._source != fetch_live_data.WEATHER_URL:
+            with self._lock:
+                self._grid = self._loaded_at = None
+                self._source = fetch_live_data.WEATHER_URL
+                self._store_checked = False
+
+    def _warm_from_store(self):
+        """Adopt a grid another process (or a previous run) already fetched."""
+        self._store_checked = True
+        try:
+            hit = self.store.get(self._store_key)
+        except Exception as e:
+            log.warning("⚠️ Disk cache read failed for weather grid: %s", e)
+            return
+        if hit is not None and hit[1] < self.ttl:
+            with self._lock:
+                self._grid = hit[0]
+                self._loaded_at = time.monotonic() - hit[1]
+
+    def is_fresh(self):
+        self._check_source()
+        if self._grid is None and self.store is not None and not self._store_checked:
+            self._warm_from_store()
+        return self._grid is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def refresh(self):
+        """
+        Fetch every grid node (blocking). Returns False, keeping the previous
+        grid, when too few nodes reported (e.g. the weather circuit is open).
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh_now(self):
+        """Blocking refresh, unless one that just finished (or is running) made the grid fresh."""
+        with self._refresh_lock:
+            return self.is_fresh() or self._refresh()
+
+    def _refresh(self):
+        source, store_key = fetch_live_data.WEATHER_URL, self._store_key
+        lon_grid, lat_grid = np.meshgrid(self.lon_nodes, self.lat_nodes)
+        df = fetch_weather_batch(lat_grid.ravel(), lon_grid.ravel())
+        grid = df[WEATHER_FIELDS].to_numpy().T.reshape(
+            len(WEATHER_FIELDS), len(self.lat_nodes), len(self.lon_nodes)
+        )
+        reporting = float((~np.isnan(grid)).all(axis=0).mean())
+        if reporting < MIN_VALID_NODES:
+            log.warning("⚠️ Weather grid refresh got %.0f%% of nodes; keeping the previous grid",
+                        reporting * 100)
+            return False
+        with self._lock:
+            if source != fetch_live_data.WEATHER_URL:
+                return False      # endpoints changed mid-refresh; this grid belongs to the old one
+            self._grid = grid
+            self._loaded_at = time.monotonic()
+            self._source = source
+        if self.store is not None:
+            try:
+                self.store.set(store_key, grid, self.ttl)
+            except Exception as e:
+                log.warning("⚠️ Disk cache write failed for weather grid: %s", e)
+        return True
+
+    def refresh_async(self):
+        """Start a background refresh unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning("⚠️ Weather grid refresh failed: %s", e)
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        self._refresh_thread = threading.Thread(target=_run, name="weather-grid-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def wait_for_refresh(self, timeout=None):
+        """Block until a running background refresh has finished."""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _usable_grid(self):
+        """The grid, or None once it is more than max_stale past its TTL."""
+        with self._lock:
+            grid, loaded_at = self._grid, self._loaded_at
+        if grid is None or time.monotonic() - loaded_at >= self.ttl + self.max_stale:
+            return None
+        return grid
+
+    def _inside(self, lats, lons):
+        """Mask of points covered by the grid."""
+        return ((lats >= self.lat_nodes[0]) & (lats <= self.lat_nodes[-1]) &
+                (lons >= self.lon_nodes[0]) & (lons <= self.lon_nodes[-1]))
+
+    def interpolate(self, lats, lons):
+        """
+        Vectorized bilinear interpolation of every weather field.
+        Returns (DataFrame aligned with inputs, boolean mask of usable rows).
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        grid = self._usable_grid()
+        values = np.full((len(lats), len(WEATHER_FIELDS)), np.nan)
+        ok = np.zeros(len(lats), dtype=bool)
+
+        if grid is not None and len(lats):
+            fi = (lats - self.lat_nodes[0]) / self.step
+            fj = (lons - self.lon_nodes[0]) / self.step
+            inside = self._inside(lats, lons)
+            i0 = np.clip(np.floor(fi).astype(int), 0, len(self.lat_nodes) - 2)
+            j0 = np.clip(np.floor(fj).astype(int), 0, len(self.lon_nodes) - 2)
+            di, dj = fi - i0, fj - j0
+
+            corners = [(i0, j0, (1 - di) * (1 - dj)), (i0 + 1, j0, di * (1 - dj)),
+                       (i0, j0 + 1, (1 - di) * dj), (i0 + 1, j0 + 1, di * dj)]
+            total = np.zeros((len(lats), len(WEATHER_FIELDS)))
+            weight = np.zeros((len(lats), len(WEATHER_FIELDS)))
+            nearest_km = np.full(len(lats), np.inf)
+            km_per_lon = KM_PER_DEG_LON * np.cos(np.radians(lats))
+            for ci, cj, w in corners:
+                node = grid[:, ci, cj].T               # (points, fields)
+                valid = ~np.isnan(node)
+                total += np.where(valid, node, 0) * w[:, None]
+                weight += valid * w[:, None]
+                # Only nodes that actually reported count towards the distance check
+                node_ok = valid.all(axis=1)
+                dist = np.hypot((lats - self.lat_nodes[ci]) * KM_PER_DEG_LAT,
+                                (lons - self.lon_nodes[cj]) * km_per_lon)
+                nearest_km = np.where(node_ok, np.minimum(nearest_km, dist), nearest_km)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = total / weight
+            ok = inside & (nearest_km <= self.max_distance_km) & (weight > 0).all(axis=1)
+            values[~ok] = np.nan
+
+        result = pd.DataFrame(values, columns=WEATHER_FIELDS)
+        result.insert(0, 'longitude', lons)
+        result.insert(0, 'latitude', lats)
+        return result, ok
+
+    def sample(self, lats, lons):
+        """
+        Weather for many points. Past its TTL the grid still answers while a
+        background refresh runs; a cold grid (or one past max_stale) is
+        refreshed first when more than DIRECT_FETCH_POINTS points are asked
+        for, since one grid download beats a request per point. Points the
+        grid cannot answer are fetched directly when they lie outside it or
+        are few; otherwise they stay NaN ('source' is 'missing').
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        if not self.is_fresh():
+            if self._usable_grid() is None and len(lats) > DIRECT_FETCH_POINTS:
+                self._refresh_now()
+            else:
+                self.refresh_async()
+        result, ok = self.interpolate(lats, lons)
+        fetch = ~ok
+        if fetch.sum() > DIRECT_FETCH_POINTS:
+            fetch &= ~self._inside(lats, lons)
+        if fetch.any():
+            missing = fetch_weather_batch(lats[fetch], lons[fetch])
+            result.loc[fetch, WEATHER_FIELDS] = missing[WEATHER_FIELDS].to_numpy()
+        result['source'] = np.select([ok, fetch], ['interpolated', 'fetched'], 'missing')
+        return result
+
+    def weather_at(self, lat, lon):
+        """
+        Weather for one point in the same shape as fetch_weather_data().
+        Falls back to a real fetch when the point cannot be interpolated
+        (outside the grid, no nearby node, or the grid is too stale).
+        """
+        if not self.is_fresh():
+            self.refresh_async()
+        result, ok = self.interpolate([lat], [lon])
+        if not ok[0]:
+            return fetch_weather_data(lat, lon)
+        current = {field: round(float(result[field].iloc[0]), 1) for field in WEATHER_FIELDS}
+        return {'latitude': lat, 'longitude': lon, 'current': current, 'source': 'interpolated'}
+
+
+# Shared grid for every entry point in this process (persisted via the disk cache)
+weather_field = WeatherField(store=feed_cache.store)
+
+
+def get_interpolated_weather(lat=43.65, lon=-79.38):
+    """Weather for a point, served from the shared grid whenever possible."""
+    return weather_field.weather_at(lat, lon)
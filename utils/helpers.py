@@ -3,12 +3,29 @@
 # Purpose: Helper functions used across modules
 # ===============================================
 
-from datetime import datetime
+import logging
+import os
+import sys
 
-def log_message(message, level="INFO"):
-    """Simple logging function"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] [{level}] {message}")
+# log_config lives with the detection modules; make it importable from here
+_fire_detection_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'modules', 'fire_detection')
+if _fire_detection_dir not in sys.path:
+    sys.path.insert(0, _fire_detection_dir)
+
+from log_config import get_logger
+
+_logger = get_logger("utils")
+
+def log_message(message, level="INFO", *args):
+    """
+    Simple logging function on the shared EcoFlare logger. Extra args are
+    %-formatted into `message` only if the level is enabled.
+    """
+    levelno = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if not isinstance(levelno, int):
+        levelno = logging.INFO
+    _logger.log(levelno, message, *args)
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two coordinates (simplified)"""